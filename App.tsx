@@ -11,6 +11,7 @@ import SeniorTechnicianDashboard from './pages/SeniorTechnicianDashboard';
 import LandingPage from './pages/LandingPage';
 import LoginPage from './pages/LoginPage';
 import { UserRole } from './types';
+import { api } from './services/api';
 
 function App() {
   const [isAuthenticated, setIsAuthenticated] = useState(false);
@@ -41,6 +42,7 @@ function App() {
         console.error('[App] Error parsing user data from localStorage:', error);
         // Clear invalid data
         localStorage.removeItem('auth_token');
+        localStorage.removeItem('refresh_token');
         localStorage.removeItem('user');
       }
     }
@@ -52,8 +54,14 @@ function App() {
   };
 
   const handleLogout = () => {
+    // Revoke the session server-side; sign out locally regardless
+    const refreshToken = localStorage.getItem('refresh_token');
+    if (refreshToken) {
+      api.auth.logout(refreshToken).catch(() => undefined);
+    }
     // Clear localStorage
     localStorage.removeItem('auth_token');
+    localStorage.removeItem('refresh_token');
     localStorage.removeItem('user');
     // Reset state
     setIsAuthenticated(false);
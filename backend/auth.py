@@ -1,16 +1,29 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, Optional, Set, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from config import settings
 from models import User, UserRole
-from database import get_db
+from database import SessionLocal, get_db
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# Password hashing context; hashes made with another cost are rehashed on login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS
+)
 
 # HTTP Bearer token scheme
 security = HTTPBearer()
@@ -34,11 +47,26 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
+def create_user_access_token(user: User) -> str:
+    """
+    Create a short-lived access token carrying the user's identity and role
+    
+    Requests authenticate from these claims alone, unless the user changed
+    after the token was issued (see PrincipalCache.changed_since).
+    """
+    return create_access_token({
+        "sub": str(user.id),
+        "email": user.email,
+        "name": user.name,
+        "role": user.role.value,
+    })
+
+
 def decode_access_token(token: str) -> dict:
     """Decode and validate a JWT token"""
     try:
@@ -52,12 +80,165 @@ def decode_access_token(token: str) -> dict:
         )
 
 
+@dataclass(frozen=True)
+class Principal:
+    """Authenticated user, detached from any database session"""
+    id: int
+    email: str
+    name: str
+    role: UserRole
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email, name=user.name, role=user.role)
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> Optional["Principal"]:
+        """Principal from the claims of a user access token, None for older sub-only tokens"""
+        try:
+            return cls(
+                id=int(payload["sub"]),
+                email=payload["email"],
+                name=payload["name"],
+                role=UserRole(payload["role"])
+            )
+        except (KeyError, ValueError, TypeError):
+            return None
+
+
+class PrincipalCache:
+    """
+    Verified token -> Principal, so authenticated requests skip the JWT
+    decode (and the users query for tokens without role claims)
+
+    Entries live until the token expires or AUTH_CACHE_TTL_SECONDS pass,
+    whichever is first, and are dropped when the user is changed or deleted.
+    The time of that change is also kept, so role claims in tokens issued
+    before it are not trusted and the user is looked up again.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Tuple[Principal, float]] = {}
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._changed_at: Dict[int, float] = {}
+        self._all_changed_at = 0.0
+
+    def get(self, token: str) -> Optional[Principal]:
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        principal, expires_at = entry
+        if expires_at <= time.time():
+            self._discard(token)
+            return None
+        return principal
+
+    def put(self, token: str, principal: Principal, token_expires_at: Optional[float]):
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict()
+            self._entries[token] = (principal, expires_at)
+            self._tokens_by_user.setdefault(principal.id, set()).add(token)
+
+    def changed_since(self, user_id: int, issued_at: Optional[float]) -> bool:
+        """Whether the user changed after a token issued at `issued_at` (None: unknown)"""
+        changed_at = max(self._changed_at.get(user_id, 0.0), self._all_changed_at)
+        if not changed_at:
+            return False
+        return issued_at is None or issued_at < changed_at
+
+    def invalidate_user(self, user_id: int):
+        now = time.time()
+        with self._lock:
+            for token in self._tokens_by_user.pop(user_id, ()):
+                self._entries.pop(token, None)
+            self._changed_at[user_id] = now
+            # Tokens issued before the oldest remembered change have expired since
+            horizon = now - settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+            for changed_id in [uid for uid, at in self._changed_at.items() if at < horizon]:
+                del self._changed_at[changed_id]
+
+    def clear(self):
+        """Drop every entry and distrust the claims of all earlier tokens"""
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+            self._all_changed_at = time.time()
+
+    def _discard(self, token: str):
+        with self._lock:
+            entry = self._entries.pop(token, None)
+            if entry:
+                tokens = self._tokens_by_user.get(entry[0].id)
+                if tokens:
+                    tokens.discard(token)
+
+    def _evict(self):
+        """Drop expired entries, or the oldest ones if none have expired (lock held)"""
+        now = time.time()
+        victims = [token for token, (_, expires_at) in self._entries.items() if expires_at <= now]
+        if not victims:
+            victims = list(self._entries)[:max(1, self.max_entries // 10)]
+        for token in victims:
+            principal, _ = self._entries.pop(token)
+            tokens = self._tokens_by_user.get(principal.id)
+            if tokens:
+                tokens.discard(token)
+
+
+principal_cache = PrincipalCache(settings.AUTH_CACHE_TTL_SECONDS, settings.AUTH_CACHE_MAX_ENTRIES)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_changed_users(session, flush_context):
+    """Remember users whose identity or role changed until the transaction commits"""
+    changed = session.info.setdefault("changed_user_ids", set())
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            changed.add(obj.id)
+    for obj in session.dirty:
+        if isinstance(obj, User) and session.is_modified(obj, include_collections=False):
+            changed.add(obj.id)
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _collect_bulk_user_changes(orm_execute_state):
+    """Bulk UPDATE/DELETE on users cannot be attributed, so drop the whole cache"""
+    if orm_execute_state.is_update or orm_execute_state.is_delete:
+        mapper = orm_execute_state.bind_mapper
+        if mapper is not None and mapper.local_table.name == User.__tablename__:
+            orm_execute_state.session.info["users_bulk_changed"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _invalidate_committed_users(session):
+    if session.info.pop("users_bulk_changed", False):
+        principal_cache.clear()
+    for user_id in session.info.pop("changed_user_ids", ()):
+        principal_cache.invalidate_user(user_id)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back_users(session):
+    session.info.pop("changed_user_ids", None)
+    session.info.pop("users_bulk_changed", None)
+
+
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
+) -> Principal:
     """Get the current authenticated user from JWT token"""
     token = credentials.credentials
+    principal = principal_cache.get(token)
+    if principal is not None:
+        return principal
     
     try:
         payload = decode_access_token(token)
@@ -70,7 +251,12 @@ def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        # Convert string user_id to integer
+        principal = Principal.from_claims(payload)
+        if principal is not None and not principal_cache.changed_since(principal.id, payload.get("iat")):
+            principal_cache.put(token, principal, payload.get("exp"))
+            return principal
+        
+        # Tokens without role claims, or issued before the user last changed: look the user up
         try:
             user_id = int(user_id_str)
         except (ValueError, TypeError):
@@ -88,7 +274,9 @@ def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        return user
+        principal = Principal.from_user(user)
+        principal_cache.put(token, principal, payload.get("exp"))
+        return principal
         
     except JWTError:
         raise HTTPException(
@@ -102,7 +290,7 @@ def get_current_user(
 
 def require_role(required_role: UserRole):
     """Decorator to require a specific role"""
-    def role_checker(current_user: User = Depends(get_current_user)) -> User:
+    def role_checker(current_user: Principal = Depends(get_current_user)) -> Principal:
         if current_user.role != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -112,21 +300,14 @@ def require_role(required_role: UserRole):
     return role_checker
 
 
-def require_manager(current_user: User = Depends(get_current_user)) -> User:
+def require_manager(current_user: Principal = Depends(get_current_user)) -> Principal:
     """Require manager role"""
-    print(f"DEBUG [require_manager]: Checking user {current_user.email} (ID: {current_user.id})")
-    print(f"DEBUG [require_manager]: User role: {current_user.role}")
-    print(f"DEBUG [require_manager]: User role type: {type(current_user.role)}")
-    print(f"DEBUG [require_manager]: UserRole.MANAGER: {UserRole.MANAGER}")
-    print(f"DEBUG [require_manager]: Comparison: {current_user.role} == {UserRole.MANAGER} = {current_user.role == UserRole.MANAGER}")
-    
     if current_user.role != UserRole.MANAGER:
-        print(f"DEBUG [require_manager]: ACCESS DENIED for {current_user.email}")
+        logger.debug("Manager access denied for user %s (role %s)", current_user.id, current_user.role.value)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied. Manager role required."
         )
-    print(f"DEBUG [require_manager]: ACCESS GRANTED for {current_user.email}")
     return current_user
 
 
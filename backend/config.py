@@ -7,12 +7,61 @@ class Settings(BaseSettings):
     
     SECRET_KEY: str = "sla-guard-secret-key-change-in-production-2024"
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 1440  # 24 hours
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15  # Short-lived; clients renew with a refresh token
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 14
+    
+    # Authenticated-principal cache (entries never outlive their token)
+    AUTH_CACHE_TTL_SECONDS: int = 300
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+    
     DATABASE_URL: str = "sqlite:///./sla_guard.db"
     
+    # Password hashing: bcrypt cost, dedicated hashing threads and how many
+    # hashes may wait for them before logins are rejected with 503
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    
+    # Login throttling: failed attempts allowed per account and client IP / per account
+    # from any IP / per client IP in the window
+    LOGIN_THROTTLE_WINDOW_SECONDS: int = 300
+    LOGIN_MAX_FAILURES_PER_ACCOUNT: int = 5
+    LOGIN_MAX_FAILURES_PER_ACCOUNT_GLOBAL: int = 20
+    LOGIN_MAX_FAILURES_PER_IP: int = 50
+    
+    # Logging: global level, per-module overrides ("auth=DEBUG,apscheduler=WARNING"),
+    # "json" or "text" lines, and how many records may wait for the writer thread
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""
+    LOG_FORMAT: str = "json"
+    LOG_QUEUE_SIZE: int = 10000
+    
+    # How often each process checks the stored SLA policy version for changes made elsewhere
+    SLA_POLICY_CHECK_SECONDS: int = 5
+    
     # Scheduler settings
     SLA_CHECK_INTERVAL_MINUTES: int = 5
     
+    # Conditional GET: ETags of responses with time-derived fields roll over this often
+    ETAG_TIME_BUCKET_SECONDS: int = 60
+    
+    # Analytics result cache (entries are also invalidated by writes)
+    ANALYTICS_CACHE_TTL_SECONDS: int = 30
+    ANALYTICS_CACHE_MAX_ENTRIES: int = 512
+    
+    # Technician scorecards: longest rolling window, in days
+    SCORECARD_WINDOW_DAYS: int = 30
+    
+    # Delta sync: how long ticket change-log entries are kept
+    TICKET_CHANGE_RETENTION_DAYS: int = 30
+    
+    # Automatic assignment: weight of an open ticket in a technician's load, per priority
+    ASSIGNMENT_WEIGHT_CRITICAL: float = 4
+    ASSIGNMENT_WEIGHT_HIGH: float = 3
+    ASSIGNMENT_WEIGHT_MEDIUM: float = 2
+    ASSIGNMENT_WEIGHT_LOW: float = 1
+    AUTO_ASSIGN_ON_CREATE: bool = False  # Assign new unassigned tickets to the least-loaded technician
+    
     # Email settings (optional)
     EMAIL_ENABLED: bool = False  # Set to True to enable email notifications
     SMTP_SERVER: str = "smtp.gmail.com"
@@ -21,7 +70,7 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = ""
     FROM_EMAIL: str = "noreply@slaguard.com"
     
-    # SLA default configurations (hours)
+    # SLA default configurations (hours); also used for priorities without a stored config
     SLA_CRITICAL: int = 4
     SLA_HIGH: int = 8
     SLA_MEDIUM: int = 24
@@ -1,8 +1,11 @@
+import logging
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
 
+logger = logging.getLogger(__name__)
+
 # Create SQLite engine
 engine = create_engine(
     settings.DATABASE_URL,
@@ -27,22 +30,45 @@ def get_db():
 
 def init_db():
     """Initialize database tables"""
-    from models import User, Ticket, SLAConfig, Notification, ActivityLog
+    from models import User, RefreshToken, Ticket, SLAConfig, SLAPolicyVersion, CustomerSLAContract, CustomerSLATerm, EscalationRule, EscalationRuleHit, TechnicianProfile, TicketSkill, Notification, ActivityLog, TicketChange, TicketStateRollup, TicketActivityRollup, ResolutionSketchBin, TechnicianDailyStats, TicketDeadlineRollup, TicketDeadline
+    from sqlalchemy import inspect
+    new_escalation_rules = not inspect(engine).has_table(EscalationRule.__tablename__)
     Base.metadata.create_all(bind=engine)
     
+    # create_all skips existing tables, so add indexes declared after they were created
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    
     # Create default SLA configurations
     db = SessionLocal()
     try:
         existing_configs = db.query(SLAConfig).count()
         if existing_configs == 0:
+            from services.sla_policy import default_sla_hours
             default_configs = [
-                SLAConfig(priority="CRITICAL", sla_hours=4),
-                SLAConfig(priority="HIGH", sla_hours=8),
-                SLAConfig(priority="MEDIUM", sla_hours=24),
-                SLAConfig(priority="LOW", sla_hours=48),
+                SLAConfig(priority=priority, sla_hours=hours)
+                for priority, hours in default_sla_hours().items()
             ]
             db.add_all(default_configs)
             db.commit()
-            print("✅ Default SLA configurations created")
+            logger.info("Default SLA configurations created")
+        
+        # Seed the built-in escalation rule once, when the rules table is created
+        if new_escalation_rules:
+            from services.escalation_rules import DEFAULT_RULE
+            db.add(EscalationRule(**DEFAULT_RULE))
+            db.commit()
+            logger.info("Default escalation rule created")
+        
+        # Build analytics rollups for databases created before they existed
+        from services.rollups import rebuild_rollups, rollups_need_backfill
+        from services.breach_forecast import rebuild_ticket_deadlines, ticket_deadlines_need_backfill
+        if rollups_need_backfill(db):
+            processed = rebuild_rollups(db)
+            logger.info("Analytics rollups built from %d tickets", processed)
+        if ticket_deadlines_need_backfill(db):
+            indexed = rebuild_ticket_deadlines(db)
+            logger.info("SLA deadline index built for %d open tickets", indexed)
     finally:
         db.close()
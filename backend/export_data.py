@@ -0,0 +1,42 @@
+"""
+Export tickets, activity logs or comments to a file
+
+Usage:
+    python export_data.py tickets --format csv -o tickets.csv
+    python export_data.py activity_logs --format parquet --start 2024-01-01 -o logs.parquet
+    python export_data.py comments --format ndjson --gzip -o comments.ndjson.gz
+"""
+import argparse
+import sys
+from datetime import datetime
+from models import TicketStatus
+from services.data_export import EXPORT_DATASETS, EXPORT_FORMATS, stream_export
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a dataset export to a file")
+    parser.add_argument("dataset", choices=list(EXPORT_DATASETS))
+    parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="Only rows created at or after this time (UTC)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="Only rows created before this time (UTC)")
+    parser.add_argument("--status", type=TicketStatus, choices=list(TicketStatus), help="Only rows of tickets in this status")
+    parser.add_argument("--gzip", action="store_true", help="Compress the output")
+    parser.add_argument("-o", "--output", default="-", help="Output file (default: stdout)")
+    args = parser.parse_args()
+
+    try:
+        stream = stream_export(args.dataset, args.format, args.start, args.end, args.status, args.gzip)
+    except ValueError as e:
+        parser.error(str(e))
+
+    out = sys.stdout.buffer if args.output == "-" else open(args.output, "wb")
+    try:
+        for chunk in stream:
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Import tickets from an NDJSON or CSV file
+
+Usage:
+    python import_tickets.py tickets.ndjson --created-by manager@company.com
+    python import_tickets.py tickets.csv --format csv --batch-size 5000
+"""
+import argparse
+import sys
+import time
+from auth import Principal
+from database import SessionLocal, init_db
+from models import User
+from services.ticket_import import detect_format, import_tickets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import tickets from NDJSON or CSV")
+    parser.add_argument("path", help="Input file, or - for stdin")
+    parser.add_argument("--format", choices=["ndjson", "csv"], help="Input format (default: from file extension)")
+    parser.add_argument("--created-by", required=True, help="Email of the user recorded as ticket creator")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--notify-assignees", action="store_true")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    if not fmt:
+        parser.error("Cannot infer the format from the file name, pass --format")
+
+    init_db()
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.email == args.created_by).first()
+        if not user:
+            print(f"❌ User {args.created_by} not found")
+            sys.exit(1)
+        creator = Principal.from_user(user)
+
+        started = time.time()
+        if args.path == "-":
+            summary = import_tickets(db, sys.stdin, fmt, creator, args.batch_size, args.notify_assignees)
+        else:
+            with open(args.path, encoding="utf-8-sig", newline="") as stream:
+                summary = import_tickets(db, stream, fmt, creator, args.batch_size, args.notify_assignees)
+        elapsed = time.time() - started
+    finally:
+        db.close()
+
+    print(f"✅ Imported {summary['inserted']} of {summary['processed']} rows in {elapsed:.1f}s")
+    if summary["failed"]:
+        print(f"⚠️  {summary['failed']} rows failed:")
+        for error in summary["errors"]:
+            print(f"   - row {error['row']}: {error['error']}")
+        if summary["errors_truncated"]:
+            print("   ...")
+
+
+if __name__ == "__main__":
+    main()
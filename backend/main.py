@@ -1,9 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import logging
 from database import init_db
+from logging_config import RequestIdMiddleware, setup_logging
 from scheduler import start_scheduler, stop_scheduler
-from routers import auth, tickets, notifications, analytics, sla, comments, users, tickets_extended, activity_logs
+from services.sla_policy import sla_policy
+from routers import auth, tickets, notifications, analytics, sla, escalation_rules, assignment, comments, users, tickets_extended, tickets_bulk, activity_logs, exports, dashboard
+
+setup_logging()
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
@@ -12,31 +18,24 @@ async def lifespan(app: FastAPI):
     Lifespan context manager for startup and shutdown events
     """
     # Startup
-    print("\n" + "="*60)
-    print("🚀 Starting SLA Guard Backend Server (Debug Mode)")
-    print("="*60)
+    logger.info("Starting SLA Guard backend")
     
     # Initialize database
-    print("📊 Initializing database...")
     init_db()
-    print("✅ Database initialized")
+    sla_policy.limits()
+    logger.info("Database initialized")
     
     # Start scheduler
-    print("⏰ Starting background scheduler...")
     start_scheduler()
-    print("✅ Scheduler started")
     
-    print("="*60)
-    print("✨ SLA Guard Backend is ready!")
-    print("📖 API Documentation: http://localhost:8000/docs")
-    print("="*60 + "\n")
+    logger.info("SLA Guard backend is ready, API documentation at /docs")
     
     yield
     
     # Shutdown
-    print("\n🛑 Shutting down SLA Guard Backend...")
+    logger.info("Shutting down SLA Guard backend")
     stop_scheduler()
-    print("✅ Shutdown complete\n")
+    logger.info("Shutdown complete")
 
 
 # Create FastAPI application
@@ -47,6 +46,9 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Tag every request (and its log records) with an X-Request-ID
+app.add_middleware(RequestIdMiddleware)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -54,18 +56,24 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Change-Cursor", "X-Request-ID"],
 )
 
 # Include routers
 app.include_router(auth.router)
+app.include_router(tickets_bulk.router)  # Before tickets so /tickets/bulk/* is not read as a ticket id
 app.include_router(tickets.router)
 app.include_router(tickets_extended.router)
 app.include_router(users.router)
 app.include_router(notifications.router)
 app.include_router(analytics.router)
 app.include_router(sla.router)
+app.include_router(escalation_rules.router)
+app.include_router(assignment.router)
 app.include_router(comments.router)
 app.include_router(activity_logs.router)
+app.include_router(exports.router)
+app.include_router(dashboard.router)
 
 
 @app.get("/")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, ForeignKey, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, ForeignKey, JSON, UniqueConstraint, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -37,6 +37,15 @@ class RiskLevel(str, enum.Enum):
     BREACHED = "BREACHED"
 
 
+class TicketChangeType(str, enum.Enum):
+    """Ticket change-log entry types"""
+    CREATED = "CREATED"
+    UPDATED = "UPDATED"
+    RESOLVED = "RESOLVED"
+    DELETED = "DELETED"
+    RISK_CHANGED = "RISK_CHANGED"
+
+
 class NotificationType(str, enum.Enum):
     """Notification types"""
     INFO = "INFO"
@@ -44,6 +53,13 @@ class NotificationType(str, enum.Enum):
     ALERT = "ALERT"
 
 
+class EscalationAction(str, enum.Enum):
+    """What an escalation rule does to the tickets it matches"""
+    ESCALATE = "ESCALATE"
+    REASSIGN = "REASSIGN"
+    NOTIFY = "NOTIFY"
+
+
 class User(Base):
     """User model for authentication and authorization"""
     __tablename__ = "users"
@@ -68,12 +84,12 @@ class Ticket(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
-    customer = Column(String, nullable=False)
+    customer = Column(String, nullable=False, index=True)
     description = Column(String, nullable=True)
     priority = Column(SQLEnum(TicketPriority), nullable=False, default=TicketPriority.MEDIUM)
     status = Column(SQLEnum(TicketStatus), nullable=False, default=TicketStatus.OPEN)
-    assignee_id = Column(Integer, ForeignKey("users.id"), nullable=True)
-    created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    assignee_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
+    created_by_user_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     resolved_at = Column(DateTime, nullable=True)
@@ -85,6 +101,109 @@ class Ticket(Base):
     creator = relationship("User", foreign_keys=[created_by_user_id])
     activity_logs = relationship("ActivityLog", back_populates="ticket", cascade="all, delete-orphan")
     comments = relationship("Comment", back_populates="ticket", cascade="all, delete-orphan")
+    skill_requirement = relationship("TicketSkill", uselist=False, cascade="all, delete-orphan")
+
+
+class RefreshToken(Base):
+    """Server-side refresh token; only a hash of the token is stored"""
+    __tablename__ = "refresh_tokens"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    token_hash = Column(String(64), unique=True, index=True, nullable=False)
+    family_id = Column(String(32), nullable=False, index=True)  # Shared by all rotations of one login
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=True)
+
+
+class TicketChange(Base):
+    """Append-only change log of tickets, used as the delta-sync cursor"""
+    __tablename__ = "ticket_changes"
+    __table_args__ = {"sqlite_autoincrement": True}  # Never reuse cursor values
+    
+    id = Column(Integer, primary_key=True, index=True)  # Monotonic sync cursor
+    ticket_id = Column(Integer, nullable=False, index=True)  # No FK: deleted tickets keep their entries
+    change_type = Column(SQLEnum(TicketChangeType), nullable=False)
+    assignee_id = Column(Integer, nullable=True, index=True)
+    previous_assignee_id = Column(Integer, nullable=True)
+    created_by_user_id = Column(Integer, nullable=True, index=True)
+    risk_from = Column(SQLEnum(RiskLevel), nullable=True)
+    risk_to = Column(SQLEnum(RiskLevel), nullable=True)
+    changed_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class TicketStateRollup(Base):
+    """Current ticket counts per status, risk level, priority and assignee"""
+    __tablename__ = "ticket_state_rollups"
+    
+    status = Column(SQLEnum(TicketStatus), primary_key=True)
+    risk_level = Column(SQLEnum(RiskLevel), primary_key=True)
+    priority = Column(SQLEnum(TicketPriority), primary_key=True)
+    assignee_id = Column(Integer, primary_key=True)  # 0 = unassigned
+    ticket_count = Column(Integer, nullable=False, default=0)
+
+
+class TicketActivityRollup(Base):
+    """Ticket lifecycle counts per time bucket, priority and assignee"""
+    __tablename__ = "ticket_activity_rollups"
+    
+    granularity = Column(String, primary_key=True)  # "hour" or "day"
+    bucket_start = Column(DateTime, primary_key=True)
+    priority = Column(SQLEnum(TicketPriority), primary_key=True)
+    assignee_id = Column(Integer, primary_key=True)  # 0 = unassigned
+    created_count = Column(Integer, nullable=False, default=0)
+    resolved_count = Column(Integer, nullable=False, default=0)
+    resolved_within_sla_count = Column(Integer, nullable=False, default=0)
+    breached_count = Column(Integer, nullable=False, default=0)  # Bucketed by SLA deadline
+    resolution_hours = Column(Float, nullable=False, default=0.0)
+
+
+class ResolutionSketchBin(Base):
+    """Quantile-sketch bin counts of resolution metrics per week, priority and assignee"""
+    __tablename__ = "resolution_sketch_bins"
+    
+    metric = Column(String, primary_key=True)  # "resolution_hours" or "breach_overrun_hours"
+    week_start = Column(DateTime, primary_key=True)
+    priority = Column(SQLEnum(TicketPriority), primary_key=True)
+    assignee_id = Column(Integer, primary_key=True)  # 0 = unassigned
+    bin_index = Column(Integer, primary_key=True)
+    bin_count = Column(Integer, nullable=False, default=0)
+
+
+class TicketDeadlineRollup(Base):
+    """Open tickets per SLA deadline hour, priority and assignee (breach forecast histogram)"""
+    __tablename__ = "ticket_deadline_rollups"
+    
+    deadline_hour = Column(DateTime, primary_key=True)
+    priority = Column(SQLEnum(TicketPriority), primary_key=True)
+    assignee_id = Column(Integer, primary_key=True)  # 0 = unassigned
+    open_count = Column(Integer, nullable=False, default=0)
+
+
+class TicketDeadline(Base):
+    """SLA deadline of each open ticket, indexed for nearest-deadline lookups"""
+    __tablename__ = "ticket_deadlines"
+    
+    ticket_id = Column(Integer, primary_key=True)  # No FK: maintained by session hooks
+    deadline = Column(DateTime, nullable=False, index=True)
+    priority = Column(SQLEnum(TicketPriority), nullable=False)
+    assignee_id = Column(Integer, nullable=True)
+
+
+class TechnicianDailyStats(Base):
+    """Per-technician performance counters per day, source of the scorecards"""
+    __tablename__ = "technician_daily_stats"
+    
+    technician_id = Column(Integer, primary_key=True)
+    day = Column(DateTime, primary_key=True)
+    resolved_count = Column(Integer, nullable=False, default=0)
+    resolution_hours = Column(Float, nullable=False, default=0.0)
+    breached_resolved_count = Column(Integer, nullable=False, default=0)  # Resolved after the SLA deadline
+    escalations_received = Column(Integer, nullable=False, default=0)
+    reopened_count = Column(Integer, nullable=False, default=0)
+    reassigned_in_count = Column(Integer, nullable=False, default=0)
+    reassigned_out_count = Column(Integer, nullable=False, default=0)
 
 
 class SLAConfig(Base):
@@ -96,6 +215,43 @@ class SLAConfig(Base):
     sla_hours = Column(Float, nullable=False)
 
 
+class CustomerSLAContract(Base):
+    """Customer-specific SLA terms, overriding the per-priority defaults for that customer's tickets"""
+    __tablename__ = "customer_sla_contracts"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    customer = Column(String, unique=True, nullable=False)
+    # Optional business calendar (UTC): SLA hours only count inside these hours
+    business_start_hour = Column(Integer, nullable=True)
+    business_end_hour = Column(Integer, nullable=True)
+    business_days = Column(String, nullable=True)  # Comma-separated weekdays, 0 = Monday
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    terms = relationship("CustomerSLATerm", back_populates="contract", cascade="all, delete-orphan")
+
+
+class CustomerSLATerm(Base):
+    """SLA hours for one priority under a customer contract"""
+    __tablename__ = "customer_sla_terms"
+    __table_args__ = (UniqueConstraint("contract_id", "priority"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    contract_id = Column(Integer, ForeignKey("customer_sla_contracts.id", ondelete="CASCADE"), nullable=False)
+    priority = Column(String, nullable=False)
+    sla_hours = Column(Float, nullable=False)
+    
+    contract = relationship("CustomerSLAContract", back_populates="terms")
+
+
+class SLAPolicyVersion(Base):
+    """Single-row counter bumped with every SLA config or contract change, checked by all processes"""
+    __tablename__ = "sla_policy_version"
+    
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
 class Notification(Base):
     """Notification model for alerts"""
     __tablename__ = "notifications"
@@ -117,7 +273,7 @@ class ActivityLog(Base):
     __tablename__ = "activity_logs"
     
     id = Column(Integer, primary_key=True, index=True)
-    ticket_id = Column(Integer, ForeignKey("tickets.id"), nullable=False)
+    ticket_id = Column(Integer, ForeignKey("tickets.id"), nullable=False, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     action = Column(String, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow)
@@ -133,7 +289,7 @@ class Comment(Base):
     __tablename__ = "comments"
     
     id = Column(Integer, primary_key=True, index=True)
-    ticket_id = Column(Integer, ForeignKey("tickets.id"), nullable=False)
+    ticket_id = Column(Integer, ForeignKey("tickets.id"), nullable=False, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     content = Column(String, nullable=False)
     is_internal = Column(Boolean, default=False)  # Internal comments visible to managers only
@@ -143,3 +299,48 @@ class Comment(Base):
     # Relationships
     ticket = relationship("Ticket", back_populates="comments")
     user = relationship("User", back_populates="comments")
+
+
+class EscalationRule(Base):
+    """Configurable escalation rule, evaluated by the SLA monitoring job"""
+    __tablename__ = "escalation_rules"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    position = Column(Integer, nullable=False, default=0)  # Rules are tried in ascending position
+    enabled = Column(Boolean, nullable=False, default=True)
+    conditions = Column(JSON, nullable=False, default=dict)  # See schemas.EscalationConditions
+    action = Column(SQLEnum(EscalationAction), nullable=False)
+    target_user_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)  # REASSIGN
+    target_role = Column(SQLEnum(UserRole), nullable=True)  # REASSIGN to the least-loaded user of a role
+    notify_target = Column(String, nullable=True)  # NOTIFY: MANAGERS or ASSIGNEE
+    message = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class EscalationRuleHit(Base):
+    """A rule acted on a ticket; each rule acts on a ticket at most once"""
+    __tablename__ = "escalation_rule_hits"
+    
+    rule_id = Column(Integer, ForeignKey("escalation_rules.id", ondelete="CASCADE"), primary_key=True)
+    ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="CASCADE"), primary_key=True, index=True)
+    fired_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class TechnicianProfile(Base):
+    """Skills and capacity of a technician for automatic assignment"""
+    __tablename__ = "technician_profiles"
+    
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    skills = Column(String, nullable=False, default="")  # Comma-separated, lowercase
+    capacity = Column(Float, nullable=True)  # Maximum weighted open load; None = unlimited
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class TicketSkill(Base):
+    """Skill a ticket needs, used to route automatic assignment"""
+    __tablename__ = "ticket_skills"
+    
+    ticket_id = Column(Integer, ForeignKey("tickets.id", ondelete="CASCADE"), primary_key=True)
+    skill = Column(String, nullable=False, index=True)
@@ -0,0 +1,27 @@
+"""
+Rebuild the analytics rollup tables and the SLA deadline index from the tickets table
+
+Usage:
+    python rebuild_rollups.py
+"""
+import time
+from database import SessionLocal, init_db
+from services.breach_forecast import rebuild_ticket_deadlines
+from services.rollups import rebuild_rollups
+
+
+def main():
+    init_db()
+    db = SessionLocal()
+    try:
+        started = time.time()
+        processed = rebuild_rollups(db)
+        indexed = rebuild_ticket_deadlines(db)
+        elapsed = time.time() - started
+    finally:
+        db.close()
+    print(f"✅ Rebuilt analytics rollups from {processed} tickets and indexed {indexed} open deadlines in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
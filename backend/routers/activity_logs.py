@@ -1,12 +1,12 @@
 """
 Activity log endpoints for viewing ticket history
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from typing import List
 from database import get_db
-from models import ActivityLog, Ticket, User
-from auth import get_current_user
+from models import ActivityLog
+from services.visibility import VisibilityScope, get_visibility_scope
 from pydantic import BaseModel
 from datetime import datetime
 
@@ -39,19 +39,13 @@ def enrich_activity_log(log: ActivityLog) -> dict:
 def get_ticket_activity_logs(
     ticket_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    scope: VisibilityScope = Depends(get_visibility_scope)
 ):
     """
     Get all activity logs for a ticket
     """
-    # Check if ticket exists
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-    
-    if not ticket:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Ticket not found"
-        )
+    # Activity follows the visibility of its ticket
+    scope.get_ticket(db, ticket_id)
     
     # Get activity logs
     logs = db.query(ActivityLog).filter(
@@ -1,133 +1,214 @@
-from fastapi import APIRouter, Depends
+import logging
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from database import get_db
-from models import Ticket, User, UserRole, TicketStatus, RiskLevel
-from schemas import AnalyticsOverview, RiskDistribution, TechnicianWorkload
-from auth import get_current_user, require_manager
-from typing import List
+from models import User, UserRole, TicketPriority
+from schemas import (
+    AnalyticsCacheStats, AnalyticsOverview, BreachForecast, RiskDistribution, ResolutionPercentiles,
+    TechnicianScorecard, TechnicianWorkload, TrendPoint
+)
+from auth import Principal, get_current_user, require_manager
+from services.analytics import TECHNICIAN_ROLES, compute_overview, compute_risk_distribution, compute_technician_workload
+from services.analytics_cache import analytics_cache
+from services.data_version import conditional_get
+from services.rollups import PERCENTILE_GROUPS, get_activity_trend, get_resolution_percentiles
+from services.scorecards import scorecard_store
+from services.breach_forecast import DEFAULT_HORIZONS, MAX_HORIZON_HOURS, forecast_breaches
+from config import settings
+from services.serialization import fast_json_response
+from services.visibility import VisibilityScope, get_visibility_scope
+from datetime import datetime
+from typing import List, Optional
 
-router = APIRouter(prefix="/analytics", tags=["Analytics"])
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/analytics", tags=["Analytics"], default_response_class=ORJSONResponse)
 
 
 @router.get("/overview", response_model=AnalyticsOverview)
 def get_analytics_overview(
+    validators: dict = Depends(conditional_get("tickets")),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    scope: VisibilityScope = Depends(get_visibility_scope)
 ):
     """
-    Get dashboard analytics overview
+    Get dashboard analytics overview of the tickets visible to the user
     """
-    # Total tickets
-    total_tickets = db.query(Ticket).count()
-    
-    # High risk tickets
-    high_risk_tickets = db.query(Ticket).filter(
-        Ticket.risk_level.in_([RiskLevel.HIGH_RISK, RiskLevel.BREACHED]),
-        Ticket.status != TicketStatus.RESOLVED
-    ).count()
-    
-    # Breached tickets
-    breached_tickets = db.query(Ticket).filter(
-        Ticket.risk_level == RiskLevel.BREACHED
-    ).count()
-    
-    # Average resolution time (for resolved tickets)
-    resolved_tickets = db.query(Ticket).filter(
-        Ticket.status == TicketStatus.RESOLVED,
-        Ticket.resolved_at.isnot(None)
-    ).all()
-    
-    if resolved_tickets:
-        total_hours = sum([
-            (ticket.resolved_at - ticket.created_at).total_seconds() / 3600
-            for ticket in resolved_tickets
-        ])
-        avg_resolution_hours = total_hours / len(resolved_tickets)
-    else:
-        avg_resolution_hours = 0.0
-    
-    # Status counts
-    open_tickets = db.query(Ticket).filter(Ticket.status == TicketStatus.OPEN).count()
-    in_progress_tickets = db.query(Ticket).filter(Ticket.status == TicketStatus.IN_PROGRESS).count()
-    resolved_tickets_count = db.query(Ticket).filter(Ticket.status == TicketStatus.RESOLVED).count()
-    escalated_tickets = db.query(Ticket).filter(Ticket.status == TicketStatus.ESCALATED).count()
-    
-    return AnalyticsOverview(
-        total_tickets=total_tickets,
-        high_risk_tickets=high_risk_tickets,
-        breached_tickets=breached_tickets,
-        avg_resolution_hours=round(avg_resolution_hours, 2),
-        open_tickets=open_tickets,
-        in_progress_tickets=in_progress_tickets,
-        resolved_tickets=resolved_tickets_count,
-        escalated_tickets=escalated_tickets
+    overview = analytics_cache.get_or_compute(
+        ("overview", *scope.cache_key), ("tickets",), lambda: compute_overview(db, scope)
     )
+    return AnalyticsOverview(**overview)
 
 
 @router.get("/risk-distribution", response_model=RiskDistribution)
 def get_risk_distribution(
+    validators: dict = Depends(conditional_get("tickets")),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    scope: VisibilityScope = Depends(get_visibility_scope)
 ):
     """
-    Get distribution of tickets by risk level
+    Get distribution of the tickets visible to the user by risk level
     """
-    safe = db.query(Ticket).filter(Ticket.risk_level == RiskLevel.SAFE).count()
-    warning = db.query(Ticket).filter(Ticket.risk_level == RiskLevel.WARNING).count()
-    high_risk = db.query(Ticket).filter(Ticket.risk_level == RiskLevel.HIGH_RISK).count()
-    breached = db.query(Ticket).filter(Ticket.risk_level == RiskLevel.BREACHED).count()
-    
-    return RiskDistribution(
-        safe=safe,
-        warning=warning,
-        high_risk=high_risk,
-        breached=breached
+    distribution = analytics_cache.get_or_compute(
+        ("risk-distribution", *scope.cache_key), ("tickets",), lambda: compute_risk_distribution(db, scope)
+    )
+    return RiskDistribution(**distribution)
+
+
+@router.get("/trend", response_model=List[TrendPoint])
+def get_trend(
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    priority: Optional[TicketPriority] = None,
+    assignee_id: Optional[int] = Query(None, description="0 for unassigned tickets"),
+    validators: dict = Depends(conditional_get("tickets")),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Get created/resolved/breached counts per hour or day (Manager only)
+    """
+    trend = analytics_cache.get_or_compute(
+        ("trend", current_user.role.value, granularity, start, end, priority, assignee_id),
+        ("tickets",),
+        lambda: get_activity_trend(db, granularity, start, end, priority, assignee_id)
     )
+    return fast_json_response(trend, headers=validators)
+
+
+@router.get("/resolution-percentiles", response_model=List[ResolutionPercentiles])
+def get_resolution_time_percentiles(
+    group_by: Optional[str] = Query(None, pattern=f"^({'|'.join(PERCENTILE_GROUPS)})$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    priority: Optional[TicketPriority] = None,
+    assignee_id: Optional[int] = Query(None, description="0 for unassigned tickets"),
+    validators: dict = Depends(conditional_get("tickets")),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Get p50/p90/p99 resolution time and SLA overrun, optionally per priority, technician or week (Manager only)
+    """
+    def compute():
+        results = get_resolution_percentiles(db, group_by, start, end, priority, assignee_id)
+        if group_by == "technician":
+            names = dict(db.query(User.id, User.name).filter(User.id.in_([r["group"] for r in results])).all())
+        for result in results:
+            group = result["group"]
+            if group_by == "priority":
+                result["group"] = group.value
+            elif group_by == "week":
+                result["group"] = group.date().isoformat()
+            elif group_by == "technician":
+                result["group"] = names.get(group, "Unassigned")
+        return results
+
+    results = analytics_cache.get_or_compute(
+        ("resolution-percentiles", current_user.role.value, group_by, start, end, priority, assignee_id),
+        ("tickets", "users"),
+        compute
+    )
+    return fast_json_response(results, headers=validators)
 
 
 @router.get("/technician-workload", response_model=List[TechnicianWorkload])
 def get_technician_workload(
+    role: Optional[List[UserRole]] = Query(None, description="Limit to these roles (default: technicians and senior technicians)"),
+    technician_id: Optional[List[int]] = Query(None, description="Limit to these technicians, e.g. one team"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get workload summary for all technicians (Manager only)
     """
-    # Manual role check with better debugging
     if current_user.role != UserRole.MANAGER:
-        print(f"DEBUG: User {current_user.email} (role: {current_user.role}) attempted to access technician-workload")
+        logger.debug("Technician workload denied for user %s (role %s)", current_user.id, current_user.role.value)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"Access denied. Manager role required. Your role: {current_user.role}"
         )
     
-    # Get both technicians and senior technicians
-    technicians = db.query(User).filter(
-        User.role.in_([UserRole.TECHNICIAN, UserRole.SENIOR_TECHNICIAN])
-    ).all()
-    
-    workload_data = []
-    for tech in technicians:
-        assigned_tickets = db.query(Ticket).filter(
-            Ticket.assignee_id == tech.id,
-            Ticket.status != TicketStatus.RESOLVED
-        ).count()
-        
-        high_risk_tickets = db.query(Ticket).filter(
-            Ticket.assignee_id == tech.id,
-            Ticket.risk_level.in_([RiskLevel.HIGH_RISK, RiskLevel.BREACHED]),
-            Ticket.status != TicketStatus.RESOLVED
-        ).count()
-        
-        workload_data.append(
-            TechnicianWorkload(
-                technician_id=tech.id,
-                technician_name=tech.name,
-                assigned_tickets=assigned_tickets,
-                high_risk_tickets=high_risk_tickets,
-                role=tech.role.value  # Add role field
-            )
+    workload = analytics_cache.get_or_compute(
+        ("technician-workload", current_user.role.value, tuple(role or ()), tuple(technician_id or ())),
+        ("tickets", "users"),
+        lambda: compute_technician_workload(db, role, technician_id)
+    )
+    return fast_json_response(workload)
+
+
+@router.get("/breach-forecast", response_model=BreachForecast)
+def get_breach_forecast(
+    horizon: List[int] = Query(list(DEFAULT_HORIZONS), description="Hours ahead; repeat for several horizons"),
+    priority: Optional[TicketPriority] = None,
+    assignee_id: Optional[int] = Query(None, description="0 for unassigned tickets"),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Get how many open tickets will breach their SLA in the next hours, by priority and assignee (Manager only)
+    """
+    if any(hours < 1 or hours > MAX_HORIZON_HOURS for hours in horizon):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Horizons must be between 1 and {MAX_HORIZON_HOURS} hours"
         )
-    
-    return workload_data
+    forecast = forecast_breaches(db, horizon, priority, assignee_id)
+    assignee_ids = {row["assignee_id"] for entry in forecast["horizons"] for row in entry["by_assignee"]}
+    names = dict(db.query(User.id, User.name).filter(User.id.in_(assignee_ids)).all()) if assignee_ids else {}
+    for entry in forecast["horizons"]:
+        for row in entry["by_assignee"]:
+            row["assignee_name"] = names.get(row["assignee_id"], "Unassigned")
+    return fast_json_response(forecast)
+
+
+@router.get("/scorecards", response_model=List[TechnicianScorecard])
+def get_technician_scorecards(
+    window_days: int = Query(7, ge=1, le=settings.SCORECARD_WINDOW_DAYS),
+    technician_id: Optional[List[int]] = Query(None),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Get rolling-window performance scorecards of all technicians (Manager only)
+    """
+    query = db.query(User.id, User.name).filter(User.role.in_(TECHNICIAN_ROLES))
+    if technician_id:
+        query = query.filter(User.id.in_(technician_id))
+    return fast_json_response([
+        {**scorecard_store.scorecard(user_id, window_days), "technician_name": name}
+        for user_id, name in query.order_by(User.id).all()
+    ])
+
+
+@router.get("/scorecards/{technician_id}", response_model=TechnicianScorecard)
+def get_technician_scorecard(
+    technician_id: int,
+    window_days: int = Query(7, ge=1, le=settings.SCORECARD_WINDOW_DAYS),
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Get one technician's scorecard (Managers, or the technician themselves)
+    """
+    if current_user.role != UserRole.MANAGER and current_user.id != technician_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to view this scorecard"
+        )
+    technician = db.query(User).filter(User.id == technician_id).first()
+    if not technician:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    return fast_json_response({**scorecard_store.scorecard(technician_id, window_days), "technician_name": technician.name})
+
+
+@router.get("/cache-stats", response_model=AnalyticsCacheStats)
+def get_cache_stats(current_user: Principal = Depends(require_manager)):
+    """
+    Get analytics cache hit/miss statistics (Manager only)
+    """
+    return AnalyticsCacheStats(**analytics_cache.stats())
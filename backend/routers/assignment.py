@@ -0,0 +1,56 @@
+"""
+Technician skills, capacity and load for automatic assignment (Manager only)
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List
+from database import get_db
+from models import TechnicianProfile, User
+from schemas import TechnicianAssignmentResponse, TechnicianProfileUpdate
+from auth import Principal, require_manager
+from services.assignment import ASSIGNABLE_ROLES, assignment_engine, parse_skills
+
+router = APIRouter(prefix="/assignment", tags=["Assignment"])
+
+
+@router.get("/technicians", response_model=List[TechnicianAssignmentResponse])
+def list_technician_loads(
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Skills, capacity and current weighted load of every technician
+    """
+    return assignment_engine.technicians()
+
+
+@router.put("/technicians/{user_id}", response_model=TechnicianAssignmentResponse)
+def update_technician_profile(
+    user_id: int,
+    profile_data: TechnicianProfileUpdate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Set a technician's skills and capacity (maximum weighted open load)
+    """
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+    if user.role not in ASSIGNABLE_ROLES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Only technicians and senior technicians take assignments"
+        )
+
+    profile = db.query(TechnicianProfile).filter(TechnicianProfile.user_id == user_id).first()
+    if not profile:
+        profile = TechnicianProfile(user_id=user_id)
+        db.add(profile)
+    profile.skills = ",".join(parse_skills(profile_data.skills))
+    profile.capacity = profile_data.capacity
+    db.commit()
+
+    return next(entry for entry in assignment_engine.technicians() if entry["user_id"] == user_id)
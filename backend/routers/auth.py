@@ -1,20 +1,41 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from database import get_db
 from models import User
-from schemas import UserCreate, UserLogin, UserResponse, Token
-from auth import get_password_hash, authenticate_user, create_access_token
+from schemas import UserCreate, UserLogin, UserResponse, Token, RefreshTokenRequest, SessionsRevoked
+from auth import Principal, get_password_hash, create_user_access_token, require_manager
+from config import settings
+from services.login_security import HashingBusy, authenticate, login_throttle, password_executor
+from services.refresh_tokens import (
+    issue_refresh_token,
+    revoke_refresh_token,
+    revoke_user_refresh_tokens,
+    rotate_refresh_token
+)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
+def _save_new_user(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
     """
     Register a new user
+    
+    The password is hashed on the password executor; database calls run in
+    the threadpool, so no request thread waits on bcrypt.
     """
     # Check if user already exists
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await run_in_threadpool(
+        lambda: db.query(User).filter(User.email == user_data.email).first()
+    )
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -22,7 +43,14 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    try:
+        hashed_password = await password_executor.run(get_password_hash, user_data.password)
+    except HashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"},
+        )
     new_user = User(
         email=user_data.email,
         name=user_data.name,
@@ -30,32 +58,98 @@ def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
         role=user_data.role
     )
     
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    
-    return new_user
+    return await run_in_threadpool(_save_new_user, db, new_user)
+
+
+def token_response(user: User, refresh_token: str) -> dict:
+    """Access/refresh token pair for a user"""
+    return {
+        "access_token": create_user_access_token(user),
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        "refresh_token": refresh_token,
+        "user": user
+    }
 
 
 @router.post("/login", response_model=Token)
-def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, request: Request, db: Session = Depends(get_db)):
     """
     Login and receive JWT token
+    
+    Repeated failures for an account or client are throttled (429), and
+    logins are refused with 503 while password hashing is saturated.
     """
-    user = authenticate_user(db, user_credentials.email, user_credentials.password)
+    email = user_credentials.email
+    client_ip = request.client.host if request.client else None
+    retry_after = login_throttle.retry_after(email, client_ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, try again later",
+            headers={"Retry-After": str(retry_after)},
+        )
+    
+    try:
+        user = await authenticate(db, email, user_credentials.password)
+    except HashingBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server busy, please retry",
+            headers={"Retry-After": "1"},
+        )
     
     if not user:
+        login_throttle.record_failure(email, client_ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    login_throttle.record_success(email, client_ip)
     
-    # Create access token
-    access_token = create_access_token(data={"sub": str(user.id)})
+    refresh_token = await run_in_threadpool(issue_refresh_token, db, user)
+    return token_response(user, refresh_token)
+
+
+@router.post("/refresh", response_model=Token)
+def refresh(request_data: RefreshTokenRequest, db: Session = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token and refresh token
     
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": user
-    }
+    The user is re-read, so role changes take effect here.
+    """
+    try:
+        user, refresh_token = rotate_refresh_token(db, request_data.refresh_token)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return token_response(user, refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(request_data: RefreshTokenRequest, db: Session = Depends(get_db)):
+    """
+    Revoke the session of a refresh token
+    
+    Access tokens already issued stay valid until they expire.
+    """
+    revoke_refresh_token(db, request_data.refresh_token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.delete("/users/{user_id}/sessions", response_model=SessionsRevoked)
+def revoke_user_sessions(
+    user_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Revoke all refresh tokens of a user (Manager only)
+    
+    The user is signed out once their current access token expires.
+    """
+    return {"user_id": user_id, "revoked": revoke_user_refresh_tokens(db, user_id)}
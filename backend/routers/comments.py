@@ -2,8 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from typing import List
 from database import get_db
-from models import Comment, Ticket, User, UserRole
-from auth import get_current_user
+from models import Comment, UserRole
+from auth import Principal, get_current_user
+from services.visibility import VisibilityScope, get_visibility_scope
 
 router = APIRouter(prefix="/comments", tags=["Comments"])
 
@@ -43,25 +44,14 @@ def enrich_comment_response(comment: Comment) -> dict:
 def create_comment(
     comment_data: CommentCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user),
+    scope: VisibilityScope = Depends(get_visibility_scope)
 ):
     """
     Create a new comment on a ticket
     """
-    # Check if ticket exists
-    ticket = db.query(Ticket).filter(Ticket.id == comment_data.ticket_id).first()
-    if not ticket:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Ticket not found"
-        )
-    
-    # Check access (technicians can only comment on their assigned tickets)
-    if current_user.role == UserRole.TECHNICIAN and ticket.assignee_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
+    # Only tickets the user can see can be commented on
+    scope.get_ticket(db, comment_data.ticket_id)
     
     # Only managers can create internal comments
     if comment_data.is_internal and current_user.role != UserRole.MANAGER:
@@ -89,34 +79,15 @@ def create_comment(
 def get_ticket_comments(
     ticket_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    scope: VisibilityScope = Depends(get_visibility_scope)
 ):
     """
     Get all comments for a ticket
-    Technicians see only public comments, Managers see all
+    Managers see all comments, everyone else only public ones
     """
-    # Check if ticket exists
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-    if not ticket:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Ticket not found"
-        )
-    
-    # Check access
-    if current_user.role == UserRole.TECHNICIAN and ticket.assignee_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    
-    # Get comments
-    query = db.query(Comment).filter(Comment.ticket_id == ticket_id)
-    
-    # Filter internal comments for technicians
-    if current_user.role == UserRole.TECHNICIAN:
-        query = query.filter(Comment.is_internal == False)
+    scope.get_ticket(db, ticket_id)
     
+    query = scope.comments(db.query(Comment).filter(Comment.ticket_id == ticket_id))
     comments = query.order_by(Comment.created_at.asc()).all()
     
     return [enrich_comment_response(comment) for comment in comments]
@@ -127,7 +98,7 @@ def update_comment(
     comment_id: int,
     content: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Update a comment (only by the author)
@@ -158,7 +129,7 @@ def update_comment(
 def delete_comment(
     comment_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Delete a comment (only by the author or managers)
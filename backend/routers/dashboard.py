@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, Request, Response, status
+from schemas import ManagerDashboard
+from auth import Principal, require_manager
+from services.dashboard import manager_dashboard
+from services.data_version import is_not_modified
+
+router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
+
+
+@router.get("/manager", response_model=ManagerDashboard)
+def get_manager_dashboard(
+    request: Request,
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Get everything the manager dashboard shows in one precomputed snapshot (Manager only)
+    Supports conditional requests via ETag / If-None-Match.
+    """
+    body, headers = manager_dashboard.get()
+    if is_not_modified(request, headers):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
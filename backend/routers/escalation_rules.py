@@ -0,0 +1,112 @@
+"""
+Escalation rule configuration (Manager only)
+"""
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.orm import Session
+from typing import List
+from database import get_db
+from models import EscalationRule, EscalationRuleHit
+from schemas import EscalationRuleCreate, EscalationRuleResponse, EscalationRuleResult
+from auth import Principal, require_manager
+from services.escalation_rules import run_escalation_rules, validate_rule
+
+router = APIRouter(prefix="/escalation-rules", tags=["Escalation Rules"])
+
+
+def get_rule(db: Session, rule_id: int) -> EscalationRule:
+    rule = db.query(EscalationRule).filter(EscalationRule.id == rule_id).first()
+    if not rule:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Escalation rule not found"
+        )
+    return rule
+
+
+def apply_rule_data(db: Session, rule: EscalationRule, rule_data: EscalationRuleCreate):
+    try:
+        validate_rule(db, rule_data.action, rule_data.target_user_id, rule_data.target_role, rule_data.notify_target)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    values = rule_data.model_dump(exclude={"conditions"})
+    for field, value in values.items():
+        setattr(rule, field, value)
+    rule.conditions = rule_data.conditions.model_dump(mode="json", exclude_none=True)
+
+
+@router.get("/", response_model=List[EscalationRuleResponse])
+def list_escalation_rules(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    List escalation rules in evaluation order
+    """
+    return db.query(EscalationRule).order_by(EscalationRule.position, EscalationRule.id).all()
+
+
+@router.post("/", response_model=EscalationRuleResponse, status_code=status.HTTP_201_CREATED)
+def create_escalation_rule(
+    rule_data: EscalationRuleCreate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Create an escalation rule
+    """
+    rule = EscalationRule()
+    apply_rule_data(db, rule, rule_data)
+    db.add(rule)
+    db.commit()
+    db.refresh(rule)
+    return rule
+
+
+@router.put("/{rule_id}", response_model=EscalationRuleResponse)
+def update_escalation_rule(
+    rule_id: int,
+    rule_data: EscalationRuleCreate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Replace an escalation rule
+    """
+    rule = get_rule(db, rule_id)
+    apply_rule_data(db, rule, rule_data)
+    db.commit()
+    db.refresh(rule)
+    return rule
+
+
+@router.delete("/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+def delete_escalation_rule(
+    rule_id: int,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Delete an escalation rule
+    """
+    rule = get_rule(db, rule_id)
+    db.query(EscalationRuleHit).filter(EscalationRuleHit.rule_id == rule_id).delete(synchronize_session=False)
+    db.delete(rule)
+    db.commit()
+
+
+@router.post("/evaluate", response_model=List[EscalationRuleResult])
+def evaluate_escalation_rules(
+    dry_run: bool = True,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Evaluate the enabled rules now
+
+    By default only reports which rule would act on which ticket; with
+    `dry_run=false` the actions are applied as in the SLA monitoring job.
+    """
+    return run_escalation_rules(db, dry_run=dry_run)
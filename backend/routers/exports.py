@@ -0,0 +1,42 @@
+"""
+Streaming export endpoints for reporting
+"""
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from models import TicketStatus
+from auth import Principal, require_manager
+from services.data_export import EXPORT_FORMATS, stream_export
+
+router = APIRouter(prefix="/exports", tags=["Exports"])
+
+
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = Query("csv", description="csv, ndjson or parquet"),
+    start: Optional[datetime] = Query(None, description="Only rows created at or after this time (UTC)"),
+    end: Optional[datetime] = Query(None, description="Only rows created before this time (UTC)"),
+    ticket_status: Optional[TicketStatus] = Query(None, alias="status", description="Only rows of tickets in this status"),
+    compress: bool = Query(False, description="gzip-compress the stream"),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Stream a full export of tickets, activity_logs or comments (Manager only)
+    """
+    try:
+        body = stream_export(dataset, format, start, end, ticket_status, compress)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    media_type, extension = EXPORT_FORMATS[format]
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d%H%M%S}.{extension}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(body, media_type=media_type, headers=headers)
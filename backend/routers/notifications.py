@@ -1,22 +1,29 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from typing import List
 from database import get_db
-from models import Notification, User
+from models import Notification
 from schemas import NotificationResponse
-from auth import get_current_user
+from auth import Principal, get_current_user
+from services.data_version import conditional_get
+from services.serialization import compile_row_serializer, serialize_rows
 
-router = APIRouter(prefix="/notifications", tags=["Notifications"])
+router = APIRouter(prefix="/notifications", tags=["Notifications"], default_response_class=ORJSONResponse)
+
+serialize_notification = compile_row_serializer(list(NotificationResponse.model_fields))
 
 
 @router.get("/", response_model=List[NotificationResponse])
 def get_notifications(
     unread_only: bool = False,
+    validators: dict = Depends(conditional_get("notifications")),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get notifications for current user
+    Supports conditional requests via ETag / If-None-Match.
     """
     query = db.query(Notification).filter(Notification.user_id == current_user.id)
     
@@ -25,14 +32,14 @@ def get_notifications(
     
     notifications = query.order_by(Notification.created_at.desc()).all()
     
-    return notifications
+    return serialize_rows(notifications, serialize_notification, validators)
 
 
 @router.post("/{notification_id}/acknowledge", response_model=NotificationResponse)
 def acknowledge_notification(
     notification_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Mark a notification as read
@@ -58,7 +65,7 @@ def acknowledge_notification(
 @router.post("/acknowledge-all", status_code=status.HTTP_200_OK)
 def acknowledge_all_notifications(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Mark all notifications as read for current user
@@ -1,10 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from typing import List
 from database import get_db
-from models import SLAConfig, User
-from schemas import SLAConfigResponse, SLAConfigUpdate
-from auth import get_current_user, require_manager
+from models import CustomerSLAContract, CustomerSLATerm, SLAConfig, TicketPriority
+from schemas import (
+    SLAConfigResponse, SLAConfigUpdate, SLAConfigUpdateResponse,
+    SLAContractResponse, SLAContractUpdate, SLAContractUpdateResponse, SLARebaselineResult
+)
+from auth import Principal, get_current_user, require_manager
+from services.sla_rebaseline import rebaseline_customer_tickets, rebaseline_open_tickets
 
 router = APIRouter(prefix="/sla", tags=["SLA Configuration"])
 
@@ -12,7 +16,7 @@ router = APIRouter(prefix="/sla", tags=["SLA Configuration"])
 @router.get("/config", response_model=List[SLAConfigResponse])
 def get_sla_config(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get all SLA configurations
@@ -21,15 +25,18 @@ def get_sla_config(
     return configs
 
 
-@router.put("/config/{priority}", response_model=SLAConfigResponse)
+@router.put("/config/{priority}", response_model=SLAConfigUpdateResponse)
 def update_sla_config(
     priority: str,
     config_update: SLAConfigUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(require_manager)
+    current_user: Principal = Depends(require_manager)
 ):
     """
     Update SLA configuration for a priority level (Manager only)
+
+    With `apply_to_open_tickets`, open tickets of the priority move to the
+    new limit and have their risk level recomputed in the same transaction.
     """
     config = db.query(SLAConfig).filter(SLAConfig.priority == priority.upper()).first()
     
@@ -40,7 +47,134 @@ def update_sla_config(
         )
     
     config.sla_hours = config_update.sla_hours
+    rebaseline = None
+    if config_update.apply_to_open_tickets:
+        rebaseline = rebaseline_open_tickets(db, TicketPriority(config.priority), config.sla_hours, current_user)
     db.commit()
     db.refresh(config)
     
-    return config
+    return SLAConfigUpdateResponse(
+        id=config.id,
+        priority=config.priority,
+        sla_hours=config.sla_hours,
+        rebaseline=rebaseline
+    )
+
+
+# ==================== Customer SLA contracts ====================
+
+def contract_response(contract: CustomerSLAContract) -> dict:
+    calendar = None
+    if contract.business_days:
+        calendar = {
+            "start_hour": contract.business_start_hour,
+            "end_hour": contract.business_end_hour,
+            "weekdays": [int(day) for day in contract.business_days.split(",")],
+        }
+    return {
+        "customer": contract.customer,
+        "hours": {term.priority: term.sla_hours for term in contract.terms},
+        "business_calendar": calendar,
+        "updated_at": contract.updated_at,
+    }
+
+
+def get_contract(db: Session, customer: str) -> CustomerSLAContract:
+    contract = db.query(CustomerSLAContract).filter(CustomerSLAContract.customer == customer).first()
+    if not contract:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"SLA contract for customer '{customer}' not found"
+        )
+    return contract
+
+
+@router.get("/contracts", response_model=List[SLAContractResponse])
+def list_sla_contracts(
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    List customer SLA contracts (Manager only)
+    """
+    contracts = db.query(CustomerSLAContract).options(
+        selectinload(CustomerSLAContract.terms)
+    ).order_by(CustomerSLAContract.customer).all()
+    return [contract_response(contract) for contract in contracts]
+
+
+@router.get("/contracts/{customer}", response_model=SLAContractResponse)
+def get_sla_contract(
+    customer: str,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Get the SLA contract of a customer (Manager only)
+    """
+    return contract_response(get_contract(db, customer))
+
+
+@router.put("/contracts/{customer}", response_model=SLAContractUpdateResponse)
+def put_sla_contract(
+    customer: str,
+    contract_update: SLAContractUpdate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Create or replace the SLA contract of a customer (Manager only)
+
+    The customer's open tickets are recomputed under the new contract in the
+    same transaction. Customers are matched on the exact ticket customer name.
+    """
+    if any(hours < 0 for hours in contract_update.hours.values()):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="SLA hours must not be negative"
+        )
+    calendar = contract_update.business_calendar
+    if calendar and (calendar.start_hour >= calendar.end_hour or any(not 0 <= day <= 6 for day in calendar.weekdays)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Business calendar needs start_hour < end_hour and weekdays between 0 (Monday) and 6"
+        )
+
+    contract = db.query(CustomerSLAContract).filter(CustomerSLAContract.customer == customer).first()
+    if contract is None:
+        contract = CustomerSLAContract(customer=customer)
+        db.add(contract)
+    contract.business_start_hour = calendar.start_hour if calendar else None
+    contract.business_end_hour = calendar.end_hour if calendar else None
+    contract.business_days = ",".join(str(day) for day in sorted(set(calendar.weekdays))) if calendar else None
+
+    # Update terms in place so the (contract, priority) constraint holds during the flush
+    hours = {priority.value: sla_hours for priority, sla_hours in contract_update.hours.items()}
+    for term in list(contract.terms):
+        if term.priority in hours:
+            term.sla_hours = hours.pop(term.priority)
+        else:
+            contract.terms.remove(term)
+    for priority, sla_hours in hours.items():
+        contract.terms.append(CustomerSLATerm(priority=priority, sla_hours=sla_hours))
+
+    rebaseline = rebaseline_customer_tickets(db, customer, contract, current_user)
+    db.commit()
+    db.refresh(contract)
+    return {**contract_response(contract), "rebaseline": rebaseline}
+
+
+@router.delete("/contracts/{customer}", response_model=SLARebaselineResult)
+def delete_sla_contract(
+    customer: str,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Remove the SLA contract of a customer; its open tickets return to the default SLA (Manager only)
+    """
+    db.delete(get_contract(db, customer))
+    db.flush()
+    rebaseline = rebaseline_customer_tickets(db, customer, None, current_user)
+    db.commit()
+    return rebaseline
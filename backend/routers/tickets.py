@@ -1,49 +1,52 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import String
-from typing import List, Optional
+from typing import List, Optional, Set
 from datetime import datetime
 from database import get_db
-from models import Ticket, User, UserRole, TicketStatus
-from schemas import TicketCreate, TicketUpdate, TicketResponse
-from auth import get_current_user
+from models import Ticket, TicketChange, TicketSkill, UserRole, TicketStatus
+from schemas import TicketCreate, TicketUpdate, TicketResponse, TicketChangesResponse
+from auth import Principal, get_current_user
+from config import settings
 from services.sla_engine import (
-    get_sla_limit_for_priority, 
-    calculate_elapsed_hours, 
-    calculate_risk_percentage,
+    get_effective_sla_limit,
     determine_risk_level,
     get_high_risk_tickets
 )
 from services.escalation import create_activity_log, notify_assignee
+from services.assignment import normalize_skill, pick_assignee_for_new_ticket
+from services.change_log import get_latest_cursor, get_oldest_cursor
+from services.data_version import conditional_get
+from services.serialization import fast_json_response
+from services.visibility import VisibilityScope, get_visibility_scope
+from services.ticket_projection import (
+    enrich_ticket_response,
+    get_ticket_fieldset,
+    ticket_load_options,
+    ticket_list_response
+)
 
-router = APIRouter(prefix="/tickets", tags=["Tickets"])
-
-
-def enrich_ticket_response(ticket: Ticket) -> dict:
-    """Enrich ticket with calculated fields"""
-    elapsed_hours = calculate_elapsed_hours(ticket.created_at)
-    risk_percentage = calculate_risk_percentage(elapsed_hours, ticket.sla_limit_hours)
-    
-    return {
-        **ticket.__dict__,
-        "time_elapsed_hours": elapsed_hours,
-        "risk_percentage": risk_percentage,
-        "assignee_name": ticket.assignee.name if ticket.assignee else "Unassigned",
-        "creator_name": ticket.creator.name if ticket.creator else "Unknown"
-    }
+router = APIRouter(prefix="/tickets", tags=["Tickets"], default_response_class=ORJSONResponse)
 
 
 @router.post("/", response_model=TicketResponse, status_code=status.HTTP_201_CREATED)
 def create_ticket(
     ticket_data: TicketCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Create a new ticket
     """
-    # Get SLA limit for priority
-    sla_limit = get_sla_limit_for_priority(db, ticket_data.priority.value)
+    # Get SLA limit for priority (and the customer's contract, if any)
+    sla_limit = get_effective_sla_limit(db, ticket_data.customer, ticket_data.priority.value)
+    
+    required_skill = normalize_skill(ticket_data.required_skill)
+    assignee_id = ticket_data.assignee_id
+    auto_assign = settings.AUTO_ASSIGN_ON_CREATE if ticket_data.auto_assign is None else ticket_data.auto_assign
+    if assignee_id is None and auto_assign:
+        assignee_id = pick_assignee_for_new_ticket(db, ticket_data.priority, required_skill)
     
     # Create ticket
     new_ticket = Ticket(
@@ -51,10 +54,12 @@ def create_ticket(
         customer=ticket_data.customer,
         description=ticket_data.description,
         priority=ticket_data.priority,
-        assignee_id=ticket_data.assignee_id,
+        assignee_id=assignee_id,
         created_by_user_id=current_user.id,
         sla_limit_hours=sla_limit
     )
+    if required_skill:
+        new_ticket.skill_requirement = TicketSkill(skill=required_skill)
     
     db.add(new_ticket)
     db.commit()
@@ -70,7 +75,7 @@ def create_ticket(
     )
     
     # Notify assignee if assigned
-    if ticket_data.assignee_id:
+    if new_ticket.assignee_id:
         notify_assignee(
             db,
             new_ticket,
@@ -87,8 +92,9 @@ def search_tickets(
     priority: Optional[str] = None,
     assignee_id: Optional[int] = None,
     customer: Optional[str] = None,
+    fieldset: Optional[Set[str]] = Depends(get_ticket_fieldset),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    scope: VisibilityScope = Depends(get_visibility_scope)
 ):
     """
     Advanced search for tickets
@@ -97,12 +103,9 @@ def search_tickets(
     - priority: Filter by priority
     - assignee_id: Filter by assignee
     - customer: Filter by customer name
+    - fields: Optional sparse fieldset
     """
-    query = db.query(Ticket)
-    
-    # Role-based filtering
-    if current_user.role == UserRole.TECHNICIAN:
-        query = query.filter(Ticket.assignee_id == current_user.id)
+    query = scope.tickets(db.query(Ticket).options(*ticket_load_options(fieldset)))
     
     # Search query
     if q:
@@ -125,7 +128,7 @@ def search_tickets(
     
     tickets = query.order_by(Ticket.created_at.desc()).all()
     
-    return [enrich_ticket_response(ticket) for ticket in tickets]
+    return ticket_list_response(tickets, fieldset)
 
 
 @router.get("/", response_model=List[TicketResponse])
@@ -133,22 +136,21 @@ def get_tickets(
     status: Optional[TicketStatus] = None,
     priority: Optional[str] = None,
     assignee_id: Optional[int] = None,
+    fieldset: Optional[Set[str]] = Depends(get_ticket_fieldset),
+    validators: dict = Depends(conditional_get("tickets", "users", time_bucket=True)),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    scope: VisibilityScope = Depends(get_visibility_scope)
 ):
     """
     Get all tickets (filtered by role)
-    Managers see all tickets, Technicians see only their assigned tickets
+    Managers see all tickets, technicians their assigned tickets, users the tickets they created.
+    Pass `fields` to receive only the listed fields.
+    Supports conditional requests via ETag / If-None-Match.
+    The X-Change-Cursor header is the `since` value for /tickets/changes.
     """
-    query = db.query(Ticket)
-    
-    # Role-based filtering
-    if current_user.role == UserRole.TECHNICIAN:
-        query = query.filter(Ticket.assignee_id == current_user.id)
-    elif current_user.role == UserRole.SENIOR_TECHNICIAN:
-        query = query.filter(Ticket.assignee_id == current_user.id)
-    elif current_user.role == UserRole.USER:
-        query = query.filter(Ticket.created_by_user_id == current_user.id)
+    # Read the cursor first so changes racing with this query are re-sent, not lost
+    cursor = get_latest_cursor(db)
+    query = scope.tickets(db.query(Ticket).options(*ticket_load_options(fieldset)))
     
     # Apply filters
     if status:
@@ -160,49 +162,86 @@ def get_tickets(
     
     tickets = query.order_by(Ticket.created_at.desc()).all()
     
-    return [enrich_ticket_response(ticket) for ticket in tickets]
+    return ticket_list_response(tickets, fieldset, {**validators, "X-Change-Cursor": str(cursor)})
 
 
 @router.get("/high-risk", response_model=List[TicketResponse])
 def get_high_risk_tickets_endpoint(
+    fieldset: Optional[Set[str]] = Depends(get_ticket_fieldset),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    scope: VisibilityScope = Depends(get_visibility_scope)
 ):
     """
-    Get all high-risk tickets
+    Get all high-risk tickets visible to the user
     """
-    tickets = get_high_risk_tickets(db)
+    tickets = get_high_risk_tickets(db, ticket_load_options(fieldset), scope)
     
-    # Filter by role
-    if current_user.role == UserRole.TECHNICIAN:
-        tickets = [t for t in tickets if t.assignee_id == current_user.id]
+    return ticket_list_response(tickets, fieldset)
+
+
+@router.get("/changes", response_model=TicketChangesResponse)
+def get_ticket_changes(
+    since: int = Query(0, ge=0, description="Cursor from X-Change-Cursor or a previous call"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db),
+    scope: VisibilityScope = Depends(get_visibility_scope)
+):
+    """
+    Get tickets created, updated, resolved or deleted since a cursor
+    Returns the current state of changed tickets, the ids of removed ones
+    and the risk transitions recorded in between.
+    """
+    oldest = get_oldest_cursor(db)
+    if since and oldest and since < oldest - 1:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Change cursor has expired; reload the full ticket list"
+        )
     
-    return [enrich_ticket_response(ticket) for ticket in tickets]
+    latest = get_latest_cursor(db)
+    query = db.query(TicketChange).filter(TicketChange.id > since, TicketChange.id <= latest)
+    entries = scope.changes(query).order_by(TicketChange.id).limit(limit + 1).all()
+    
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    cursor = entries[-1].id if has_more else max(since, latest)
+    
+    ticket_ids = list(dict.fromkeys(entry.ticket_id for entry in entries))
+    tickets = []
+    if ticket_ids:
+        query = db.query(Ticket).options(*ticket_load_options()).filter(Ticket.id.in_(ticket_ids))
+        tickets = scope.tickets(query).all()
+    
+    visible_ids = {ticket.id for ticket in tickets}
+    
+    return fast_json_response({
+        "cursor": cursor,
+        "has_more": has_more,
+        "tickets": [enrich_ticket_response(ticket) for ticket in tickets],
+        "removed": [ticket_id for ticket_id in ticket_ids if ticket_id not in visible_ids],
+        "risk_transitions": [
+            {
+                "ticket_id": entry.ticket_id,
+                "risk_from": entry.risk_from,
+                "risk_to": entry.risk_to,
+                "changed_at": entry.changed_at
+            }
+            for entry in entries
+            if entry.risk_to is not None and entry.risk_from is not None
+        ]
+    })
 
 
 @router.get("/{ticket_id}", response_model=TicketResponse)
 def get_ticket(
     ticket_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    scope: VisibilityScope = Depends(get_visibility_scope)
 ):
     """
     Get a specific ticket by ID
     """
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-    
-    if not ticket:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Ticket not found"
-        )
-    
-    # Check access
-    if current_user.role == UserRole.TECHNICIAN and ticket.assignee_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
+    ticket = scope.get_ticket(db, ticket_id)
     
     return enrich_ticket_response(ticket)
 
@@ -212,18 +251,13 @@ def update_ticket(
     ticket_id: int,
     ticket_update: TicketUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user),
+    scope: VisibilityScope = Depends(get_visibility_scope)
 ):
     """
     Update a ticket
     """
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-    
-    if not ticket:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Ticket not found"
-        )
+    ticket = scope.get_ticket(db, ticket_id)
     
     # Update fields
     update_data = ticket_update.dict(exclude_unset=True)
@@ -249,18 +283,13 @@ def update_ticket(
 def resolve_ticket(
     ticket_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user),
+    scope: VisibilityScope = Depends(get_visibility_scope)
 ):
     """
     Mark a ticket as resolved
     """
-    ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-    
-    if not ticket:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Ticket not found"
-        )
+    ticket = scope.get_ticket(db, ticket_id)
     
     # Update status
     ticket.status = TicketStatus.RESOLVED
@@ -285,7 +314,7 @@ def resolve_ticket(
 def delete_ticket(
     ticket_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Delete a ticket (Manager only)
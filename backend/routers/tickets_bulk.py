@@ -0,0 +1,123 @@
+"""
+Bulk ticket endpoints for managers rebalancing queues
+"""
+import io
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from database import get_db
+from schemas import TicketImportResult
+from schemas_tickets import BulkTicketIds, BulkReassign, BulkEscalate, BulkOperationResponse
+from auth import Principal, require_manager
+from services.escalation import bulk_reassign_tickets, bulk_escalate_tickets, bulk_resolve_tickets
+from services.serialization import fast_json_response
+from services.ticket_import import detect_format, import_tickets
+
+router = APIRouter(prefix="/tickets/bulk", tags=["Tickets - Bulk"], default_response_class=ORJSONResponse)
+
+
+def bulk_response(results: List[dict]):
+    """Summarize per-ticket results"""
+    succeeded = sum(1 for result in results if result["success"])
+    return fast_json_response({
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results
+    })
+
+
+@router.post("/reassign", response_model=BulkOperationResponse)
+def bulk_reassign(
+    request: BulkReassign,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Reassign many tickets to one technician in one transaction (Manager only)
+    """
+    try:
+        results = bulk_reassign_tickets(
+            db,
+            list(dict.fromkeys(request.ticket_ids)),
+            request.new_assignee_id,
+            current_user,
+            reason=request.reason
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return bulk_response(results)
+
+
+@router.post("/escalate", response_model=BulkOperationResponse)
+def bulk_escalate(
+    request: BulkEscalate,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Escalate many tickets to senior technicians in one transaction (Manager only)
+    """
+    try:
+        results = bulk_escalate_tickets(
+            db,
+            list(dict.fromkeys(request.ticket_ids)),
+            request.reason,
+            current_user,
+            senior_technician_id=request.senior_technician_id
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return bulk_response(results)
+
+
+@router.post("/resolve", response_model=BulkOperationResponse)
+def bulk_resolve(
+    request: BulkTicketIds,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Resolve many tickets in one transaction (Manager only)
+    """
+    results = bulk_resolve_tickets(db, list(dict.fromkeys(request.ticket_ids)), current_user)
+    return bulk_response(results)
+
+
+@router.post("/import", response_model=TicketImportResult)
+def bulk_import(
+    file: UploadFile = File(..., description="NDJSON (one ticket object per line) or CSV with a header row"),
+    format: Optional[str] = Query(None, description="ndjson or csv; inferred from the file name if omitted"),
+    batch_size: int = Query(1000, ge=1, le=10000),
+    notify_assignees: bool = False,
+    db: Session = Depends(get_db),
+    current_user: Principal = Depends(require_manager)
+):
+    """
+    Import tickets in bulk (Manager only)
+    Rows are validated individually; invalid rows are reported and skipped.
+    """
+    fmt = (format or detect_format(file.filename) or "").lower()
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return import_tickets(
+            db,
+            stream,
+            fmt,
+            current_user,
+            batch_size=batch_size,
+            notify_assignees=notify_assignees
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    finally:
+        stream.detach()
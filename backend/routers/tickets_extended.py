@@ -3,36 +3,28 @@ Additional ticket endpoints for escalation, reassignment, and senior technician
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Set
 from database import get_db
-from models import Ticket, User, UserRole, TicketStatus
+from models import Ticket, UserRole, TicketStatus
 from schemas import TicketResponse
-from auth import get_current_user
+from auth import Principal, get_current_user
+from services.visibility import VisibilityScope, get_visibility_scope
 from services.escalation import escalate_ticket, reassign_ticket, create_activity_log
-from services.sla_engine import calculate_elapsed_hours, calculate_risk_percentage
+from services.ticket_projection import (
+    enrich_ticket_response,
+    get_ticket_fieldset,
+    ticket_load_options,
+    ticket_list_response
+)
 
 router = APIRouter(prefix="/tickets", tags=["Tickets - Extended"])
 
 
-def enrich_ticket_response(ticket: Ticket) -> dict:
-    """Enrich ticket with calculated fields"""
-    elapsed_hours = calculate_elapsed_hours(ticket.created_at)
-    risk_percentage = calculate_risk_percentage(elapsed_hours, ticket.sla_limit_hours)
-    
-    return {
-        **ticket.__dict__,
-        "time_elapsed_hours": elapsed_hours,
-        "risk_percentage": risk_percentage,
-        "assignee_name": ticket.assignee.name if ticket.assignee else "Unassigned",
-        "creator_name": ticket.creator.name if ticket.creator else "Unknown"
-    }
-
-
 @router.post("/{ticket_id}/escalate", response_model=TicketResponse)
 def escalate_ticket_endpoint(
     ticket_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Escalate a ticket to senior technician (Manager only)
@@ -64,7 +56,7 @@ def reassign_ticket_endpoint(
     ticket_id: int,
     new_assignee_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Reassign a ticket to a different technician (Manager only)
@@ -95,7 +87,7 @@ def reassign_ticket_endpoint(
 def accept_ticket(
     ticket_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Accept an assigned ticket (Technician/Senior Technician only)
@@ -139,26 +131,26 @@ def accept_ticket(
 
 @router.get("/escalated", response_model=List[TicketResponse])
 def get_escalated_tickets(
+    fieldset: Optional[Set[str]] = Depends(get_ticket_fieldset),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user),
+    scope: VisibilityScope = Depends(get_visibility_scope)
 ):
     """
     Get all escalated tickets (Senior Technician sees their assigned, Manager sees all)
     """
-    query = db.query(Ticket).filter(Ticket.status == TicketStatus.ESCALATED)
-    
-    # Filter by role
-    if current_user.role == UserRole.SENIOR_TECHNICIAN:
-        query = query.filter(Ticket.assignee_id == current_user.id)
-    elif current_user.role != UserRole.MANAGER:
+    if current_user.role not in (UserRole.MANAGER, UserRole.SENIOR_TECHNICIAN):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only managers and senior technicians can view escalated tickets"
         )
     
+    query = scope.tickets(db.query(Ticket).options(*ticket_load_options(fieldset)).filter(
+        Ticket.status == TicketStatus.ESCALATED
+    ))
     tickets = query.order_by(Ticket.created_at.desc()).all()
     
-    return [enrich_ticket_response(ticket) for ticket in tickets]
+    return ticket_list_response(tickets, fieldset)
 
 
 @router.post("/{ticket_id}/update-progress", response_model=TicketResponse)
@@ -166,7 +158,7 @@ def update_ticket_progress(
     ticket_id: int,
     notes: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Update ticket progress with activity notes (Technician/Senior Technician only)
@@ -1,19 +1,29 @@
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional, Set
 from pydantic import BaseModel
 from database import get_db
 from models import User, UserRole, Ticket, TicketStatus, TicketPriority
 from schemas import UserResponse, TicketResponse
-from auth import get_current_user
+from auth import Principal, get_current_user
+from config import settings
 from services.sla_engine import (
-    get_sla_limit_for_priority,
+    get_effective_sla_limit,
     calculate_elapsed_hours,
     calculate_risk_percentage,
     determine_risk_level
 )
-from services.escalation import create_activity_log
+from services.escalation import create_activity_log, notify_assignee
+from services.assignment import pick_assignee_for_new_ticket
+from services.ticket_projection import (
+    enrich_ticket_response,
+    get_ticket_fieldset,
+    ticket_load_options,
+    ticket_list_response
+)
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/users", tags=["users"])
 
 
@@ -24,41 +34,23 @@ class UserTicketCreate(BaseModel):
     priority: str = "MEDIUM"
 
 
-def enrich_ticket_response(ticket: Ticket) -> dict:
-    """Enrich ticket with calculated fields"""
-    elapsed_hours = calculate_elapsed_hours(ticket.created_at)
-    risk_percentage = calculate_risk_percentage(elapsed_hours, ticket.sla_limit_hours)
-    
-    return {
-        **ticket.__dict__,
-        "time_elapsed_hours": elapsed_hours,
-        "risk_percentage": risk_percentage,
-        "assignee_name": ticket.assignee.name if ticket.assignee else "Unassigned",
-        "creator_name": ticket.creator.name if ticket.creator else "Unknown"
-    }
-
-
 @router.get("", response_model=List[UserResponse])
 def get_all_users(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get all users (for managers to see technicians, etc.)
     """
-    print(f"DEBUG [get_all_users]: User {current_user.email} (ID: {current_user.id}, Role: {current_user.role})")
-    
-    # Manual role check with better debugging
     if current_user.role != UserRole.MANAGER:
-        print(f"DEBUG [get_all_users]: ACCESS DENIED - User role is {current_user.role}, expected {UserRole.MANAGER}")
+        logger.debug("User list denied for user %s (role %s)", current_user.id, current_user.role.value)
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail=f"Only managers can view all users. Your role: {current_user.role}"
         )
     
-    print(f"DEBUG [get_all_users]: ACCESS GRANTED - Fetching all users")
     users = db.query(User).all()
-    print(f"DEBUG [get_all_users]: Returning {len(users)} users")
+    logger.debug("Returning %d users", len(users))
     return users
 
 
@@ -66,7 +58,7 @@ def get_all_users(
 def create_user_ticket(
     ticket_data: UserTicketCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Create a new ticket as a user
@@ -77,8 +69,11 @@ def create_user_ticket(
     except KeyError:
         priority_enum = TicketPriority.MEDIUM
     
-    # Get SLA limit for priority
-    sla_limit = get_sla_limit_for_priority(db, priority_enum.value)
+    # Get SLA limit for priority (and the customer's contract, if any)
+    sla_limit = get_effective_sla_limit(db, current_user.name, priority_enum.value)
+    
+    # Users cannot assign tickets; with AUTO_ASSIGN_ON_CREATE a technician is picked
+    assignee_id = pick_assignee_for_new_ticket(db, priority_enum) if settings.AUTO_ASSIGN_ON_CREATE else None
     
     # Create ticket with user's name as customer
     new_ticket = Ticket(
@@ -88,7 +83,7 @@ def create_user_ticket(
         priority=priority_enum,
         created_by_user_id=current_user.id,
         sla_limit_hours=sla_limit,
-        assignee_id=None  # Users cannot assign tickets
+        assignee_id=assignee_id
     )
     
     db.add(new_ticket)
@@ -104,65 +99,74 @@ def create_user_ticket(
         f"Ticket created by {current_user.name}"
     )
     
+    if new_ticket.assignee_id:
+        notify_assignee(db, new_ticket, f"New ticket assigned: {new_ticket.title}")
+    
     return enrich_ticket_response(new_ticket)
 
 
 @router.get("/tickets/my-tickets", response_model=List[TicketResponse])
 def get_my_tickets(
+    fieldset: Optional[Set[str]] = Depends(get_ticket_fieldset),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get all tickets created by the current user
     """
-    tickets = db.query(Ticket).filter(
+    tickets = db.query(Ticket).options(*ticket_load_options(fieldset)).filter(
         Ticket.created_by_user_id == current_user.id
     ).order_by(Ticket.created_at.desc()).all()
     
-    return [enrich_ticket_response(ticket) for ticket in tickets]
+    return ticket_list_response(tickets, fieldset)
 
 
 @router.get("/tickets/active", response_model=List[TicketResponse])
 def get_active_tickets(
+    fieldset: Optional[Set[str]] = Depends(get_ticket_fieldset),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get active tickets (OPEN or IN_PROGRESS) created by the current user
     """
-    tickets = db.query(Ticket).filter(
+    tickets = db.query(Ticket).options(*ticket_load_options(fieldset)).filter(
         Ticket.created_by_user_id == current_user.id,
         Ticket.status.in_([TicketStatus.OPEN, TicketStatus.IN_PROGRESS])
     ).order_by(Ticket.created_at.desc()).all()
     
-    return [enrich_ticket_response(ticket) for ticket in tickets]
+    return ticket_list_response(tickets, fieldset)
 
 
 @router.get("/tickets/high-priority", response_model=List[TicketResponse])
 def get_high_priority_tickets(
+    fieldset: Optional[Set[str]] = Depends(get_ticket_fieldset),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get high priority tickets (HIGH or CRITICAL) created by the current user
     """
-    tickets = db.query(Ticket).filter(
+    tickets = db.query(Ticket).options(*ticket_load_options(fieldset)).filter(
         Ticket.created_by_user_id == current_user.id,
         Ticket.priority.in_([TicketPriority.HIGH, TicketPriority.CRITICAL])
     ).order_by(Ticket.created_at.desc()).all()
     
-    return [enrich_ticket_response(ticket) for ticket in tickets]
+    return ticket_list_response(tickets, fieldset)
 
 
 @router.get("/tickets/breached", response_model=List[TicketResponse])
 def get_breached_tickets(
+    fieldset: Optional[Set[str]] = Depends(get_ticket_fieldset),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Get SLA breached tickets created by the current user
     """
-    tickets = db.query(Ticket).filter(
+    # The breach filter below always needs created_at and sla_limit_hours
+    load_fields = fieldset | {"risk_percentage"} if fieldset else None
+    tickets = db.query(Ticket).options(*ticket_load_options(load_fields)).filter(
         Ticket.created_by_user_id == current_user.id
     ).all()
     
@@ -174,4 +178,4 @@ def get_breached_tickets(
         if risk_percentage >= 100:
             breached.append(ticket)
     
-    return [enrich_ticket_response(ticket) for ticket in breached]
+    return ticket_list_response(breached, fieldset)
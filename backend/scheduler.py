@@ -1,14 +1,16 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from datetime import datetime
 from database import SessionLocal
 from services.sla_engine import monitor_all_tickets
-from services.escalation import auto_escalate_high_risk_tickets
+from services.escalation_rules import run_escalation_rules
+from services.change_log import prune_ticket_changes
+from services.refresh_tokens import prune_refresh_tokens
+from services.rollups import prune_empty_deadline_buckets
+from services.analytics_cache import analytics_cache
+from services.dashboard import manager_dashboard
 from config import settings
 import logging
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Create scheduler instance
@@ -20,7 +22,7 @@ def sla_monitoring_job():
     Periodic job to monitor SLA status and trigger escalations
     Runs every 5 minutes by default
     """
-    logger.info(f"[{datetime.now()}] Running SLA monitoring job...")
+    logger.info("Running SLA monitoring job")
     
     db = SessionLocal()
     try:
@@ -28,21 +30,43 @@ def sla_monitoring_job():
         results = monitor_all_tickets(db)
         
         updated_count = sum(1 for r in results if r['updated'])
-        logger.info(f"  ✓ Monitored {len(results)} tickets, {updated_count} risk levels updated")
+        logger.info("Monitored %d tickets, %d risk levels updated", len(results), updated_count)
         
-        # Auto-escalate high-risk tickets
-        escalation_results = auto_escalate_high_risk_tickets(db)
-        escalated_count = sum(1 for r in escalation_results if r.get('escalated', False))
-        if escalated_count > 0:
-            logger.warning(f"  ⚠️ Auto-escalated {escalated_count} high-risk tickets")
-            for result in escalation_results:
-                if result.get('escalated', False):
-                    logger.warning(f"    - Ticket #{result['ticket_id']}: {result['ticket_title']} ({result['risk_level']})")
+        # Apply the configured escalation rules
+        escalation_results = run_escalation_rules(db)
+        applied = [r for r in escalation_results if r['applied']]
+        if applied:
+            logger.warning("Escalation rules acted on %d tickets", len(applied))
+            for result in applied:
+                logger.warning(
+                    "Rule '%s' %s ticket #%s: %s (%s)",
+                    result['rule'], result['action'].value, result['ticket_id'],
+                    result['ticket_title'], result['risk_level'].value,
+                    extra={"ticket_id": result['ticket_id']}
+                )
         
-        logger.info(f"[{datetime.now()}] SLA monitoring job completed\n")
+        # Drop delta-sync change-log entries past the retention window
+        pruned_count = prune_ticket_changes(db)
+        if pruned_count:
+            logger.info("Pruned %d expired ticket change-log entries", pruned_count)
+        
+        # Drop refresh tokens past their expiry
+        pruned_tokens = prune_refresh_tokens(db)
+        if pruned_tokens:
+            logger.info("Pruned %d expired refresh tokens", pruned_tokens)
+        
+        # Drop breach-forecast histogram buckets that no longer hold open tickets
+        prune_empty_deadline_buckets(db)
+        
+        # Risk levels and escalations changed: drop cached analytics and
+        # rebuild the dashboard snapshot so the next poll is served from memory
+        analytics_cache.invalidate()
+        manager_dashboard.refresh()
+        
+        logger.info("SLA monitoring job completed")
         
     except Exception as e:
-        logger.error(f"Error in SLA monitoring job: {str(e)}")
+        logger.exception("Error in SLA monitoring job: %s", e)
     finally:
         db.close()
 
@@ -59,11 +83,11 @@ def start_scheduler():
     )
     
     scheduler.start()
-    logger.info(f"✅ Scheduler started - SLA monitoring every {settings.SLA_CHECK_INTERVAL_MINUTES} minutes")
+    logger.info("Scheduler started, SLA monitoring every %d minutes", settings.SLA_CHECK_INTERVAL_MINUTES)
 
 
 def stop_scheduler():
     """Stop the background scheduler"""
     if scheduler.running:
         scheduler.shutdown()
-        logger.info("🛑 Scheduler stopped")
+        logger.info("Scheduler stopped")
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Dict, Literal, Optional, List
 from datetime import datetime
-from models import UserRole, TicketPriority, TicketStatus, RiskLevel, NotificationType
+from models import UserRole, TicketPriority, TicketStatus, RiskLevel, NotificationType, EscalationAction
 
 
 # ==================== User Schemas ====================
@@ -32,9 +32,20 @@ class UserResponse(UserBase):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    expires_in: int  # Seconds until the access token expires
+    refresh_token: str
     user: UserResponse
 
 
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
+class SessionsRevoked(BaseModel):
+    user_id: int
+    revoked: int
+
+
 # ==================== Ticket Schemas ====================
 
 class TicketBase(BaseModel):
@@ -46,6 +57,24 @@ class TicketBase(BaseModel):
 
 class TicketCreate(TicketBase):
     assignee_id: Optional[int] = None
+    required_skill: Optional[str] = None  # Routes automatic assignment
+    auto_assign: Optional[bool] = None  # Assign when assignee_id is empty; defaults to AUTO_ASSIGN_ON_CREATE
+
+
+class TicketImport(TicketBase):
+    """A ticket record from a bulk import (NDJSON or CSV)"""
+    assignee_id: Optional[int] = None
+    status: TicketStatus = TicketStatus.OPEN
+    created_at: Optional[datetime] = None  # Original creation time in the upstream system
+    resolved_at: Optional[datetime] = None
+
+
+class TicketImportResult(BaseModel):
+    processed: int
+    inserted: int
+    failed: int
+    errors: List[dict]  # [{"row": <row number>, "error": <message>}]
+    errors_truncated: bool
 
 
 class TicketUpdate(BaseModel):
@@ -76,6 +105,21 @@ class TicketResponse(TicketBase):
         from_attributes = True
 
 
+class RiskTransition(BaseModel):
+    ticket_id: int
+    risk_from: Optional[RiskLevel]
+    risk_to: RiskLevel
+    changed_at: datetime
+
+
+class TicketChangesResponse(BaseModel):
+    cursor: int  # Pass as `since` on the next call
+    has_more: bool
+    tickets: List[TicketResponse]  # Current state of created/updated/resolved tickets
+    removed: List[int]  # Deleted tickets, or tickets no longer visible to the caller
+    risk_transitions: List[RiskTransition]
+
+
 # ==================== SLA Config Schemas ====================
 
 class SLAConfigBase(BaseModel):
@@ -89,6 +133,7 @@ class SLAConfigCreate(SLAConfigBase):
 
 class SLAConfigUpdate(BaseModel):
     sla_hours: float
+    apply_to_open_tickets: bool = False  # Re-baseline open tickets of this priority
 
 
 class SLAConfigResponse(SLAConfigBase):
@@ -98,6 +143,106 @@ class SLAConfigResponse(SLAConfigBase):
         from_attributes = True
 
 
+class RiskTransitionCount(BaseModel):
+    from_risk: RiskLevel
+    to_risk: RiskLevel
+    count: int
+
+
+class SLARebaselineResult(BaseModel):
+    tickets_rebaselined: int
+    risk_transitions: List[RiskTransitionCount]
+
+
+class SLAConfigUpdateResponse(SLAConfigResponse):
+    rebaseline: Optional[SLARebaselineResult] = None  # Set when apply_to_open_tickets was requested
+
+
+class BusinessCalendar(BaseModel):
+    start_hour: int = Field(..., ge=0, le=23)  # UTC
+    end_hour: int = Field(..., ge=1, le=24)
+    weekdays: List[int] = Field(..., min_length=1)  # 0 = Monday
+
+
+class SLAContractUpdate(BaseModel):
+    hours: Dict[TicketPriority, float]  # Priorities left out use the default SLA config
+    business_calendar: Optional[BusinessCalendar] = None
+
+
+class SLAContractResponse(BaseModel):
+    customer: str
+    hours: Dict[TicketPriority, float]
+    business_calendar: Optional[BusinessCalendar] = None
+    updated_at: Optional[datetime] = None
+
+
+class SLAContractUpdateResponse(SLAContractResponse):
+    rebaseline: SLARebaselineResult
+
+
+# ==================== Escalation Rule Schemas ====================
+
+class EscalationConditions(BaseModel):
+    """All given conditions must hold; omitted ones match every ticket"""
+    priorities: Optional[List[TicketPriority]] = None
+    customers: Optional[List[str]] = None
+    statuses: Optional[List[TicketStatus]] = None
+    risk_levels: Optional[List[RiskLevel]] = None
+    min_risk_percentage: Optional[float] = Field(None, ge=0, le=100)
+    min_age_hours: Optional[float] = Field(None, ge=0)
+    min_assignee_load: Optional[int] = Field(None, ge=0)  # Open tickets of the assignee
+    max_assignee_load: Optional[int] = Field(None, ge=0)
+
+
+class EscalationRuleCreate(BaseModel):
+    name: str
+    position: int = 0
+    enabled: bool = True
+    conditions: EscalationConditions = EscalationConditions()
+    action: EscalationAction
+    target_user_id: Optional[int] = None  # REASSIGN to this user...
+    target_role: Optional[UserRole] = None  # ...or to the least-loaded user with this role
+    notify_target: Optional[Literal["MANAGERS", "ASSIGNEE"]] = None  # NOTIFY
+    message: Optional[str] = None
+
+
+class EscalationRuleResponse(EscalationRuleCreate):
+    id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class EscalationRuleResult(BaseModel):
+    ticket_id: int
+    ticket_title: str
+    risk_level: RiskLevel
+    rule_id: int
+    rule: str
+    action: EscalationAction
+    applied: bool
+    reason: Optional[str] = None
+
+
+# ==================== Assignment Schemas ====================
+
+class TechnicianProfileUpdate(BaseModel):
+    skills: List[str] = []
+    capacity: Optional[float] = Field(None, gt=0)  # Maximum weighted open load; None = unlimited
+
+
+class TechnicianAssignmentResponse(BaseModel):
+    user_id: int
+    name: str
+    role: UserRole
+    skills: List[str]
+    capacity: Optional[float] = None
+    weighted_load: float
+    open_tickets: int
+
+
 # ==================== Notification Schemas ====================
 
 class NotificationBase(BaseModel):
@@ -164,9 +309,92 @@ class RiskDistribution(BaseModel):
     breached: int
 
 
+class TrendPoint(BaseModel):
+    bucket_start: datetime
+    created: int
+    resolved: int
+    resolved_within_sla: int
+    breached: int  # Tickets whose SLA deadline fell in this bucket and were breached
+    avg_resolution_hours: float
+
+
+class PercentileSummary(BaseModel):
+    count: int
+    p50: Optional[float] = None
+    p90: Optional[float] = None
+    p99: Optional[float] = None
+
+
+class ResolutionPercentiles(BaseModel):
+    group: Optional[str] = None  # Priority, technician name or week start, per group_by
+    resolution_hours: PercentileSummary
+    breach_overrun_hours: PercentileSummary  # Hours past the SLA deadline, late resolutions only
+
+
+class AnalyticsCacheStats(BaseModel):
+    entries: int
+    hits: int
+    misses: int
+    coalesced: int  # Misses that waited for a concurrent computation
+    invalidations: int
+    hit_ratio: float
+
+
+class TechnicianScorecard(BaseModel):
+    technician_id: int
+    technician_name: str
+    window_days: int
+    resolved: int
+    mttr_hours: Optional[float] = None
+    breached: int  # Resolved after the SLA deadline
+    breach_rate: Optional[float] = None
+    escalations_received: int
+    reopened: int
+    reassigned_in: int
+    reassigned_out: int
+
+
+class AssigneeBreachCount(BaseModel):
+    assignee_id: Optional[int] = None
+    assignee_name: str
+    count: int
+
+
+class BreachHorizon(BaseModel):
+    hours: int
+    total: int
+    by_priority: dict  # Priority -> count
+    by_assignee: List[AssigneeBreachCount]
+
+
+class DeadlineBucket(BaseModel):
+    bucket_start: datetime
+    ticket_ids: List[int]
+
+
+class BreachForecast(BaseModel):
+    generated_at: datetime
+    overdue: int  # Open tickets already past their SLA deadline
+    horizons: List[BreachHorizon]
+    nearest: List[DeadlineBucket]  # Upcoming deadlines in the current and next hour
+
+
 class TechnicianWorkload(BaseModel):
     technician_id: int
     technician_name: str
     assigned_tickets: int
     high_risk_tickets: int
     role: str  # Added to match frontend expectations
+
+
+# ==================== Dashboard Schemas ====================
+
+class ManagerDashboard(BaseModel):
+    generated_at: datetime
+    change_cursor: int  # `since` value for /tickets/changes
+    tickets: List[TicketResponse]
+    high_risk_ticket_ids: List[int]
+    overview: AnalyticsOverview
+    risk_distribution: RiskDistribution
+    technician_workload: List[TechnicianWorkload]
+    technicians: List[UserResponse]
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Optional
 from models import TicketPriority
 
 
@@ -25,3 +25,39 @@ class TicketUpdateProgress(BaseModel):
     """Schema for technicians updating ticket progress"""
     notes: str
     status: Optional[str] = None  # OPEN, IN_PROGRESS, RESOLVED
+
+
+# ==================== Bulk Operation Schemas ====================
+
+MAX_BULK_TICKETS = 1000
+
+
+class BulkTicketIds(BaseModel):
+    """Schema for bulk operations on a list of tickets"""
+    ticket_ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_TICKETS)
+
+
+class BulkReassign(BulkTicketIds):
+    """Schema for reassigning many tickets to one technician"""
+    new_assignee_id: int
+    reason: Optional[str] = "Workload balancing"
+
+
+class BulkEscalate(BulkTicketIds):
+    """Schema for escalating many tickets"""
+    reason: str = "High-risk ticket requiring senior expertise"
+    senior_technician_id: Optional[int] = None  # If None, spread across available seniors
+
+
+class BulkTicketResult(BaseModel):
+    """Outcome of a bulk operation for one ticket"""
+    ticket_id: int
+    success: bool
+    error: Optional[str] = None
+
+
+class BulkOperationResponse(BaseModel):
+    """Per-ticket results of a bulk operation"""
+    succeeded: int
+    failed: int
+    results: List[BulkTicketResult]
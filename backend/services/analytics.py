@@ -0,0 +1,118 @@
+"""
+Analytics aggregations served from the incrementally maintained rollups
+
+Figures can be limited to a visibility scope (services.visibility). Scopes by
+assignee are read from the rollups; scopes by creator, which the rollups do
+not track, are aggregated from the tickets table on the indexed creator column.
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from models import Ticket, TicketStateRollup, TicketStatus, RiskLevel, User, UserRole
+from services.rollups import get_resolution_totals, get_state_counts
+
+OPEN_HIGH_RISK_LEVELS = (RiskLevel.HIGH_RISK, RiskLevel.BREACHED)
+TECHNICIAN_ROLES = (UserRole.TECHNICIAN, UserRole.SENIOR_TECHNICIAN)
+
+
+def count_by_status_and_risk(db: Session, scope=None) -> Dict[Tuple[TicketStatus, RiskLevel], int]:
+    """Current ticket counts per (status, risk level) visible in the scope"""
+    if scope is not None and scope.creator_id is not None:
+        rows = db.query(Ticket.status, Ticket.risk_level, func.count(Ticket.id)).filter(
+            scope.ticket_predicate()
+        ).group_by(Ticket.status, Ticket.risk_level).all()
+    else:
+        rows = get_state_counts(
+            db, TicketStateRollup.status, TicketStateRollup.risk_level,
+            assignee_id=scope.assignee_id if scope is not None else None
+        )
+    return {(ticket_status, risk_level): int(count or 0) for ticket_status, risk_level, count in rows}
+
+
+def _resolution_totals(db: Session, scope=None) -> Tuple[float, int]:
+    if scope is None or scope.creator_id is None:
+        return get_resolution_totals(db, assignee_id=scope.assignee_id if scope is not None else None)
+    rows = db.query(Ticket.created_at, Ticket.resolved_at).filter(
+        scope.ticket_predicate(),
+        Ticket.status == TicketStatus.RESOLVED,
+        Ticket.resolved_at.isnot(None)
+    ).all()
+    return sum((resolved_at - created_at).total_seconds() / 3600 for created_at, resolved_at in rows), len(rows)
+
+
+def compute_overview(db: Session, scope=None) -> dict:
+    """Dashboard overview figures, independent of the number of tickets"""
+    counts = count_by_status_and_risk(db, scope)
+    resolution_hours, resolved_count = _resolution_totals(db, scope)
+
+    def total(status=None, risk_levels=None, exclude_status=None) -> int:
+        return sum(
+            count for (ticket_status, risk_level), count in counts.items()
+            if (status is None or ticket_status == status)
+            and (exclude_status is None or ticket_status != exclude_status)
+            and (risk_levels is None or risk_level in risk_levels)
+        )
+
+    avg_resolution_hours = resolution_hours / resolved_count if resolved_count else 0.0
+    return {
+        "total_tickets": total(),
+        "high_risk_tickets": total(risk_levels=OPEN_HIGH_RISK_LEVELS, exclude_status=TicketStatus.RESOLVED),
+        "breached_tickets": total(risk_levels=(RiskLevel.BREACHED,)),
+        "avg_resolution_hours": round(avg_resolution_hours, 2),
+        "open_tickets": total(status=TicketStatus.OPEN),
+        "in_progress_tickets": total(status=TicketStatus.IN_PROGRESS),
+        "resolved_tickets": total(status=TicketStatus.RESOLVED),
+        "escalated_tickets": total(status=TicketStatus.ESCALATED),
+    }
+
+
+def compute_risk_distribution(db: Session, scope=None) -> dict:
+    """Ticket counts per risk level visible in the scope"""
+    counts = defaultdict(int)
+    for (_, risk_level), count in count_by_status_and_risk(db, scope).items():
+        counts[risk_level] += count
+    return {
+        "safe": counts.get(RiskLevel.SAFE, 0),
+        "warning": counts.get(RiskLevel.WARNING, 0),
+        "high_risk": counts.get(RiskLevel.HIGH_RISK, 0),
+        "breached": counts.get(RiskLevel.BREACHED, 0),
+    }
+
+
+def compute_technician_workload(
+    db: Session,
+    roles: Optional[Sequence[UserRole]] = None,
+    technician_ids: Optional[Sequence[int]] = None
+) -> List[dict]:
+    """
+    Open and open high-risk ticket counts per technician in a single query
+
+    Technicians without tickets are included with zero counts.
+    """
+    is_open = TicketStateRollup.status != TicketStatus.RESOLVED
+    counts = db.query(
+        TicketStateRollup.assignee_id.label("assignee_id"),
+        func.sum(case((is_open, TicketStateRollup.ticket_count), else_=0)).label("assigned"),
+        func.sum(case(
+            (is_open & TicketStateRollup.risk_level.in_(OPEN_HIGH_RISK_LEVELS), TicketStateRollup.ticket_count),
+            else_=0
+        )).label("high_risk")
+    ).group_by(TicketStateRollup.assignee_id).subquery()
+
+    query = db.query(User.id, User.name, User.role, counts.c.assigned, counts.c.high_risk).outerjoin(
+        counts, counts.c.assignee_id == User.id
+    ).filter(User.role.in_(roles or TECHNICIAN_ROLES))
+    if technician_ids:
+        query = query.filter(User.id.in_(technician_ids))
+
+    return [
+        {
+            "technician_id": user_id,
+            "technician_name": name,
+            "assigned_tickets": int(assigned or 0),
+            "high_risk_tickets": int(high_risk or 0),
+            "role": role.value,
+        }
+        for user_id, name, role, assigned, high_risk in query.order_by(User.id).all()
+    ]
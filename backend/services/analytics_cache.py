@@ -0,0 +1,98 @@
+"""
+In-process cache for analytics results
+
+Entries are keyed by endpoint, role scope and parameters, and remember the
+data-scope versions (see services.data_version) they were computed from, so
+any committed ticket write makes them stale without explicit calls. Entries
+also expire after a short TTL and are dropped when the SLA job completes.
+
+Concurrent misses for the same key are coalesced: the first request
+computes the result while the others wait for it (single flight), so a burst
+of dashboard polls costs one computation per change.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+from config import settings
+from services.data_version import snapshot
+
+
+class AnalyticsCache:
+    """TTL + version-validated LRU cache with single-flight computation"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[int, ...], float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, key: Hashable, scopes: Iterable[str], compute: Callable[[], Any]) -> Any:
+        """
+        Return the cached value for key, computing it at most once per change
+
+        Cached values are shared between requests and must not be mutated.
+        """
+        scopes = tuple(scopes)
+        leader = False
+        with self._lock:
+            versions, _ = snapshot(scopes)
+            entry = self._entries.get(key)
+            if entry and entry[0] == versions and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+            else:
+                self.misses += 1
+                future = self._inflight[key] = Future()
+                leader = True
+        if not leader:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._entries[key] = (versions, time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def invalidate(self):
+        """Drop all cached results"""
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "invalidations": self.invalidations,
+                "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+            }
+
+
+analytics_cache = AnalyticsCache(settings.ANALYTICS_CACHE_TTL_SECONDS, settings.ANALYTICS_CACHE_MAX_ENTRIES)
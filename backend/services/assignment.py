@@ -0,0 +1,386 @@
+"""
+Skill- and capacity-aware ticket assignment
+
+Technicians are kept in memory in min-heaps keyed by weighted open load:
+one heap per (role, skill) and one per role for tickets without a required
+skill. An open ticket weighs ASSIGNMENT_WEIGHT_<priority>, and a
+technician's optional capacity caps their weighted load. Technicians who
+are at capacity are left out of the heaps until their load drops, so
+picking the least-loaded technician with room for a ticket is O(log n).
+Technicians with the ticket's skill are preferred; when none of them has
+room, the pick falls back to the whole role.
+
+Loads are maintained incrementally. A session `after_flush` hook moves
+weight between technicians whenever a ticket's assignee, status or priority
+changes, and the change is undone if the transaction does not commit. A
+pick reserves its weight at once, so several picks in one transaction
+spread the tickets before anything is flushed; the flushed assignment then
+takes the reservation's place. Set-based statements on tickets and changes
+to technicians or their profiles invalidate the index, which is rebuilt on
+the next pick from the ticket state rollups. Like the data-version
+counters, the index is process-local.
+"""
+import heapq
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.orm import Session
+from config import settings
+from database import SessionLocal
+from models import (
+    TechnicianProfile, Ticket, TicketPriority, TicketSkill, TicketStateRollup, TicketStatus, User, UserRole
+)
+
+ASSIGNABLE_ROLES = (UserRole.TECHNICIAN, UserRole.SENIOR_TECHNICIAN)
+
+OPEN_STATUSES = (TicketStatus.OPEN, TicketStatus.IN_PROGRESS, TicketStatus.ESCALATED)
+
+# Ticket fields a technician's load depends on
+LOAD_FIELDS = ("assignee_id", "status", "priority")
+
+
+def ticket_weight(priority) -> float:
+    """Load an open ticket of `priority` adds to its assignee"""
+    value = priority.value if isinstance(priority, TicketPriority) else priority
+    return float(getattr(settings, f"ASSIGNMENT_WEIGHT_{value}"))
+
+
+def normalize_skill(skill: Optional[str]) -> Optional[str]:
+    skill = (skill or "").strip().lower()
+    return skill or None
+
+
+def parse_skills(skills: Optional[Iterable[str]]) -> List[str]:
+    """Normalized, de-duplicated skills in their given order"""
+    return list(dict.fromkeys(filter(None, (normalize_skill(skill) for skill in skills or []))))
+
+
+def get_ticket_skills(db: Session, ticket_ids: List[int]) -> Dict[int, str]:
+    """Required skill of each ticket that has one"""
+    if not ticket_ids:
+        return {}
+    rows = db.execute(select(TicketSkill.ticket_id, TicketSkill.skill).where(TicketSkill.ticket_id.in_(ticket_ids)))
+    return dict(rows.all())
+
+
+class _Technician:
+    __slots__ = ("user_id", "name", "role", "skills", "capacity", "load", "open_tickets")
+
+    def __init__(self, user_id: int, name: str, role: UserRole, skills: List[str], capacity: Optional[float]):
+        self.user_id = user_id
+        self.name = name
+        self.role = role
+        self.skills = skills
+        self.capacity = capacity
+        self.load = 0.0
+        self.open_tickets = 0
+
+    @property
+    def heap_keys(self) -> List[Tuple[UserRole, Optional[str]]]:
+        return [(self.role, None)] + [(self.role, skill) for skill in self.skills]
+
+    @property
+    def has_room(self) -> bool:
+        return self.capacity is None or self.load < self.capacity
+
+    def fits(self, weight: float) -> bool:
+        return self.capacity is None or self.load + weight <= self.capacity
+
+
+class AssignmentEngine:
+    """Process-local index of technicians by skill and weighted load"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._technicians: Dict[int, _Technician] = {}
+        self._heaps: Dict[Tuple[UserRole, Optional[str]], list] = {}
+        self._members: Dict[Tuple[UserRole, Optional[str]], int] = {}
+        self._loaded = False
+        # Changes on every rebuild and invalidation; deltas recorded against
+        # an older generation are not applied or reverted
+        self.generation = 0
+
+    def invalidate(self):
+        """Rebuild the index on next use"""
+        with self._lock:
+            self._loaded = False
+            self.generation += 1
+
+    def pick(self, db: Session, role: UserRole, priority, skill: Optional[str] = None) -> Optional[int]:
+        """
+        Least-loaded technician of `role` with room for a ticket, or None
+
+        The ticket's weight is reserved for the pick until `db`'s transaction
+        ends, when the flushed assignment replaces it.
+        """
+        weight = ticket_weight(priority)
+        skill = normalize_skill(skill)
+        if not db.in_transaction():
+            db.begin()  # So the reservation is released when the transaction ends
+        with self._lock:
+            self._ensure_loaded()
+            technician = None
+            if skill is not None:
+                technician = self._least_loaded((role, skill), weight)
+            if technician is None:
+                technician = self._least_loaded((role, None), weight)
+            if technician is None:
+                return None
+            self._change(technician.user_id, weight, 1)
+            # On a generation mismatch the index is rebuilt when the transaction ends
+            _session_state(db, self.generation).reserve(technician.user_id, weight)
+            return technician.user_id
+
+    def technicians(self) -> List[dict]:
+        """Current skills, capacity and load of every technician"""
+        with self._lock:
+            self._ensure_loaded()
+            return [
+                {
+                    "user_id": technician.user_id,
+                    "name": technician.name,
+                    "role": technician.role,
+                    "skills": technician.skills,
+                    "capacity": technician.capacity,
+                    "weighted_load": technician.load,
+                    "open_tickets": technician.open_tickets,
+                }
+                for technician in sorted(self._technicians.values(), key=lambda t: (t.role.value, t.load, t.user_id))
+            ]
+
+    def apply(self, generation: int, changes: Dict[int, list], sign: int = 1):
+        """Apply (weight, ticket count) changes per user recorded against `generation`"""
+        with self._lock:
+            if not self._loaded or generation != self.generation:
+                return
+            for user_id, (weight, count) in changes.items():
+                self._change(user_id, sign * weight, sign * count)
+
+    # ---- Index maintenance (caller holds the lock) ----
+
+    def _least_loaded(self, key, weight: float) -> Optional[_Technician]:
+        heap = self._heaps.get(key)
+        if not heap:
+            return None
+        skipped, found = [], None
+        while heap:
+            load, user_id = heap[0]
+            technician = self._technicians.get(user_id)
+            if technician is None or technician.load != load or not technician.has_room:
+                heapq.heappop(heap)  # Outdated entry
+                continue
+            if technician.fits(weight):
+                found = technician
+                break
+            # Has room, but not for a ticket this heavy
+            skipped.append(heapq.heappop(heap))
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        return found
+
+    def _change(self, user_id: int, weight: float, count: int):
+        technician = self._technicians.get(user_id)
+        if technician is None:
+            return  # Not an assignable technician
+        technician.load = round(technician.load + weight, 6)
+        technician.open_tickets += count
+        if technician.has_room:
+            for key in technician.heap_keys:
+                heap = self._heaps[key]
+                heapq.heappush(heap, (technician.load, user_id))
+                if len(heap) > 2 * self._members[key] + 64:
+                    self._compact(key)
+
+    def _compact(self, key):
+        role, skill = key
+        self._heaps[key] = [
+            (technician.load, technician.user_id)
+            for technician in self._technicians.values()
+            if technician.role == role and (skill is None or skill in technician.skills) and technician.has_room
+        ]
+        heapq.heapify(self._heaps[key])
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            self._rebuild()
+
+    def _rebuild(self):
+        with SessionLocal() as db:
+            rows = db.execute(
+                select(User.id, User.name, User.role, TechnicianProfile.skills, TechnicianProfile.capacity)
+                .outerjoin(TechnicianProfile, TechnicianProfile.user_id == User.id)
+                .where(User.role.in_(ASSIGNABLE_ROLES))
+            ).all()
+            loads = db.execute(
+                select(TicketStateRollup.assignee_id, TicketStateRollup.priority, func.sum(TicketStateRollup.ticket_count))
+                .where(TicketStateRollup.status.in_(OPEN_STATUSES), TicketStateRollup.assignee_id != 0)
+                .group_by(TicketStateRollup.assignee_id, TicketStateRollup.priority)
+            ).all()
+
+        technicians = {
+            user_id: _Technician(user_id, name, role, (skills or "").split(",") if skills else [], capacity)
+            for user_id, name, role, skills, capacity in rows
+        }
+        for user_id, priority, count in loads:
+            technician = technicians.get(user_id)
+            if technician is not None and count:
+                technician.load = round(technician.load + count * ticket_weight(priority), 6)
+                technician.open_tickets += count
+
+        self._technicians = technicians
+        self._members = defaultdict(int)
+        for technician in technicians.values():
+            for key in technician.heap_keys:
+                self._members[key] += 1
+        self._heaps = {}
+        for key in self._members:
+            self._compact(key)
+        self._loaded = True
+        self.generation += 1
+
+
+assignment_engine = AssignmentEngine()
+
+
+def pick_assignee_for_new_ticket(db: Session, priority, skill: Optional[str] = None) -> Optional[int]:
+    """Auto-assignment on create: the least-loaded technician with room for the ticket"""
+    return assignment_engine.pick(db, UserRole.TECHNICIAN, priority, skill)
+
+
+# ==================== Session hooks ====================
+
+class _SessionLoad:
+    """Load changes a transaction applied to the index, and its open reservations"""
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.applied = defaultdict(lambda: [0.0, 0])
+        self.reserved = defaultdict(lambda: [0.0, 0])
+        self.stale = False
+
+    def reserve(self, user_id: int, weight: float):
+        _add(self.applied, user_id, weight, 1)
+        _add(self.reserved, user_id, weight, 1)
+
+
+def _add(changes: dict, user_id: int, weight: float, count: int):
+    change = changes[user_id]
+    change[0] += weight
+    change[1] += count
+
+
+def _session_state(session, generation: int) -> _SessionLoad:
+    state = session.info.get("assignment_load")
+    if state is None:
+        state = session.info["assignment_load"] = _SessionLoad(generation)
+    return state
+
+
+def _load_of(values: dict) -> Optional[Tuple[int, float]]:
+    if values["assignee_id"] is None or values["status"] not in OPEN_STATUSES or values["priority"] is None:
+        return None
+    return values["assignee_id"], ticket_weight(values["priority"])
+
+
+def _previous_load(ticket: Ticket):
+    state = inspect(ticket)
+    values = {}
+    for name in LOAD_FIELDS:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.added:
+            values[name] = None  # Was unset before this flush
+        else:
+            values[name] = getattr(ticket, name)
+    return _load_of(values)
+
+
+def _current_load(ticket: Ticket):
+    return _load_of({name: getattr(ticket, name) for name in LOAD_FIELDS})
+
+
+# Load the previous value when these attributes are set, so flush-time
+# history is complete even if the ticket was expired by an earlier commit
+for _name in LOAD_FIELDS:
+    event.listen(getattr(Ticket, _name), "set", lambda target, value, oldvalue, initiator: None, active_history=True)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _track_assignment_load(session, flush_context):
+    """Move load between technicians for tickets written in this flush"""
+    removed, added = [], []
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            added.append(_current_load(obj))
+    for obj in session.dirty:
+        if isinstance(obj, Ticket) and session.is_modified(obj, include_collections=False):
+            previous, current = _previous_load(obj), _current_load(obj)
+            if previous != current:
+                removed.append(previous)
+                added.append(current)
+    for obj in session.deleted:
+        if isinstance(obj, Ticket):
+            removed.append(_previous_load(obj))
+    stale = any(
+        isinstance(obj, (User, TechnicianProfile))
+        for obj in list(session.new) + list(session.deleted)
+    ) or any(
+        isinstance(obj, (User, TechnicianProfile)) and session.is_modified(obj, include_collections=False)
+        for obj in session.dirty
+    )
+    removed, added = [load for load in removed if load], [load for load in added if load]
+    if not (removed or added or stale):
+        return
+
+    state = _session_state(session, assignment_engine.generation)
+    state.stale = state.stale or stale
+    changes = defaultdict(lambda: [0.0, 0])
+    for user_id, weight in removed:
+        _add(changes, user_id, -weight, -1)
+    for user_id, weight in added:
+        reservation = state.reserved.get(user_id)
+        if reservation and reservation[1] > 0:
+            _add(state.reserved, user_id, -weight, -1)  # Already applied by the pick
+        else:
+            _add(changes, user_id, weight, 1)
+    for user_id, (weight, count) in changes.items():
+        _add(state.applied, user_id, weight, count)
+    assignment_engine.apply(state.generation, changes)
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _invalidate_on_bulk_statements(orm_execute_state):
+    """Set-based statements bypass the flush; rebuild the index after they commit"""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ in (Ticket, User, TechnicianProfile):
+        _session_state(orm_execute_state.session, assignment_engine.generation).stale = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _finish_committed_load(session):
+    state = session.info.pop("assignment_load", None)
+    if state is None:
+        return
+    if state.stale or state.generation != assignment_engine.generation:
+        assignment_engine.invalidate()
+    else:
+        # Picks that were not turned into assignments
+        assignment_engine.apply(state.generation, state.reserved, sign=-1)
+
+
+@event.listens_for(SessionLocal, "after_transaction_end")
+def _revert_uncommitted_load(session, transaction):
+    """Undo the load changes of a transaction that rolled back or was closed"""
+    if transaction.parent is not None:
+        return
+    state = session.info.pop("assignment_load", None)
+    if state is None:
+        return
+    if state.generation != assignment_engine.generation:
+        assignment_engine.invalidate()
+    else:
+        assignment_engine.apply(state.generation, state.applied, sign=-1)
@@ -0,0 +1,223 @@
+"""
+Upcoming-breach forecast
+
+Counts come from `ticket_deadline_rollups`, an hourly histogram of the SLA
+deadlines of open tickets maintained by the rollup hooks, so a forecast
+reads at most one row per hour, priority and assignee in the horizon.
+
+Ticket ids for the nearest deadlines come from `ticket_deadlines`, a small
+index of open tickets by deadline kept in sync by the session hook below.
+It is also used to split the hours a horizon starts and ends in exactly,
+so "next 1 hour" at 10:20 covers deadlines from 10:20 to 11:20.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+from sqlalchemy import and_, delete, event, insert, inspect, or_, select
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import Ticket, TicketDeadline, TicketDeadlineRollup, TicketStatus
+from services.rollups import bucket_start
+
+DEFAULT_HORIZONS = (1, 4, 8, 24)
+MAX_HORIZON_HOURS = 72
+
+# Changes to these fields move a ticket in the deadline index
+DEADLINE_FIELDS = ("status", "created_at", "sla_limit_hours", "priority", "assignee_id")
+
+
+# ==================== Deadline index ====================
+
+def _deadline_row(ticket_id: int, values) -> dict:
+    return {
+        "ticket_id": ticket_id,
+        "deadline": values["created_at"] + timedelta(hours=values["sla_limit_hours"]),
+        "priority": values["priority"],
+        "assignee_id": values["assignee_id"],
+    }
+
+
+def write_ticket_deadlines(connection, rows: List[dict], removed_ids: Iterable[int] = ()):
+    """Replace the index entries of the given tickets"""
+    stale_ids = [row["ticket_id"] for row in rows] + list(removed_ids)
+    if stale_ids:
+        connection.execute(delete(TicketDeadline).where(TicketDeadline.ticket_id.in_(stale_ids)))
+    if rows:
+        connection.execute(insert(TicketDeadline), rows)
+
+
+def index_new_tickets(db: Session, ticket_ids: Sequence[int], rows: Sequence[dict]):
+    """Add index entries for tickets inserted outside the ORM flush (bulk imports)"""
+    write_ticket_deadlines(db.connection(), [
+        _deadline_row(ticket_id, row)
+        for ticket_id, row in zip(ticket_ids, rows)
+        if row["status"] != TicketStatus.RESOLVED
+    ])
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _maintain_ticket_deadlines(session, flush_context):
+    """Keep the deadline index in step with tickets written in this flush"""
+    rows, removed = [], []
+    for obj in session.new:
+        if isinstance(obj, Ticket) and obj.status != TicketStatus.RESOLVED:
+            rows.append(_deadline_row(obj.id, {name: getattr(obj, name) for name in DEADLINE_FIELDS}))
+    for obj in session.dirty:
+        if not isinstance(obj, Ticket):
+            continue
+        state = inspect(obj)
+        if not any(state.attrs[name].history.has_changes() for name in DEADLINE_FIELDS):
+            continue
+        if obj.status == TicketStatus.RESOLVED:
+            removed.append(obj.id)
+        else:
+            rows.append(_deadline_row(obj.id, {name: getattr(obj, name) for name in DEADLINE_FIELDS}))
+    for obj in session.deleted:
+        if isinstance(obj, Ticket):
+            removed.append(obj.id)
+
+    if rows or removed:
+        write_ticket_deadlines(session.connection(), rows, removed)
+
+
+def rebuild_ticket_deadlines(db: Session, chunk_size: int = 5000) -> int:
+    """Rebuild the deadline index from the open tickets"""
+    db.execute(delete(TicketDeadline))
+    indexed = 0
+    stmt = select(Ticket.id, *[getattr(Ticket, name) for name in DEADLINE_FIELDS]).where(
+        Ticket.status != TicketStatus.RESOLVED
+    ).execution_options(yield_per=chunk_size)
+    for partition in db.execute(stmt).partitions():
+        rows = [_deadline_row(row[0], dict(zip(DEADLINE_FIELDS, row[1:]))) for row in partition]
+        db.execute(insert(TicketDeadline), rows)
+        indexed += len(rows)
+    db.commit()
+    return indexed
+
+
+def ticket_deadlines_need_backfill(db: Session) -> bool:
+    """True when open tickets exist but the deadline index is empty"""
+    if db.query(TicketDeadline).first() is not None:
+        return False
+    return db.query(Ticket.id).filter(Ticket.status != TicketStatus.RESOLVED).first() is not None
+
+
+# ==================== Forecast ====================
+
+def forecast_breaches(
+    db: Session,
+    horizons: Sequence[int] = DEFAULT_HORIZONS,
+    priority=None,
+    assignee_id: Optional[int] = None,
+    nearest_limit: int = 50,
+    now: Optional[datetime] = None
+) -> dict:
+    """Open tickets that will breach within each horizon, by priority and assignee"""
+    now = now or datetime.utcnow()
+    current_hour = bucket_start(now, "hour")
+    horizons = sorted(set(horizons))
+    last_hour = current_hour + timedelta(hours=horizons[-1])
+
+    histogram = db.query(
+        TicketDeadlineRollup.deadline_hour,
+        TicketDeadlineRollup.priority,
+        TicketDeadlineRollup.assignee_id,
+        TicketDeadlineRollup.open_count
+    ).filter(
+        TicketDeadlineRollup.deadline_hour < last_hour,
+        TicketDeadlineRollup.open_count != 0
+    )
+    if priority:
+        histogram = histogram.filter(TicketDeadlineRollup.priority == priority)
+    if assignee_id is not None:
+        histogram = histogram.filter(TicketDeadlineRollup.assignee_id == assignee_id)
+
+    def deadline_index(*conditions):
+        query = db.query(
+            TicketDeadline.ticket_id,
+            TicketDeadline.deadline,
+            TicketDeadline.priority,
+            TicketDeadline.assignee_id
+        ).filter(*conditions)
+        if priority:
+            query = query.filter(TicketDeadline.priority == priority)
+        if assignee_id is not None:
+            query = query.filter(
+                TicketDeadline.assignee_id == assignee_id if assignee_id else TicketDeadline.assignee_id.is_(None)
+            )
+        return query.order_by(TicketDeadline.deadline).all()
+
+    next_hour = current_hour + timedelta(hours=1)
+    nearest = deadline_index(
+        TicketDeadline.deadline >= current_hour,
+        TicketDeadline.deadline < next_hour + timedelta(hours=1)
+    )
+
+    # Tickets in the current hour whose deadline already passed are overdue, not upcoming
+    elapsed = defaultdict(int)
+    for _, deadline, ticket_priority, ticket_assignee in nearest:
+        if deadline < now:
+            elapsed[(ticket_priority, ticket_assignee or 0)] += 1
+
+    # Each horizon ends inside an hour bucket; count that bucket from the index
+    # up to now + hours instead of whole. The nearest rows cover the next hour.
+    far_ends = [current_hour + timedelta(hours=hours) for hours in horizons if hours > 1]
+    boundary_rows = nearest
+    if far_ends:
+        boundary_rows = nearest + deadline_index(or_(*[
+            and_(TicketDeadline.deadline >= end, TicketDeadline.deadline < end + timedelta(hours=1))
+            for end in far_ends
+        ]))
+
+    overdue = sum(elapsed.values())
+    totals = {hours: 0 for hours in horizons}
+    by_priority: Dict[int, Dict[str, int]] = {hours: defaultdict(int) for hours in horizons}
+    by_assignee: Dict[int, Dict[int, int]] = {hours: defaultdict(int) for hours in horizons}
+
+    def count_in(hours: int, ticket_priority, ticket_assignee: int, count: int):
+        totals[hours] += count
+        by_priority[hours][ticket_priority.value] += count
+        by_assignee[hours][ticket_assignee] += count
+
+    for deadline_hour, bucket_priority, bucket_assignee, count in histogram.all():
+        if deadline_hour < current_hour:
+            overdue += count
+            continue
+        if deadline_hour == current_hour:
+            count -= elapsed[(bucket_priority, bucket_assignee)]
+        for hours in horizons:
+            if deadline_hour < current_hour + timedelta(hours=hours):
+                count_in(hours, bucket_priority, bucket_assignee, count)
+
+    for _, deadline, ticket_priority, ticket_assignee in boundary_rows:
+        if deadline < now:
+            continue
+        for hours in horizons:
+            end = now + timedelta(hours=hours)
+            if bucket_start(end, "hour") == bucket_start(deadline, "hour") and deadline <= end:
+                count_in(hours, ticket_priority, ticket_assignee or 0, 1)
+
+    nearest_ids = defaultdict(list)
+    for ticket_id, deadline, _, _ in nearest:
+        if deadline >= now:
+            nearest_ids[bucket_start(deadline, "hour")].append(ticket_id)
+    return {
+        "generated_at": now,
+        "overdue": overdue,
+        "horizons": [
+            {
+                "hours": hours,
+                "total": totals[hours],
+                "by_priority": {name: count for name, count in by_priority[hours].items() if count},
+                "by_assignee": [
+                    {"assignee_id": assignee or None, "count": count}
+                    for assignee, count in sorted(by_assignee[hours].items()) if count
+                ],
+            }
+            for hours in horizons
+        ],
+        "nearest": [
+            {"bucket_start": start, "ticket_ids": nearest_ids[start][:nearest_limit]}
+            for start in (current_hour, next_hour)
+        ],
+    }
@@ -0,0 +1,131 @@
+"""
+Ticket change log for delta sync
+
+Every flush that creates, updates, resolves or deletes a ticket appends a
+row to `ticket_changes` in the same transaction, so the change-log id is a
+reliable cursor: a client that has seen cursor N only needs rows > N.
+Risk-level transitions made by the SLA monitoring job are recorded as
+RISK_CHANGED entries.
+"""
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from sqlalchemy import event, func, inspect, insert
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import Ticket, TicketChange, TicketChangeType, TicketStatus
+from config import settings
+
+
+def _history_change(state, name: str) -> Optional[Tuple]:
+    """Return (old, new) if the attribute changed in this flush"""
+    history = state.attrs[name].history
+    if not history.has_changes():
+        return None
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0] if history.added else None
+    if old == new:
+        return None
+    return old, new
+
+
+def _change_row(ticket: Ticket, change_type: TicketChangeType, now: datetime, **extra) -> dict:
+    row = {
+        "ticket_id": ticket.id,
+        "change_type": change_type,
+        "assignee_id": ticket.assignee_id,
+        "previous_assignee_id": None,
+        "created_by_user_id": ticket.created_by_user_id,
+        "risk_from": None,
+        "risk_to": None,
+        "changed_at": now,
+    }
+    row.update(extra)
+    return row
+
+
+def _describe_update(ticket: Ticket, now: datetime) -> Optional[dict]:
+    state = inspect(ticket)
+    changed = [attr.key for attr in state.mapper.column_attrs if _history_change(state, attr.key)]
+    changed = [name for name in changed if name != "updated_at"]
+    if not changed:
+        return None
+
+    extra = {}
+    assignee = _history_change(state, "assignee_id")
+    if assignee:
+        extra["previous_assignee_id"] = assignee[0]
+    risk = _history_change(state, "risk_level")
+    if risk:
+        extra["risk_from"], extra["risk_to"] = risk
+
+    status_change = _history_change(state, "status")
+    if status_change and status_change[1] == TicketStatus.RESOLVED:
+        change_type = TicketChangeType.RESOLVED
+    elif changed == ["risk_level"]:
+        change_type = TicketChangeType.RISK_CHANGED
+    else:
+        change_type = TicketChangeType.UPDATED
+    return _change_row(ticket, change_type, now, **extra)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _record_flushed_ticket_changes(session, flush_context):
+    """Append change-log rows for tickets written in this flush"""
+    now = datetime.utcnow()
+    rows = []
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            rows.append(_change_row(obj, TicketChangeType.CREATED, now, risk_to=obj.risk_level))
+    for obj in session.dirty:
+        if isinstance(obj, Ticket):
+            row = _describe_update(obj, now)
+            if row:
+                rows.append(row)
+    for obj in session.deleted:
+        if isinstance(obj, Ticket):
+            rows.append(_change_row(obj, TicketChangeType.DELETED, now))
+
+    if rows:
+        session.connection().execute(insert(TicketChange), rows)
+
+
+def record_ticket_changes(db: Session, rows: List[dict]):
+    """
+    Append change-log rows for set-based writes that bypass the ORM flush
+
+    Each row needs at least `ticket_id` and `change_type`.
+    """
+    if not rows:
+        return
+    now = datetime.utcnow()
+    # Render explicit NULLs so rows with and without an assignee share one batch
+    db.execute(
+        insert(TicketChange),
+        [{"changed_at": now, **row} for row in rows],
+        execution_options={"render_nulls": True}
+    )
+
+
+def get_latest_cursor(db: Session) -> int:
+    """Id of the newest change-log entry (0 when empty)"""
+    return db.query(func.max(TicketChange.id)).scalar() or 0
+
+
+def get_oldest_cursor(db: Session) -> int:
+    """Id of the oldest retained change-log entry (0 when empty)"""
+    return db.query(func.min(TicketChange.id)).scalar() or 0
+
+
+def prune_ticket_changes(db: Session) -> int:
+    """
+    Delete change-log entries older than the retention window
+
+    The newest entry is always kept so expired cursors can still be detected.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=settings.TICKET_CHANGE_RETENTION_DAYS)
+    deleted = db.query(TicketChange).filter(
+        TicketChange.changed_at < cutoff,
+        TicketChange.id < get_latest_cursor(db)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
@@ -0,0 +1,113 @@
+"""
+Precomputed manager dashboard snapshot
+
+The manager dashboard needs tickets, high-risk tickets, analytics, workload
+and the technician list on every poll. All of it is read in one session
+and encoded once into a single JSON document, which is held in memory and
+served as-is with an ETag until a relevant write happens (detected through
+the data-scope versions), the time bucket of the elapsed-time fields rolls
+over, or the SLA job refreshes it.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import Dict, NamedTuple, Optional, Tuple
+import orjson
+from sqlalchemy.orm import Session
+from config import settings
+from database import SessionLocal
+from models import Ticket, TicketStatus, User
+from services.analytics import (
+    OPEN_HIGH_RISK_LEVELS,
+    TECHNICIAN_ROLES,
+    compute_overview,
+    compute_risk_distribution,
+    compute_technician_workload
+)
+from services.change_log import get_latest_cursor
+from services.data_version import build_validators, snapshot
+from services.ticket_projection import enrich_ticket_response, ticket_load_options
+
+DASHBOARD_SCOPES = ("tickets", "users", "sla")
+
+
+def build_manager_dashboard(db: Session) -> dict:
+    """Assemble the manager dashboard in one pass"""
+    cursor = get_latest_cursor(db)
+    tickets = db.query(Ticket).options(*ticket_load_options()).order_by(Ticket.created_at.desc()).all()
+    technicians = db.query(User).filter(User.role.in_(TECHNICIAN_ROLES)).order_by(User.id).all()
+    return {
+        "generated_at": datetime.utcnow(),
+        "change_cursor": cursor,
+        "tickets": [enrich_ticket_response(ticket) for ticket in tickets],
+        "high_risk_ticket_ids": [
+            ticket.id for ticket in tickets
+            if ticket.risk_level in OPEN_HIGH_RISK_LEVELS and ticket.status != TicketStatus.RESOLVED
+        ],
+        "overview": compute_overview(db),
+        "risk_distribution": compute_risk_distribution(db),
+        "technician_workload": compute_technician_workload(db),
+        "technicians": [
+            {"id": user.id, "email": user.email, "name": user.name, "role": user.role, "created_at": user.created_at}
+            for user in technicians
+        ],
+    }
+
+
+class _Snapshot(NamedTuple):
+    versions: Tuple[int, ...]
+    time_bucket: int
+    body: bytes
+    headers: Dict[str, str]
+
+
+def _time_bucket() -> int:
+    return int(time.time() // settings.ETAG_TIME_BUCKET_SECONDS)
+
+
+class ManagerDashboardCache:
+    """Holds the current snapshot and rebuilds it at most once per change"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+
+    def _is_current(self, current: Optional[_Snapshot]) -> bool:
+        if current is None:
+            return False
+        versions, _ = snapshot(DASHBOARD_SCOPES)
+        return current.versions == versions and current.time_bucket == _time_bucket()
+
+    def get(self) -> Tuple[bytes, Dict[str, str]]:
+        """Encoded snapshot and its ETag/Last-Modified headers"""
+        current = self._snapshot
+        if not self._is_current(current):
+            # Concurrent stale readers wait here for a single rebuild
+            with self._lock:
+                current = self._snapshot
+                if not self._is_current(current):
+                    current = self._rebuild()
+        return current.body, current.headers
+
+    def refresh(self):
+        """Rebuild the snapshot now (e.g. after the SLA job), if it is in use"""
+        with self._lock:
+            if self._snapshot is not None:
+                self._rebuild()
+
+    def _rebuild(self) -> _Snapshot:
+        # Versions are read before the data, so a write racing with the
+        # build leaves the snapshot stale rather than missing
+        versions, _ = snapshot(DASHBOARD_SCOPES)
+        time_bucket = _time_bucket()
+        headers = build_validators(DASHBOARD_SCOPES, "manager-dashboard", time_bucket=True)
+        db = SessionLocal()
+        try:
+            body = orjson.dumps(build_manager_dashboard(db))
+        finally:
+            db.close()
+        self._snapshot = _Snapshot(versions, time_bucket, body, headers)
+        return self._snapshot
+
+
+manager_dashboard = ManagerDashboardCache()
@@ -0,0 +1,204 @@
+"""
+Streaming exports of tickets, activity logs and comments
+
+Rows are read with `yield_per` (server-side cursors where the database
+supports them) and encoded chunk by chunk as CSV, NDJSON or Parquet, so
+memory stays constant regardless of the export size. Output can optionally
+be gzip-compressed on the fly.
+"""
+import csv
+import enum
+import io
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional
+import orjson
+from sqlalchemy import Boolean, DateTime, Float, Integer, select
+from database import SessionLocal
+from models import ActivityLog, Comment, Ticket, TicketStatus
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# dataset -> (model, timestamp column used for date-range filters)
+EXPORT_DATASETS = {
+    "tickets": (Ticket, Ticket.created_at),
+    "activity_logs": (ActivityLog, ActivityLog.timestamp),
+    "comments": (Comment, Comment.created_at),
+}
+
+# Rows fetched from the database per round trip
+EXPORT_CHUNK_SIZE = 5000
+
+
+def export_columns(dataset: str) -> list:
+    model, _ = EXPORT_DATASETS[dataset]
+    return list(model.__table__.columns)
+
+
+def iter_export_rows(
+    dataset: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    status: Optional[TicketStatus] = None,
+    chunk_size: int = EXPORT_CHUNK_SIZE
+) -> Iterator[List[tuple]]:
+    """
+    Yield lists of row tuples for a dataset
+
+    Uses its own session because streaming responses outlive the request's
+    database dependency. Only plain columns are selected, so no ORM objects
+    accumulate in the identity map.
+    """
+    model, timestamp_column = EXPORT_DATASETS[dataset]
+    db = SessionLocal()
+    try:
+        stmt = select(*export_columns(dataset))
+        if start:
+            stmt = stmt.where(timestamp_column >= start)
+        if end:
+            stmt = stmt.where(timestamp_column < end)
+        if status:
+            if model is Ticket:
+                stmt = stmt.where(Ticket.status == status)
+            else:
+                stmt = stmt.join(Ticket, Ticket.id == model.ticket_id).where(Ticket.status == status)
+
+        stmt = stmt.order_by(model.id).execution_options(yield_per=chunk_size)
+        for partition in db.execute(stmt).partitions():
+            yield [tuple(row) for row in partition]
+    finally:
+        db.close()
+
+
+def _cell(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def encode_csv(header: List[str], chunks: Iterable[List[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for rows in chunks:
+        writer.writerows([[_cell(value) for value in row] for row in rows])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def encode_ndjson(header: List[str], chunks: Iterable[List[tuple]]) -> Iterator[bytes]:
+    for rows in chunks:
+        yield b"".join(orjson.dumps(dict(zip(header, row))) + b"\n" for row in rows)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last drain"""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+def _arrow_type(column):
+    import pyarrow as pa
+
+    if isinstance(column.type, Boolean):
+        return pa.bool_()
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, DateTime):
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def encode_parquet(dataset: str, chunks: Iterable[List[tuple]]) -> Iterator[bytes]:
+    """Write one Parquet row group per chunk and stream the bytes as they are produced"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = export_columns(dataset)
+    schema = pa.schema([pa.field(column.name, _arrow_type(column)) for column in columns])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for rows in chunks:
+            values = [[row[i].value if isinstance(row[i], enum.Enum) else row[i] for row in rows] for i in range(len(columns))]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column_values, type=field.type) for column_values, field in zip(values, schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def check_export_format(fmt: str):
+    """Raise ValueError for unknown formats or a missing Parquet dependency"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{fmt}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet export requires the 'pyarrow' package")
+
+
+def stream_export(
+    dataset: str,
+    fmt: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    status: Optional[TicketStatus] = None,
+    compress: bool = False
+) -> Iterator[bytes]:
+    """Encoded byte stream of a dataset export"""
+    if dataset not in EXPORT_DATASETS:
+        raise ValueError(f"Unknown export dataset '{dataset}'. Use one of: {', '.join(EXPORT_DATASETS)}")
+    check_export_format(fmt)
+
+    header = [column.name for column in export_columns(dataset)]
+    chunks = iter_export_rows(dataset, start, end, status)
+    if fmt == "csv":
+        stream = encode_csv(header, chunks)
+    elif fmt == "ndjson":
+        stream = encode_ndjson(header, chunks)
+    else:
+        stream = encode_parquet(dataset, chunks)
+
+    return gzip_stream(stream) if compress else stream
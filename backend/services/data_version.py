@@ -0,0 +1,188 @@
+"""
+Data versioning for conditional GETs
+
+A monotonic change counter is kept per data scope (tickets, users,
+notifications, SLA config). Counters are bumped after any commit that
+touched the scope's tables, which is detected with SQLAlchemy session
+events, so every write path (routers, services, scheduler) is covered
+without explicit calls.
+
+Polled endpoints derive strong ETags and Last-Modified headers from the
+counters and answer `304 Not Modified` before running their queries.
+The counters live in-process. Each process tags its ETags with a random
+epoch, so with several workers an ETag issued by one worker never
+validates against another (a worker that has not seen a change would
+otherwise answer 304 for it); clients just refetch once per worker.
+"""
+import hashlib
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Iterable, Optional, Tuple
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import event
+from database import SessionLocal
+from auth import Principal, get_current_user
+from config import settings
+
+# Table name -> data scope that changes when the table is written
+TABLE_SCOPES = {
+    "tickets": "tickets",
+    "users": "users",
+    "notifications": "notifications",
+    "sla_configs": "sla",
+    "customer_sla_contracts": "sla",
+    "customer_sla_terms": "sla",
+}
+
+# Distinguishes ETags of different processes, and from before a restart
+_epoch = uuid.uuid4().hex[:8]
+
+_lock = threading.Lock()
+_versions: Dict[str, int] = {scope: 0 for scope in set(TABLE_SCOPES.values())}
+_modified_at: Dict[str, float] = {scope: time.time() for scope in _versions}
+
+
+def get_version(scope: str) -> int:
+    """Current change counter of a scope"""
+    return _versions[scope]
+
+
+def bump(*scopes: str) -> None:
+    """Record a committed change to one or more scopes"""
+    now = time.time()
+    with _lock:
+        for scope in scopes:
+            _versions[scope] += 1
+            _modified_at[scope] = now
+
+
+def snapshot(scopes: Iterable[str]) -> Tuple[Tuple[int, ...], float]:
+    """Versions and latest modification time of the given scopes"""
+    scopes = tuple(scopes)
+    return (
+        tuple(_versions[scope] for scope in scopes),
+        max(_modified_at[scope] for scope in scopes)
+    )
+
+
+# ==================== Session hooks ====================
+
+def _pending_scopes(session) -> set:
+    return session.info.setdefault("changed_scopes", set())
+
+
+def _scope_of(obj) -> Optional[str]:
+    return TABLE_SCOPES.get(getattr(obj, "__tablename__", None))
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _collect_flushed_scopes(session, flush_context):
+    """Remember which scopes a flush touched until the transaction commits"""
+    pending = _pending_scopes(session)
+    for obj in session.new | session.deleted:
+        scope = _scope_of(obj)
+        if scope:
+            pending.add(scope)
+    for obj in session.dirty:
+        scope = _scope_of(obj)
+        if scope and session.is_modified(obj, include_collections=False):
+            pending.add(scope)
+
+
+@event.listens_for(SessionLocal, "do_orm_execute")
+def _collect_bulk_scopes(orm_execute_state):
+    """Bulk UPDATE/DELETE statements bypass the flush, so track them here"""
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    mapper = orm_execute_state.bind_mapper
+    scope = TABLE_SCOPES.get(mapper.local_table.name) if mapper is not None else None
+    if scope:
+        _pending_scopes(orm_execute_state.session).add(scope)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_committed_scopes(session):
+    pending = session.info.pop("changed_scopes", None)
+    if pending:
+        bump(*pending)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back_scopes(session):
+    session.info.pop("changed_scopes", None)
+
+
+# ==================== Conditional GET ====================
+
+def build_validators(
+    scopes: Iterable[str],
+    variant: str = "",
+    time_bucket: bool = False
+) -> Dict[str, str]:
+    """
+    Build ETag and Last-Modified headers for a response
+
+    `variant` distinguishes responses that share scopes but differ by user
+    or query. With `time_bucket`, the validators also roll over every
+    `ETAG_TIME_BUCKET_SECONDS` so time-derived fields (elapsed hours, risk
+    percentage) are refreshed even without writes.
+    """
+    versions, modified_at = snapshot(scopes)
+    parts = [_epoch, ".".join(str(v) for v in versions)]
+    if time_bucket:
+        bucket_seconds = settings.ETAG_TIME_BUCKET_SECONDS
+        bucket = int(time.time() // bucket_seconds)
+        parts.append(str(bucket))
+        modified_at = max(modified_at, bucket * bucket_seconds)
+
+    digest = hashlib.blake2b(variant.encode(), digest_size=8).hexdigest()
+    last_modified = datetime.fromtimestamp(int(modified_at), tz=timezone.utc)
+    return {
+        "ETag": f'"{"-".join(parts)}-{digest}"',
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+    }
+
+
+def is_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """Evaluate If-None-Match (or If-Modified-Since when no ETag was sent)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return headers["ETag"] in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        return parsedate_to_datetime(headers["Last-Modified"]) <= since
+    return False
+
+
+def conditional_get(*scopes: str, time_bucket: bool = False):
+    """
+    Dependency factory for polled GET endpoints
+
+    Raises a 304 before the endpoint body runs when the client's copy is
+    current. Otherwise sets the validators on the response and returns them,
+    for endpoints that build their own Response object.
+    """
+    def dependency(
+        request: Request,
+        response: Response,
+        current_user: Principal = Depends(get_current_user)
+    ) -> Dict[str, str]:
+        variant = f"{current_user.id}?{request.url.query}"
+        headers = build_validators(scopes, variant, time_bucket)
+        if is_not_modified(request, headers):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+        return headers
+
+    return dependency
@@ -1,8 +1,9 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from models import Ticket, User, UserRole, TicketStatus, Notification, NotificationType, ActivityLog
+from models import Ticket, TicketPriority, User, UserRole, TicketStatus, Notification, NotificationType, ActivityLog
+from auth import Principal
+from services.assignment import assignment_engine, get_ticket_skills
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 def create_activity_log(
@@ -83,7 +84,8 @@ def escalate_ticket(
     
     # Find available senior technician if not specified
     if not senior_technician_id:
-        senior_technician_id = find_available_senior_technician(db)
+        skill = ticket.skill_requirement.skill if ticket.skill_requirement else None
+        senior_technician_id = find_available_senior_technician(db, ticket.priority, skill)
         if not senior_technician_id:
             raise ValueError("No available senior technicians found")
     
@@ -129,28 +131,20 @@ def escalate_ticket(
     return ticket
 
 
-def find_available_senior_technician(db: Session) -> Optional[int]:
+def find_available_senior_technician(
+    db: Session,
+    priority: TicketPriority = TicketPriority.MEDIUM,
+    skill: Optional[str] = None
+) -> Optional[int]:
     """
-    Find the senior technician with the lowest current workload
+    Find the senior technician with the lowest weighted workload and room for a ticket
+
+    Seniors with the ticket's skill are preferred (see services.assignment).
     
     Returns:
         User ID of available senior technician, or None if none found
     """
-    # Get all senior technicians
-    senior_techs = db.query(User).filter(User.role == UserRole.SENIOR_TECHNICIAN).all()
-    
-    if not senior_techs:
-        return None
-    
-    # Calculate workload for each
-    workloads = []
-    for tech in senior_techs:
-        workload = check_technician_workload(db, tech.id)
-        workloads.append((tech.id, workload))
-    
-    # Sort by workload (ascending) and return the one with lowest workload
-    workloads.sort(key=lambda x: x[1])
-    return workloads[0][0]
+    return assignment_engine.pick(db, UserRole.SENIOR_TECHNICIAN, priority, skill)
 
 
 def check_technician_workload(db: Session, technician_id: int) -> int:
@@ -239,103 +233,224 @@ def reassign_ticket(
     return ticket
 
 
-def auto_escalate_high_risk_tickets(db: Session) -> list:
+def _load_tickets(db: Session, ticket_ids: List[int]) -> Dict[int, Ticket]:
+    tickets = db.query(Ticket).filter(Ticket.id.in_(ticket_ids)).all()
+    return {ticket.id: ticket for ticket in tickets}
+
+
+def _bulk_result(ticket_id: int, error: Optional[str] = None) -> dict:
+    return {"ticket_id": ticket_id, "success": error is None, "error": error}
+
+
+def queue_grouped_notifications(
+    db: Session,
+    tickets_by_user: Dict[int, List[Ticket]],
+    single_message,
+    summary_message,
+    notification_type: NotificationType
+):
     """
-    Automatically escalate tickets that have reached high-risk threshold (75%+)
-    and notify managers
+    Queue one notification per recipient for a bulk operation
+
+    A recipient affected by a single ticket gets the usual per-ticket message;
+    one affected by several gets a single summary instead of one per ticket.
+    Notifications are only added to the session, the caller commits.
+    """
+    for user_id, tickets in tickets_by_user.items():
+        if len(tickets) == 1:
+            message, ticket_id = single_message(tickets[0]), tickets[0].id
+        else:
+            message, ticket_id = summary_message(tickets), None
+        db.add(Notification(
+            user_id=user_id,
+            message=message,
+            type=notification_type,
+            ticket_id=ticket_id,
+            read=False
+        ))
+
+
+def ticket_refs(tickets: List[Ticket], limit: int = 10) -> str:
+    refs = ", ".join(f"#{ticket.id}" for ticket in tickets[:limit])
+    if len(tickets) > limit:
+        refs += f" and {len(tickets) - limit} more"
+    return refs
+
+
+def bulk_reassign_tickets(
+    db: Session,
+    ticket_ids: List[int],
+    new_assignee_id: int,
+    reassigned_by: Principal,
+    reason: Optional[str] = None
+) -> List[dict]:
+    """
+    Reassign many tickets to one technician in a single transaction
     
     Returns:
-        List of escalation results
+        Per-ticket results in request order
     """
-    from models import RiskLevel, TicketStatus
-    from services.sla_engine import get_tickets_needing_escalation
+    new_assignee = db.query(User).filter(User.id == new_assignee_id).first()
+    if not new_assignee:
+        raise ValueError(f"User {new_assignee_id} not found")
     
-    # Get tickets that need escalation (high risk but not yet escalated)
-    tickets_to_escalate = get_tickets_needing_escalation(db)
+    details = f"Reassigned by {reassigned_by.name}"
+    if reason:
+        details += f". Reason: {reason}"
     
-    results = []
+    tickets = _load_tickets(db, ticket_ids)
+    now = datetime.utcnow()
+    results, reassigned, previous = [], [], {}
+    for ticket_id in ticket_ids:
+        ticket = tickets.get(ticket_id)
+        if not ticket:
+            results.append(_bulk_result(ticket_id, "Ticket not found"))
+            continue
+        
+        old_assignee_id = ticket.assignee_id
+        ticket.assignee_id = new_assignee_id
+        db.add(ActivityLog(
+            ticket_id=ticket.id,
+            user_id=reassigned_by.id,
+            action="REASSIGNED",
+            details=details,
+            timestamp=now
+        ))
+        if old_assignee_id and old_assignee_id != new_assignee_id:
+            previous.setdefault(old_assignee_id, []).append(ticket)
+        reassigned.append(ticket)
+        results.append(_bulk_result(ticket_id))
     
-    for ticket in tickets_to_escalate:
-        try:
-            # Find available senior technician
-            senior_tech_id = find_available_senior_technician(db)
-            
-            if not senior_tech_id:
-                results.append({
-                    'ticket_id': ticket.id,
-                    'ticket_title': ticket.title,
-                    'risk_level': ticket.risk_level.value,
-                    'escalated': False,
-                    'reason': 'No available senior technicians'
-                })
-                continue
-            
-            # Escalate the ticket
-            old_assignee_id = ticket.assignee_id
-            ticket.status = TicketStatus.ESCALATED
-            ticket.assignee_id = senior_tech_id
-            
-            db.commit()
-            db.refresh(ticket)
-            
-            # Create activity log
-            create_activity_log(
-                db,
-                ticket.id,
-                "AUTO_ESCALATED",
-                None,  # System action, no user
-                f"Automatically escalated due to {ticket.risk_level.value} status (SLA at {ticket.risk_level.value})"
-            )
-            
-            # Notify senior technician
-            senior = db.query(User).filter(User.id == senior_tech_id).first()
-            if senior:
-                notify_user(
-                    db,
-                    senior.id,
-                    f"🚨 AUTO-ESCALATED: {ticket.title} (Ticket #{ticket.id}) - {ticket.risk_level.value}",
-                    NotificationType.ALERT,
-                    ticket.id
-                )
-            
-            # Notify all managers about the escalation
-            managers = db.query(User).filter(User.role == UserRole.MANAGER).all()
-            for manager in managers:
-                notify_user(
-                    db,
-                    manager.id,
-                    f"⚠️ Ticket #{ticket.id} auto-escalated to {senior.name if senior else 'senior technician'} - Risk: {ticket.risk_level.value}",
-                    NotificationType.WARNING,
-                    ticket.id
-                )
-            
-            # Notify previous assignee if exists
-            if old_assignee_id and old_assignee_id != senior_tech_id:
-                notify_user(
-                    db,
-                    old_assignee_id,
-                    f"Ticket #{ticket.id} has been auto-escalated due to high SLA risk",
-                    NotificationType.INFO,
-                    ticket.id
-                )
-            
-            results.append({
-                'ticket_id': ticket.id,
-                'ticket_title': ticket.title,
-                'risk_level': ticket.risk_level.value,
-                'escalated': True,
-                'senior_technician': senior.name if senior else 'Unknown'
-            })
-            
-        except Exception as e:
-            results.append({
-                'ticket_id': ticket.id,
-                'ticket_title': ticket.title,
-                'risk_level': ticket.risk_level.value if hasattr(ticket, 'risk_level') else 'Unknown',
-                'escalated': False,
-                'reason': str(e)
-            })
+    if reassigned:
+        queue_grouped_notifications(
+            db, {new_assignee.id: reassigned},
+            lambda t: f"Ticket assigned to you: {t.title}",
+            lambda ts: f"{len(ts)} tickets assigned to you: {ticket_refs(ts)}",
+            NotificationType.INFO
+        )
+        queue_grouped_notifications(
+            db, previous,
+            lambda t: f"Ticket #{t.id} has been reassigned",
+            lambda ts: f"{len(ts)} tickets have been reassigned: {ticket_refs(ts)}",
+            NotificationType.INFO
+        )
     
+    db.commit()
+    return results
+
+
+def bulk_escalate_tickets(
+    db: Session,
+    ticket_ids: List[int],
+    reason: str,
+    escalated_by: Principal,
+    senior_technician_id: Optional[int] = None
+) -> List[dict]:
+    """
+    Escalate many tickets in a single transaction
+    
+    Without a specific senior technician, each ticket goes to the currently
+    least-loaded senior with room for it; picks are reserved as they are
+    made, so the batch is spread across seniors.
+    
+    Returns:
+        Per-ticket results in request order
+    """
+    if senior_technician_id:
+        senior = db.query(User).filter(User.id == senior_technician_id).first()
+        if not senior:
+            raise ValueError(f"User {senior_technician_id} not found")
+        if senior.role != UserRole.SENIOR_TECHNICIAN:
+            raise ValueError(f"User {senior_technician_id} is not a senior technician")
+    
+    details = f"Escalated by {escalated_by.name}. Reason: {reason}"
+    tickets = _load_tickets(db, ticket_ids)
+    skills = {} if senior_technician_id else get_ticket_skills(db, list(tickets))
+    now = datetime.utcnow()
+    results, assigned, previous = [], {}, {}
+    for ticket_id in ticket_ids:
+        ticket = tickets.get(ticket_id)
+        if not ticket:
+            results.append(_bulk_result(ticket_id, "Ticket not found"))
+            continue
+        if ticket.status == TicketStatus.RESOLVED:
+            results.append(_bulk_result(ticket_id, "Ticket is already resolved"))
+            continue
+        
+        senior_id = senior_technician_id or find_available_senior_technician(
+            db, ticket.priority, skills.get(ticket.id)
+        )
+        if not senior_id:
+            results.append(_bulk_result(ticket_id, "No available senior technicians found"))
+            continue
+        
+        old_assignee_id = ticket.assignee_id
+        ticket.status = TicketStatus.ESCALATED
+        ticket.assignee_id = senior_id
+        db.add(ActivityLog(
+            ticket_id=ticket.id,
+            user_id=escalated_by.id,
+            action="ESCALATED",
+            details=details,
+            timestamp=now
+        ))
+        assigned.setdefault(senior_id, []).append(ticket)
+        if old_assignee_id and old_assignee_id != senior_id:
+            previous.setdefault(old_assignee_id, []).append(ticket)
+        results.append(_bulk_result(ticket_id))
+    
+    queue_grouped_notifications(
+        db, assigned,
+        lambda t: f"🚨 Escalated ticket assigned: {t.title}. Reason: {reason}",
+        lambda ts: f"🚨 {len(ts)} escalated tickets assigned to you: {ticket_refs(ts)}. Reason: {reason}",
+        NotificationType.ALERT
+    )
+    queue_grouped_notifications(
+        db, previous,
+        lambda t: f"Ticket #{t.id} has been escalated to senior technician",
+        lambda ts: f"{len(ts)} tickets have been escalated to senior technicians: {ticket_refs(ts)}",
+        NotificationType.INFO
+    )
+    
+    db.commit()
+    return results
+
+
+def bulk_resolve_tickets(
+    db: Session,
+    ticket_ids: List[int],
+    resolved_by: Principal
+) -> List[dict]:
+    """
+    Resolve many tickets in a single transaction
+    
+    Returns:
+        Per-ticket results in request order
+    """
+    tickets = _load_tickets(db, ticket_ids)
+    now = datetime.utcnow()
+    results = []
+    for ticket_id in ticket_ids:
+        ticket = tickets.get(ticket_id)
+        if not ticket:
+            results.append(_bulk_result(ticket_id, "Ticket not found"))
+            continue
+        if ticket.status == TicketStatus.RESOLVED:
+            results.append(_bulk_result(ticket_id, "Ticket is already resolved"))
+            continue
+        
+        ticket.status = TicketStatus.RESOLVED
+        ticket.resolved_at = now
+        db.add(ActivityLog(
+            ticket_id=ticket.id,
+            user_id=resolved_by.id,
+            action="RESOLVED",
+            details=f"Ticket resolved by {resolved_by.name}",
+            timestamp=now
+        ))
+        results.append(_bulk_result(ticket_id))
+    
+    db.commit()
     return results
 
 
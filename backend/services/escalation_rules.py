@@ -0,0 +1,284 @@
+"""
+Declarative escalation rules
+
+Rules are rows of `escalation_rules`: conditions over priority, customer,
+status, risk level, risk percentage, ticket age and assignee load, plus one
+action (escalate, reassign or notify). The SLA monitoring job evaluates all
+enabled rules against the open tickets with a single query:
+
+- the conditions SQL can express (priority, customer, status, risk level,
+  age, and "has not fired for this ticket yet") are compiled into one
+  boolean column per rule, so the database checks every rule in one scan
+  and only returns tickets at least one rule selects
+- risk percentage and assignee load are checked in Python on those rows;
+  assignee loads come from one grouped query per run
+
+Escalation and role-targeted reassignment pick their technician from the
+assignment engine (skill- and capacity-aware, see services.assignment).
+
+A ticket is handled by the first matching rule in position order, and each
+rule acts on a ticket at most once (`escalation_rule_hits`). Actions are
+applied in one transaction with grouped notifications, so adding rules adds
+neither queries nor per-ticket round trips.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import and_, delete, exists, func, insert, or_, select
+from sqlalchemy.orm import Session
+from models import (
+    ActivityLog, EscalationAction, EscalationRule, EscalationRuleHit, NotificationType, RiskLevel, Ticket,
+    TicketPriority, TicketStatus, User, UserRole
+)
+from services.analytics import TECHNICIAN_ROLES
+from services.assignment import assignment_engine, get_ticket_skills
+from services.escalation import queue_grouped_notifications, ticket_refs
+from services.sla_engine import calculate_risk_percentage
+
+NOTIFY_TARGETS = ("MANAGERS", "ASSIGNEE")
+
+OPEN_STATUSES = (TicketStatus.OPEN, TicketStatus.IN_PROGRESS, TicketStatus.ESCALATED)
+
+# Rule created with the table, matching the behaviour before rules were configurable
+DEFAULT_RULE = {
+    "name": "Escalate high-risk tickets",
+    "position": 0,
+    "conditions": {"risk_levels": ["HIGH_RISK", "BREACHED"], "statuses": ["OPEN", "IN_PROGRESS"]},
+    "action": EscalationAction.ESCALATE,
+}
+
+_COLUMNS = (
+    Ticket.id, Ticket.title, Ticket.priority, Ticket.status, Ticket.risk_level,
+    Ticket.assignee_id, Ticket.created_at, Ticket.sla_limit_hours,
+)
+
+
+class CompiledRule:
+    """A rule split into a SQL predicate and the residual checks done in Python"""
+
+    def __init__(self, rule: EscalationRule, now: datetime):
+        self.rule = rule
+        conditions = rule.conditions or {}
+        predicates = [~exists().where(
+            EscalationRuleHit.rule_id == rule.id,
+            EscalationRuleHit.ticket_id == Ticket.id
+        )]
+        if conditions.get("priorities"):
+            predicates.append(Ticket.priority.in_([TicketPriority(p) for p in conditions["priorities"]]))
+        if conditions.get("customers"):
+            predicates.append(Ticket.customer.in_(conditions["customers"]))
+        if conditions.get("statuses"):
+            predicates.append(Ticket.status.in_([TicketStatus(s) for s in conditions["statuses"]]))
+        if conditions.get("risk_levels"):
+            predicates.append(Ticket.risk_level.in_([RiskLevel(r) for r in conditions["risk_levels"]]))
+        if conditions.get("min_age_hours") is not None:
+            predicates.append(Ticket.created_at <= now - timedelta(hours=conditions["min_age_hours"]))
+        self.predicate = and_(*predicates)
+
+        self.now = now
+        self.min_risk_percentage = conditions.get("min_risk_percentage")
+        self.min_assignee_load = conditions.get("min_assignee_load")
+        self.max_assignee_load = conditions.get("max_assignee_load")
+
+    @property
+    def uses_load(self) -> bool:
+        return self.min_assignee_load is not None or self.max_assignee_load is not None
+
+    def matches(self, row, loads: Dict[int, Tuple[UserRole, int]]) -> bool:
+        """Residual conditions for a row the SQL predicate selected"""
+        if self.min_risk_percentage is not None:
+            elapsed_hours = (self.now - row.created_at).total_seconds() / 3600
+            if calculate_risk_percentage(elapsed_hours, row.sla_limit_hours) < self.min_risk_percentage:
+                return False
+        if self.uses_load:
+            if row.assignee_id is None:
+                return False
+            load = loads.get(row.assignee_id, (None, 0))[1]
+            if self.min_assignee_load is not None and load < self.min_assignee_load:
+                return False
+            if self.max_assignee_load is not None and load > self.max_assignee_load:
+                return False
+        return True
+
+
+def validate_rule(db: Session, action: EscalationAction, target_user_id: Optional[int],
+                  target_role: Optional[UserRole], notify_target: Optional[str]):
+    """Raise ValueError when the action lacks the target it needs"""
+    if action == EscalationAction.REASSIGN:
+        if target_user_id is None and target_role not in TECHNICIAN_ROLES:
+            raise ValueError("REASSIGN rules need target_user_id or a technician target_role")
+        if target_user_id is not None and db.query(User.id).filter(User.id == target_user_id).first() is None:
+            raise ValueError(f"User {target_user_id} not found")
+    if action == EscalationAction.NOTIFY and notify_target not in NOTIFY_TARGETS:
+        raise ValueError(f"NOTIFY rules need notify_target {' or '.join(NOTIFY_TARGETS)}")
+
+
+def get_user_loads(db: Session) -> Dict[int, Tuple[UserRole, int]]:
+    """Role and number of open assigned tickets of every user, in one grouped query"""
+    open_count = func.count(Ticket.id)
+    rows = db.query(User.id, User.role, open_count).outerjoin(
+        Ticket,
+        (Ticket.assignee_id == User.id) & Ticket.status.in_(OPEN_STATUSES)
+    ).group_by(User.id, User.role).all()
+    return {user_id: (role, count) for user_id, role, count in rows}
+
+
+def find_rule_matches(db: Session, now: Optional[datetime] = None) -> List[tuple]:
+    """
+    Select the open tickets some enabled rule applies to
+
+    Returns (compiled rule, ticket row) pairs, one per ticket, for the first
+    matching rule in position order.
+    """
+    now = now or datetime.utcnow()
+    rules = db.query(EscalationRule).filter(EscalationRule.enabled == True).order_by(
+        EscalationRule.position, EscalationRule.id
+    ).all()
+    if not rules:
+        return []
+    compiled = [CompiledRule(rule, now) for rule in rules]
+
+    flags = [rule.predicate.label(f"rule_{index}") for index, rule in enumerate(compiled)]
+    rows = db.execute(
+        select(*_COLUMNS, *flags).where(
+            Ticket.status != TicketStatus.RESOLVED,
+            or_(*[rule.predicate for rule in compiled])
+        )
+    ).all()
+
+    loads = get_user_loads(db) if any(rule.uses_load for rule in compiled) else {}
+    offset = len(_COLUMNS)
+    matches = []
+    for row in rows:
+        for index, rule in enumerate(compiled):
+            if row[offset + index] and rule.matches(row, loads):
+                matches.append((rule, row))
+                break
+    return matches
+
+
+def run_escalation_rules(db: Session, dry_run: bool = False) -> List[dict]:
+    """
+    Evaluate all enabled rules and apply their actions in one transaction
+
+    With `dry_run`, returns what would happen without writing anything.
+    """
+    now = datetime.utcnow()
+    matches = find_rule_matches(db, now)
+    if dry_run or not matches:
+        return [_result(rule, row, applied=False) for rule, row in matches]
+
+    db.execute(delete(EscalationRuleHit).where(
+        EscalationRuleHit.ticket_id.notin_(select(Ticket.id).where(Ticket.status != TicketStatus.RESOLVED))
+    ))
+    moved_ids = [row.id for rule, row in matches if rule.rule.action != EscalationAction.NOTIFY]
+    tickets = {ticket.id: ticket for ticket in db.query(Ticket).filter(Ticket.id.in_(moved_ids))} if moved_ids else {}
+    skills = get_ticket_skills(db, moved_ids)
+    manager_ids = db.execute(select(User.id).where(User.role == UserRole.MANAGER)).scalars().all()
+
+    results, hits = [], []
+    escalated, assigned, previous, notified = {}, {}, {}, {}
+    for rule, row in matches:
+        action = rule.rule.action
+        if action == EscalationAction.NOTIFY:
+            recipients = manager_ids if rule.rule.notify_target == "MANAGERS" else [row.assignee_id] if row.assignee_id else []
+            if not recipients:
+                # No hit either, so the rule fires once there is someone to notify
+                reason = "No managers to notify" if rule.rule.notify_target == "MANAGERS" else "No assignee to notify"
+                results.append(_result(rule, row, applied=False, reason=reason))
+                continue
+            for user_id in recipients:
+                notified.setdefault((rule.rule.id, user_id), []).append(row)
+        else:
+            if action == EscalationAction.ESCALATE:
+                target_id = assignment_engine.pick(db, UserRole.SENIOR_TECHNICIAN, row.priority, skills.get(row.id))
+            else:
+                target_id = rule.rule.target_user_id or assignment_engine.pick(
+                    db, rule.rule.target_role, row.priority, skills.get(row.id)
+                )
+            if target_id is None:
+                results.append(_result(rule, row, applied=False, reason="No available target user"))
+                continue
+
+            ticket = tickets[row.id]
+            if action == EscalationAction.REASSIGN and ticket.assignee_id == target_id:
+                hits.append({"rule_id": rule.rule.id, "ticket_id": row.id, "fired_at": now})
+                results.append(_result(rule, row, applied=False, reason="Already assigned to the target user"))
+                continue
+            old_assignee_id = ticket.assignee_id
+            ticket.assignee_id = target_id
+            if action == EscalationAction.ESCALATE:
+                ticket.status = TicketStatus.ESCALATED
+                escalated.setdefault(target_id, []).append(ticket)
+                details = f"Automatically escalated by rule '{rule.rule.name}' (SLA at {row.risk_level.value})"
+            else:
+                assigned.setdefault(target_id, []).append(ticket)
+                details = f"Automatically reassigned by rule '{rule.rule.name}'"
+            if rule.rule.message:
+                details += f". {rule.rule.message}"
+            db.add(ActivityLog(
+                ticket_id=ticket.id,
+                user_id=None,  # System action
+                action="AUTO_ESCALATED" if action == EscalationAction.ESCALATE else "AUTO_REASSIGNED",
+                details=details,
+                timestamp=now
+            ))
+            if old_assignee_id and old_assignee_id != target_id:
+                previous.setdefault(old_assignee_id, []).append(ticket)
+
+        hits.append({"rule_id": rule.rule.id, "ticket_id": row.id, "fired_at": now})
+        results.append(_result(rule, row, applied=True))
+
+    queue_grouped_notifications(
+        db, escalated,
+        lambda t: f"🚨 AUTO-ESCALATED: {t.title} (Ticket #{t.id}) - {t.risk_level.value}",
+        lambda ts: f"🚨 {len(ts)} tickets auto-escalated to you: {ticket_refs(ts)}",
+        NotificationType.ALERT
+    )
+    queue_grouped_notifications(
+        db, assigned,
+        lambda t: f"Ticket assigned to you: {t.title}",
+        lambda ts: f"{len(ts)} tickets assigned to you: {ticket_refs(ts)}",
+        NotificationType.INFO
+    )
+    queue_grouped_notifications(
+        db, previous,
+        lambda t: f"Ticket #{t.id} has been reassigned by an escalation rule",
+        lambda ts: f"{len(ts)} tickets have been reassigned by escalation rules: {ticket_refs(ts)}",
+        NotificationType.INFO
+    )
+    all_escalated = [ticket for group in escalated.values() for ticket in group]
+    if all_escalated:
+        queue_grouped_notifications(
+            db, {manager_id: all_escalated for manager_id in manager_ids},
+            lambda t: f"⚠️ Ticket #{t.id} auto-escalated - Risk: {t.risk_level.value}",
+            lambda ts: f"⚠️ {len(ts)} tickets auto-escalated: {ticket_refs(ts)}",
+            NotificationType.WARNING
+        )
+    rules_by_id = {rule.rule.id: rule.rule for rule, _ in matches}
+    for (rule_id, user_id), rows in notified.items():
+        rule = rules_by_id[rule_id]
+        suffix = f" {rule.message}" if rule.message else ""
+        queue_grouped_notifications(
+            db, {user_id: rows},
+            lambda t: f"⚠️ Rule '{rule.name}': ticket #{t.id} - {t.title}.{suffix}",
+            lambda ts: f"⚠️ Rule '{rule.name}': {len(ts)} tickets ({ticket_refs(ts)}).{suffix}",
+            NotificationType.WARNING
+        )
+
+    if hits:
+        db.execute(insert(EscalationRuleHit), hits)
+    db.commit()
+    return results
+
+
+def _result(rule: CompiledRule, row, applied: bool, reason: Optional[str] = None) -> dict:
+    return {
+        "ticket_id": row.id,
+        "ticket_title": row.title,
+        "risk_level": row.risk_level,
+        "rule_id": rule.rule.id,
+        "rule": rule.rule.name,
+        "action": rule.rule.action,
+        "applied": applied,
+        "reason": reason,
+    }
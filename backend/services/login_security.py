@@ -0,0 +1,167 @@
+"""
+Password hashing executor and login throttling
+
+bcrypt is deliberately slow, so hashing and verification run on a small
+dedicated thread pool instead of the shared request threadpool. At most
+PASSWORD_HASH_WORKERS hashes run and PASSWORD_HASH_MAX_PENDING wait at any
+time; beyond that requests are rejected immediately (503) rather than
+queued, so a login storm cannot take threads from the ticket APIs.
+
+Failed logins are counted in a sliding window per account and client IP,
+per account across all IPs, and per client IP; once any limit is reached
+further attempts are refused (429) before any hashing is done. The tight
+per-(account, IP) limit stops guessing from one address without letting
+anyone lock a user out from elsewhere; the looser account-wide limit caps
+guesses spread over many addresses. A successful login takes that user's
+own failures off the account-wide and IP counts, so typos behind a shared
+NAT address do not add up to a site-wide lockout.
+"""
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from auth import pwd_context
+from config import settings
+from models import User
+
+
+class HashingBusy(Exception):
+    """The hashing executor is saturated"""
+
+
+class PasswordHashExecutor:
+    """Bounded thread pool for password hashing"""
+
+    def __init__(self, workers: int, max_pending: int):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self.rejected = 0
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Schedule fn(*args), or raise HashingBusy when no slot is free"""
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingBusy()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def run(self, fn: Callable, *args):
+        """Await fn(*args) without holding a request thread"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+
+password_executor = PasswordHashExecutor(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_MAX_PENDING)
+
+
+class LoginThrottle:
+    """Sliding-window count of failed logins per (account, IP), per account and per IP"""
+
+    def __init__(self, window_seconds: int, max_per_account: int, max_per_account_global: int, max_per_ip: int):
+        self.window_seconds = window_seconds
+        self.limits = {"account": max_per_account, "account_global": max_per_account_global, "ip": max_per_ip}
+        self._lock = threading.Lock()
+        self._failures: Dict[tuple, Deque[float]] = {}
+        self._next_sweep = 0.0
+
+    def _recent(self, key: tuple, now: float) -> Deque[float]:
+        failures = self._failures.get(key)
+        if failures is None:
+            return deque()
+        while failures and failures[0] <= now - self.window_seconds:
+            failures.popleft()
+        if not failures:
+            del self._failures[key]
+        return failures
+
+    def retry_after(self, email: str, ip: Optional[str]) -> int:
+        """Seconds until another attempt is allowed, 0 if allowed now"""
+        now = time.monotonic()
+        wait = 0.0
+        with self._lock:
+            for key in self._keys(email, ip):
+                failures = self._recent(key, now)
+                if len(failures) >= self.limits[key[0]]:
+                    # Allowed again once enough of the oldest failures leave the window
+                    oldest = failures[len(failures) - self.limits[key[0]]]
+                    wait = max(wait, oldest + self.window_seconds - now)
+        return int(wait) + 1 if wait else 0
+
+    def record_failure(self, email: str, ip: Optional[str]):
+        now = time.monotonic()
+        with self._lock:
+            for key in self._keys(email, ip):
+                self._failures.setdefault(key, deque()).append(now)
+            if now >= self._next_sweep:
+                for key in list(self._failures):
+                    self._recent(key, now)
+                self._next_sweep = now + self.window_seconds
+
+    def record_success(self, email: str, ip: Optional[str]):
+        """Forget the account's failures from this IP, and take them off the account-wide and IP counts"""
+        now = time.monotonic()
+        with self._lock:
+            own = self._failures.pop(("account", email.lower(), ip), ())
+            own_recent = sum(1 for failed_at in own if failed_at > now - self.window_seconds)
+            if not own_recent:
+                return
+            for key in (("account_global", email.lower()), ("ip", ip)):
+                failures = self._failures.get(key)
+                if failures:
+                    for _ in range(min(own_recent, len(failures))):
+                        failures.pop()
+                    if not failures:
+                        del self._failures[key]
+
+    @staticmethod
+    def _keys(email: str, ip: Optional[str]) -> list:
+        keys = [("account", email.lower(), ip), ("account_global", email.lower())]
+        if ip is not None:
+            keys.append(("ip", ip))
+        return keys
+
+
+login_throttle = LoginThrottle(
+    settings.LOGIN_THROTTLE_WINDOW_SECONDS,
+    settings.LOGIN_MAX_FAILURES_PER_ACCOUNT,
+    settings.LOGIN_MAX_FAILURES_PER_ACCOUNT_GLOBAL,
+    settings.LOGIN_MAX_FAILURES_PER_IP
+)
+
+
+def _save_rehashed_password(db: Session, user: User, password_hash: str):
+    user.password_hash = password_hash
+    db.commit()
+    db.refresh(user)
+
+
+async def authenticate(db: Session, email: str, password: str) -> Optional[User]:
+    """
+    Check credentials with hashing on the password executor
+
+    Unknown emails cost a dummy verification, so they take as long as wrong
+    passwords. Hashes made with a different bcrypt cost are upgraded to the
+    configured one on successful login. Raises HashingBusy when saturated.
+    """
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.email == email).first())
+    if user is None:
+        await password_executor.run(pwd_context.dummy_verify)
+        return None
+    if not await password_executor.run(pwd_context.verify, password, user.password_hash):
+        return None
+
+    if pwd_context.needs_update(user.password_hash):
+        try:
+            new_hash = await password_executor.run(pwd_context.hash, password)
+        except HashingBusy:
+            return user  # Upgrade on a later login
+        await run_in_threadpool(_save_rehashed_password, db, user, new_hash)
+    return user
@@ -0,0 +1,63 @@
+"""
+Mergeable streaming quantile sketch (DDSketch)
+
+Values are mapped to logarithmically sized bins so that every quantile
+estimate is within a fixed relative error of the true value. A sketch is
+just a mapping of bin index -> count, so sketches can be merged (and values
+removed) by adding counts, which makes them easy to store as rollup rows.
+"""
+import math
+from typing import Dict, Iterable, Optional
+
+# Relative accuracy of quantile estimates (1%)
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+
+# Smallest distinguishable value; anything below (including zero) shares one bin
+MIN_VALUE = 1e-3
+
+
+def bin_index(value: float) -> int:
+    """Bin holding a value"""
+    return math.ceil(math.log(max(value, MIN_VALUE)) / _LOG_GAMMA)
+
+
+def bin_value(index: int) -> float:
+    """Representative value of a bin, within RELATIVE_ACCURACY of any value in it"""
+    return 2 * GAMMA ** index / (GAMMA + 1)
+
+
+class DDSketch:
+    """Quantile sketch over bin counts"""
+
+    def __init__(self, bins: Optional[Dict[int, int]] = None):
+        self.bins: Dict[int, int] = dict(bins or {})
+
+    @property
+    def count(self) -> int:
+        return sum(self.bins.values())
+
+    def add(self, value: float, count: int = 1):
+        index = bin_index(value)
+        self.bins[index] = self.bins.get(index, 0) + count
+
+    def merge(self, other: "DDSketch"):
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated q-quantile (0 <= q <= 1), or None for an empty sketch"""
+        total = self.count
+        if total <= 0:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                return bin_value(index)
+        return bin_value(max(self.bins))
+
+    def quantiles(self, qs: Iterable[float]) -> Dict[float, Optional[float]]:
+        return {q: self.quantile(q) for q in qs}
@@ -0,0 +1,94 @@
+"""
+Server-side refresh tokens
+
+A refresh token is an opaque random string; only its SHA-256 is stored.
+Every refresh rotates it: the presented token is revoked and a new one of
+the same family (one login) is issued. Presenting an already revoked token
+means it leaked, so its whole family is revoked.
+
+Refreshing re-reads the user, so role changes and deletions take effect
+within one access-token lifetime.
+"""
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from config import settings
+from models import RefreshToken, User
+
+
+def _hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def issue_refresh_token(db: Session, user: User, family_id: Optional[str] = None) -> str:
+    """Create and commit a refresh token for user, returning the raw token"""
+    token = secrets.token_urlsafe(32)
+    now = datetime.utcnow()
+    db.add(RefreshToken(
+        user_id=user.id,
+        token_hash=_hash(token),
+        family_id=family_id or secrets.token_hex(16),
+        created_at=now,
+        expires_at=now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+    db.commit()
+    return token
+
+
+def _revoke_family(db: Session, family_id: str):
+    db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+    db.commit()
+
+
+def rotate_refresh_token(db: Session, token: str) -> Tuple[User, str]:
+    """Exchange a valid refresh token for its user and a new refresh token"""
+    stored = db.query(RefreshToken).filter(RefreshToken.token_hash == _hash(token)).first()
+    if stored is None:
+        raise ValueError("Invalid refresh token")
+    if stored.revoked_at is not None:
+        _revoke_family(db, stored.family_id)
+        raise ValueError("Refresh token has been revoked")
+    if stored.expires_at <= datetime.utcnow():
+        raise ValueError("Refresh token has expired")
+
+    user = db.query(User).filter(User.id == stored.user_id).first()
+    if user is None:
+        _revoke_family(db, stored.family_id)
+        raise ValueError("User not found")
+
+    stored.revoked_at = datetime.utcnow()
+    return user, issue_refresh_token(db, user, stored.family_id)
+
+
+def revoke_refresh_token(db: Session, token: str):
+    """Revoke the session (token family) of a refresh token, if it exists"""
+    stored = db.query(RefreshToken).filter(RefreshToken.token_hash == _hash(token)).first()
+    if stored is not None:
+        _revoke_family(db, stored.family_id)
+
+
+def revoke_user_refresh_tokens(db: Session, user_id: int) -> int:
+    """Revoke every active refresh token of a user, returning how many"""
+    result = db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.user_id == user_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+    )
+    db.commit()
+    return result.rowcount
+
+
+def prune_refresh_tokens(db: Session) -> int:
+    """Delete expired refresh tokens (revoked ones are kept until then for reuse detection)"""
+    deleted = db.query(RefreshToken).filter(
+        RefreshToken.expires_at <= datetime.utcnow()
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted
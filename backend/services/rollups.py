@@ -0,0 +1,409 @@
+"""
+Incrementally maintained analytics rollups
+
+Every ticket contributes a fixed set of increments to the rollup tables,
+derived purely from its current field values:
+
+- ticket_state_rollups: +1 ticket for (status, risk level, priority, assignee)
+- ticket_activity_rollups, per hour and per day bucket:
+    - +1 created in the bucket of created_at
+    - +1 resolved (and its resolution hours) in the bucket of resolved_at
+    - +1 breached in the bucket of its SLA deadline, once it is BREACHED
+- resolution_sketch_bins, per week of resolution: DDSketch bin counts of
+  resolution hours, and of hours past the SLA deadline for late resolutions
+- ticket_deadline_rollups: +1 open ticket in the hour of its SLA deadline,
+  until it is resolved (the breach forecast histogram)
+
+When a ticket is created, changed or deleted, the rollups receive
+contributions(new) - contributions(old) in the same transaction, which is
+done from a session `after_flush` hook. Because the contributions only
+depend on ticket state, a backfill from history (`rebuild_rollups`) always
+yields exactly what incremental maintenance produces.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, event, func, inspect, insert, select, update
+from sqlalchemy.orm import Session
+from database import SessionLocal
+from models import (
+    ResolutionSketchBin, Ticket, TicketActivityRollup, TicketDeadlineRollup, TicketStateRollup,
+    TicketStatus, RiskLevel
+)
+from services.quantile_sketch import DDSketch, bin_index
+
+GRANULARITIES = ("hour", "day")
+
+# Ticket fields the contributions depend on
+ROLLUP_FIELDS = (
+    "status", "risk_level", "priority", "assignee_id",
+    "created_at", "resolved_at", "sla_limit_hours",
+)
+
+STATE_KEY = ("status", "risk_level", "priority", "assignee_id")
+ACTIVITY_KEY = ("granularity", "bucket_start", "priority", "assignee_id")
+ACTIVITY_METRICS = (
+    "created_count", "resolved_count", "resolved_within_sla_count",
+    "breached_count", "resolution_hours",
+)
+SKETCH_KEY = ("metric", "week_start", "priority", "assignee_id", "bin_index")
+DEADLINE_KEY = ("deadline_hour", "priority", "assignee_id")
+
+RESOLUTION_METRIC = "resolution_hours"
+BREACH_OVERRUN_METRIC = "breach_overrun_hours"
+SKETCH_METRICS = (RESOLUTION_METRIC, BREACH_OVERRUN_METRIC)
+
+
+def bucket_start(moment: datetime, granularity: str) -> datetime:
+    """Start of the hour, day or week (Monday) containing a timestamp"""
+    if granularity == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+class RollupDelta:
+    """Accumulated rollup increments, keyed by rollup row"""
+
+    def __init__(self):
+        self.state: Dict[tuple, int] = defaultdict(int)
+        self.activity: Dict[tuple, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        self.sketch: Dict[tuple, int] = defaultdict(int)
+        self.deadline: Dict[tuple, int] = defaultdict(int)
+
+    def add(self, values: dict, sign: int = 1):
+        """Add (or with sign=-1, remove) one ticket's contributions"""
+        assignee_id = values["assignee_id"] or 0
+        priority = values["priority"]
+        self.state[(values["status"], values["risk_level"], priority, assignee_id)] += sign
+
+        created_at = values["created_at"]
+        resolved_at = values["resolved_at"]
+        sla_limit_hours = values["sla_limit_hours"]
+        is_resolved = values["status"] == TicketStatus.RESOLVED and resolved_at is not None
+        if values["status"] != TicketStatus.RESOLVED and created_at is not None:
+            deadline = created_at + timedelta(hours=sla_limit_hours)
+            self.deadline[(bucket_start(deadline, "hour"), priority, assignee_id)] += sign
+
+        if is_resolved:
+            hours = (resolved_at - created_at).total_seconds() / 3600
+            week = bucket_start(resolved_at, "week")
+            self.sketch[(RESOLUTION_METRIC, week, priority, assignee_id, bin_index(hours))] += sign
+            if hours > sla_limit_hours:
+                overrun = hours - sla_limit_hours
+                self.sketch[(BREACH_OVERRUN_METRIC, week, priority, assignee_id, bin_index(overrun))] += sign
+
+        for granularity in GRANULARITIES:
+            if created_at is not None:
+                key = (granularity, bucket_start(created_at, granularity), priority, assignee_id)
+                self.activity[key]["created_count"] += sign
+
+            if is_resolved:
+                metrics = self.activity[(granularity, bucket_start(resolved_at, granularity), priority, assignee_id)]
+                metrics["resolved_count"] += sign
+                metrics["resolution_hours"] += sign * hours
+                if hours <= sla_limit_hours:
+                    metrics["resolved_within_sla_count"] += sign
+
+            if values["risk_level"] == RiskLevel.BREACHED and created_at is not None:
+                deadline = created_at + timedelta(hours=sla_limit_hours)
+                key = (granularity, bucket_start(deadline, granularity), priority, assignee_id)
+                self.activity[key]["breached_count"] += sign
+
+    def state_rows(self) -> List[dict]:
+        return [
+            dict(zip(STATE_KEY, key), ticket_count=count)
+            for key, count in self.state.items() if count
+        ]
+
+    def sketch_rows(self) -> List[dict]:
+        return [
+            dict(zip(SKETCH_KEY, key), bin_count=count)
+            for key, count in self.sketch.items() if count
+        ]
+
+    def deadline_rows(self) -> List[dict]:
+        return [
+            dict(zip(DEADLINE_KEY, key), open_count=count)
+            for key, count in self.deadline.items() if count
+        ]
+
+    def activity_rows(self) -> List[dict]:
+        rows = []
+        for key, metrics in self.activity.items():
+            if not any(metrics.values()):
+                continue
+            row = dict(zip(ACTIVITY_KEY, key))
+            for metric in ACTIVITY_METRICS:
+                row[metric] = metrics.get(metric, 0)
+            rows.append(row)
+        return rows
+
+
+def upsert_increments(connection, model, key_columns: Tuple[str, ...], metric_columns: Tuple[str, ...], rows: List[dict]):
+    """Add the metric values of each row to its rollup row, creating it if needed"""
+    if not rows:
+        return
+    table = model.__table__
+    dialect = connection.dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key_columns),
+            set_={column: table.c[column] + stmt.excluded[column] for column in metric_columns}
+        )
+        connection.execute(stmt, rows)
+        return
+
+    # Portable fallback: update the existing row, insert when there is none
+    for row in rows:
+        where = [table.c[column] == row[column] for column in key_columns]
+        result = connection.execute(
+            update(table).where(*where).values({column: table.c[column] + row[column] for column in metric_columns})
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table), [row])
+
+
+def apply_delta(connection, delta: RollupDelta):
+    """Write accumulated increments to both rollup tables"""
+    upsert_increments(connection, TicketStateRollup, STATE_KEY, ("ticket_count",), delta.state_rows())
+    upsert_increments(connection, TicketActivityRollup, ACTIVITY_KEY, ACTIVITY_METRICS, delta.activity_rows())
+    upsert_increments(connection, ResolutionSketchBin, SKETCH_KEY, ("bin_count",), delta.sketch_rows())
+    upsert_increments(connection, TicketDeadlineRollup, DEADLINE_KEY, ("open_count",), delta.deadline_rows())
+
+
+def apply_new_tickets(db: Session, rows: Iterable[dict]):
+    """Add rollup contributions for tickets inserted outside the ORM flush (bulk imports)"""
+    delta = RollupDelta()
+    for row in rows:
+        delta.add(row)
+    apply_delta(db.connection(), delta)
+
+
+def _previous_values(ticket: Ticket) -> dict:
+    """Field values of a ticket before the pending changes"""
+    state = inspect(ticket)
+    values = {}
+    for name in ROLLUP_FIELDS:
+        history = state.attrs[name].history
+        if history.deleted:
+            values[name] = history.deleted[0]
+        elif history.added:
+            values[name] = None  # Was unset before this flush
+        else:
+            values[name] = getattr(ticket, name)
+    return values
+
+
+def _current_values(ticket: Ticket) -> dict:
+    return {name: getattr(ticket, name) for name in ROLLUP_FIELDS}
+
+
+# Load the previous value when these attributes are set, so flush-time
+# history is complete even if the ticket was expired by an earlier commit
+for _name in ROLLUP_FIELDS:
+    event.listen(getattr(Ticket, _name), "set", lambda target, value, oldvalue, initiator: None, active_history=True)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _maintain_rollups(session, flush_context):
+    """Apply rollup deltas for tickets written in this flush"""
+    delta = RollupDelta()
+    for obj in session.new:
+        if isinstance(obj, Ticket):
+            delta.add(_current_values(obj))
+    for obj in session.dirty:
+        if isinstance(obj, Ticket) and session.is_modified(obj, include_collections=False):
+            previous = _previous_values(obj)
+            current = _current_values(obj)
+            if previous != current:
+                delta.add(previous, sign=-1)
+                delta.add(current)
+    for obj in session.deleted:
+        if isinstance(obj, Ticket):
+            delta.add(_previous_values(obj), sign=-1)
+
+    if delta.state or delta.activity or delta.sketch or delta.deadline:
+        apply_delta(session.connection(), delta)
+
+
+# ==================== Backfill ====================
+
+def rebuild_rollups(db: Session, chunk_size: int = 5000) -> int:
+    """
+    Rebuild all rollup tables from the tickets table
+
+    Returns:
+        Number of tickets processed
+    """
+    delta = RollupDelta()
+    processed = 0
+    stmt = select(*[getattr(Ticket, name) for name in ROLLUP_FIELDS]).execution_options(yield_per=chunk_size)
+    for partition in db.execute(stmt).partitions():
+        for row in partition:
+            delta.add(dict(zip(ROLLUP_FIELDS, row)))
+            processed += 1
+
+    db.execute(delete(TicketStateRollup))
+    db.execute(delete(TicketActivityRollup))
+    db.execute(delete(ResolutionSketchBin))
+    db.execute(delete(TicketDeadlineRollup))
+    for model, rows in (
+        (TicketStateRollup, delta.state_rows()),
+        (TicketActivityRollup, delta.activity_rows()),
+        (ResolutionSketchBin, delta.sketch_rows()),
+        (TicketDeadlineRollup, delta.deadline_rows()),
+    ):
+        if rows:
+            db.execute(insert(model), rows)
+    db.commit()
+    return processed
+
+
+def rollups_need_backfill(db: Session) -> bool:
+    """True when tickets exist but the rollups were never built (e.g. an upgraded database)"""
+    if db.query(TicketStateRollup).first() is None:
+        return db.query(Ticket.id).first() is not None
+    if db.query(ResolutionSketchBin).first() is None and db.query(Ticket.id).filter(
+        Ticket.status == TicketStatus.RESOLVED, Ticket.resolved_at.isnot(None)
+    ).first() is not None:
+        return True
+    if db.query(TicketDeadlineRollup).first() is None:
+        return db.query(Ticket.id).filter(Ticket.status != TicketStatus.RESOLVED).first() is not None
+    return False
+
+
+def prune_empty_deadline_buckets(db: Session) -> int:
+    """Drop deadline histogram rows whose tickets have all been resolved"""
+    deleted = db.query(TicketDeadlineRollup).filter(TicketDeadlineRollup.open_count == 0).delete(synchronize_session=False)
+    db.commit()
+    return deleted
+
+
+# ==================== Reads ====================
+
+def get_state_counts(db: Session, *group_by, assignee_id: Optional[int] = None) -> list:
+    """Sum current ticket counts from the state rollup, grouped by the given columns"""
+    query = db.query(*group_by, func.sum(TicketStateRollup.ticket_count))
+    if assignee_id is not None:
+        query = query.filter(TicketStateRollup.assignee_id == assignee_id)
+    return query.group_by(*group_by).all()
+
+
+def get_activity_trend(
+    db: Session,
+    granularity: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    priority=None,
+    assignee_id: Optional[int] = None
+) -> List[dict]:
+    """Per-bucket lifecycle counts from the activity rollup"""
+    query = db.query(
+        TicketActivityRollup.bucket_start,
+        func.sum(TicketActivityRollup.created_count),
+        func.sum(TicketActivityRollup.resolved_count),
+        func.sum(TicketActivityRollup.resolved_within_sla_count),
+        func.sum(TicketActivityRollup.breached_count),
+        func.sum(TicketActivityRollup.resolution_hours)
+    ).filter(TicketActivityRollup.granularity == granularity)
+    if start:
+        query = query.filter(TicketActivityRollup.bucket_start >= bucket_start(start, granularity))
+    if end:
+        query = query.filter(TicketActivityRollup.bucket_start < end)
+    if priority:
+        query = query.filter(TicketActivityRollup.priority == priority)
+    if assignee_id is not None:
+        query = query.filter(TicketActivityRollup.assignee_id == assignee_id)
+
+    points = []
+    for bucket, created, resolved, within_sla, breached, hours in query.group_by(
+        TicketActivityRollup.bucket_start
+    ).order_by(TicketActivityRollup.bucket_start).all():
+        points.append({
+            "bucket_start": bucket,
+            "created": int(created or 0),
+            "resolved": int(resolved or 0),
+            "resolved_within_sla": int(within_sla or 0),
+            "breached": int(breached or 0),
+            "avg_resolution_hours": round(hours / resolved, 2) if resolved else 0.0,
+        })
+    return points
+
+
+def get_resolution_totals(db: Session, assignee_id: Optional[int] = None) -> Tuple[float, int]:
+    """Total resolution hours and resolved count over all time"""
+    query = db.query(
+        func.sum(TicketActivityRollup.resolution_hours),
+        func.sum(TicketActivityRollup.resolved_count)
+    ).filter(TicketActivityRollup.granularity == "day")
+    if assignee_id is not None:
+        query = query.filter(TicketActivityRollup.assignee_id == assignee_id)
+    hours, resolved = query.one()
+    return hours or 0.0, int(resolved or 0)
+
+
+PERCENTILE_GROUPS = ("priority", "technician", "week")
+
+
+def get_resolution_percentiles(
+    db: Session,
+    group_by: Optional[str] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    priority=None,
+    assignee_id: Optional[int] = None,
+    quantiles: Tuple[float, ...] = (0.5, 0.9, 0.99)
+) -> List[dict]:
+    """
+    Resolution-time and breach-overrun quantiles by merging weekly sketches
+
+    Time ranges are resolved to whole weeks of resolution. Only sketch bins
+    are read, never ticket rows.
+    """
+    group_columns = {
+        "priority": ResolutionSketchBin.priority,
+        "technician": ResolutionSketchBin.assignee_id,
+        "week": ResolutionSketchBin.week_start,
+    }
+    group_column = group_columns[group_by] if group_by else None
+
+    columns = [ResolutionSketchBin.metric, ResolutionSketchBin.bin_index, func.sum(ResolutionSketchBin.bin_count)]
+    if group_column is not None:
+        columns.insert(0, group_column)
+    query = db.query(*columns)
+    if start:
+        query = query.filter(ResolutionSketchBin.week_start >= bucket_start(start, "week"))
+    if end:
+        query = query.filter(ResolutionSketchBin.week_start < end)
+    if priority:
+        query = query.filter(ResolutionSketchBin.priority == priority)
+    if assignee_id is not None:
+        query = query.filter(ResolutionSketchBin.assignee_id == assignee_id)
+    query = query.group_by(*columns[:-1])
+
+    sketches: Dict[object, Dict[str, DDSketch]] = defaultdict(lambda: {metric: DDSketch() for metric in SKETCH_METRICS})
+    for row in query.all():
+        group = row[0] if group_column is not None else None
+        metric, index, count = row[-3:]
+        if count:
+            sketches[group][metric].bins[index] = int(count)
+
+    results = []
+    for group in sorted(sketches, key=lambda value: (value is None, value)):
+        summary = {"group": group}
+        for metric, sketch in sketches[group].items():
+            estimates = sketch.quantiles(quantiles)
+            summary[metric] = {
+                "count": sketch.count,
+                **{f"p{round(q * 100):g}": round(value, 2) if value is not None else None for q, value in estimates.items()},
+            }
+        results.append(summary)
+    return results
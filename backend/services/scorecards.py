@@ -0,0 +1,251 @@
+"""
+Per-technician performance scorecards
+
+Resolve, escalate, reassign and reopen transitions are detected on every
+flush (so the explicit endpoints, bulk operations and the auto-escalation
+job are all covered) and counted per technician and day:
+
+- in `technician_daily_stats`, in the same transaction, for durability
+- after commit, in an in-memory ring buffer of the last
+  SCORECARD_WINDOW_DAYS days per technician
+
+Scorecards for any rolling window up to that size are summed from the ring
+buffer, so answering costs a fixed number of additions per technician
+regardless of ticket or log volume. The buffers are loaded from the table
+on first use after a restart. Events are tagged with the load generation
+current at their first flush; a transaction that committed around a load
+may or may not be in the table rows it read, so its events are not applied
+and the buffers are reloaded instead.
+"""
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import event, inspect
+from config import settings
+from database import SessionLocal
+from models import TechnicianDailyStats, Ticket, TicketStatus
+from services.rollups import upsert_increments
+
+SCORECARD_COUNTERS = (
+    "resolved_count",
+    "resolution_hours",
+    "breached_resolved_count",
+    "escalations_received",
+    "reopened_count",
+    "reassigned_in_count",
+    "reassigned_out_count",
+)
+_COUNTER_INDEX = {name: i for i, name in enumerate(SCORECARD_COUNTERS)}
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _day_number(moment: datetime) -> int:
+    return (moment - _EPOCH).days
+
+
+class TechnicianRing:
+    """Fixed-size ring of daily counter slots for one technician"""
+
+    __slots__ = ("days", "counters")
+
+    def __init__(self, size: int):
+        self.days = [-1] * size  # Day number each slot currently holds
+        self.counters = [[0.0] * len(SCORECARD_COUNTERS) for _ in range(size)]
+
+    def add(self, day: int, deltas: Dict[str, float]):
+        slot = day % len(self.days)
+        if self.days[slot] != day:
+            if self.days[slot] > day:
+                return  # Older than the ring covers
+            self.days[slot] = day
+            self.counters[slot] = [0.0] * len(SCORECARD_COUNTERS)
+        counters = self.counters[slot]
+        for name, value in deltas.items():
+            counters[_COUNTER_INDEX[name]] += value
+
+    def totals(self, today: int, window_days: int) -> List[float]:
+        totals = [0.0] * len(SCORECARD_COUNTERS)
+        for offset in range(window_days):
+            day = today - offset
+            slot = day % len(self.days)
+            if self.days[slot] == day:
+                for i, value in enumerate(self.counters[slot]):
+                    totals[i] += value
+        return totals
+
+
+class ScorecardStore:
+    """In-memory ring buffers of all technicians"""
+
+    def __init__(self, window_days: int):
+        self.window_days = window_days
+        self._lock = threading.Lock()
+        self._rings: Dict[int, TechnicianRing] = {}
+        self._loaded = False
+        # Changes on every load and invalidation; events recorded against
+        # an older generation are not applied
+        self.generation = 0
+
+    def _ring(self, technician_id: int) -> TechnicianRing:
+        ring = self._rings.get(technician_id)
+        if ring is None:
+            ring = self._rings[technician_id] = TechnicianRing(self.window_days)
+        return ring
+
+    def invalidate(self):
+        """Reload the buffers from the table on next use"""
+        with self._lock:
+            self._loaded = False
+            self.generation += 1
+
+    def apply(self, generation: int, events: List[tuple]):
+        """Apply committed (technician_id, day, deltas) events recorded against `generation`"""
+        with self._lock:
+            if not self._loaded:
+                return  # The next load reads them from the table
+            if generation != self.generation:
+                # A load ran while the transaction was open and may already include it
+                self._loaded = False
+                self.generation += 1
+                return
+            for technician_id, day, deltas in events:
+                self._ring(technician_id).add(day, deltas)
+
+    def ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            since = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=self.window_days - 1)
+            self._rings = {}
+            db = SessionLocal()
+            try:
+                rows = db.query(TechnicianDailyStats).filter(TechnicianDailyStats.day >= since).all()
+                for row in rows:
+                    self._ring(row.technician_id).add(
+                        _day_number(row.day),
+                        {name: getattr(row, name) for name in SCORECARD_COUNTERS}
+                    )
+            finally:
+                db.close()
+            self._loaded = True
+            self.generation += 1
+
+    def scorecard(self, technician_id: int, window_days: int) -> dict:
+        """Scorecard of one technician over the last window_days days (including today)"""
+        self.ensure_loaded()
+        window_days = max(1, min(window_days, self.window_days))
+        with self._lock:
+            ring = self._rings.get(technician_id)
+            totals = ring.totals(_day_number(datetime.utcnow()), window_days) if ring else [0.0] * len(SCORECARD_COUNTERS)
+        values = dict(zip(SCORECARD_COUNTERS, totals))
+        resolved = int(values["resolved_count"])
+        return {
+            "technician_id": technician_id,
+            "window_days": window_days,
+            "resolved": resolved,
+            "mttr_hours": round(values["resolution_hours"] / resolved, 2) if resolved else None,
+            "breached": int(values["breached_resolved_count"]),
+            "breach_rate": round(values["breached_resolved_count"] / resolved, 4) if resolved else None,
+            "escalations_received": int(values["escalations_received"]),
+            "reopened": int(values["reopened_count"]),
+            "reassigned_in": int(values["reassigned_in_count"]),
+            "reassigned_out": int(values["reassigned_out_count"]),
+        }
+
+
+scorecard_store = ScorecardStore(settings.SCORECARD_WINDOW_DAYS)
+
+
+# ==================== Session hooks ====================
+
+def _change(state, name: str):
+    """(old, new) of an attribute changed in this flush, or None"""
+    history = state.attrs[name].history
+    if not history.has_changes():
+        return None
+    old = history.deleted[0] if history.deleted else None
+    new = history.added[0] if history.added else None
+    return None if old == new else (old, new)
+
+
+def _ticket_events(ticket: Ticket, day: int) -> List[tuple]:
+    state = inspect(ticket)
+    status_change = _change(state, "status")
+    assignee_change = _change(state, "assignee_id")
+    events = []
+
+    if status_change and status_change[1] == TicketStatus.RESOLVED and ticket.assignee_id and ticket.resolved_at:
+        hours = (ticket.resolved_at - ticket.created_at).total_seconds() / 3600
+        deltas = {"resolved_count": 1, "resolution_hours": hours}
+        if hours > ticket.sla_limit_hours:
+            deltas["breached_resolved_count"] = 1
+        events.append((ticket.assignee_id, day, deltas))
+    elif status_change and status_change[0] == TicketStatus.RESOLVED:
+        previous_assignee = assignee_change[0] if assignee_change else ticket.assignee_id
+        if previous_assignee:
+            events.append((previous_assignee, day, {"reopened_count": 1}))
+
+    if assignee_change:
+        old, new = assignee_change
+        if status_change and status_change[1] == TicketStatus.ESCALATED:
+            if new:
+                events.append((new, day, {"escalations_received": 1}))
+        else:
+            if new:
+                events.append((new, day, {"reassigned_in_count": 1}))
+            if old:
+                events.append((old, day, {"reassigned_out_count": 1}))
+    elif status_change and status_change[1] == TicketStatus.ESCALATED and ticket.assignee_id:
+        events.append((ticket.assignee_id, day, {"escalations_received": 1}))
+    return events
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _record_scorecard_events(session, flush_context):
+    """Count technician transitions of this flush in the daily stats"""
+    now = datetime.utcnow()
+    day = _day_number(now)
+    events = []
+    for obj in session.dirty:
+        if isinstance(obj, Ticket) and session.is_modified(obj, include_collections=False):
+            events.extend(_ticket_events(obj, day))
+    if not events:
+        return
+
+    # The first flush decides: a load after it may not have seen this transaction
+    session.info.setdefault("scorecard_generation", scorecard_store.generation)
+    merged: Dict[int, Dict[str, float]] = {}
+    for technician_id, _, deltas in events:
+        counters = merged.setdefault(technician_id, dict.fromkeys(SCORECARD_COUNTERS, 0))
+        for name, value in deltas.items():
+            counters[name] += value
+    day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    upsert_increments(
+        session.connection(),
+        TechnicianDailyStats,
+        ("technician_id", "day"),
+        SCORECARD_COUNTERS,
+        [{"technician_id": technician_id, "day": day_start, **counters} for technician_id, counters in merged.items()]
+    )
+    session.info.setdefault("scorecard_events", []).extend(events)
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _apply_committed_scorecard_events(session):
+    generation = session.info.pop("scorecard_generation", None)
+    events = session.info.pop("scorecard_events", None)
+    if events:
+        scorecard_store.apply(generation, events)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back_scorecard_events(session):
+    session.info.pop("scorecard_generation", None)
+    session.info.pop("scorecard_events", None)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back_scorecard_events(session):
+    session.info.pop("scorecard_events", None)
@@ -0,0 +1,49 @@
+"""
+Fast JSON serialization helpers for hot read endpoints
+
+Rows are built from ORM objects with precompiled attribute getters and
+rendered with orjson. Endpoints keep their `response_model` for the OpenAPI
+schema, but return the response directly so trusted ORM data is not
+validated a second time.
+"""
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Iterable, Optional, Sequence
+from fastapi.responses import ORJSONResponse
+
+
+def compile_row_serializer(fields: Sequence[str]) -> Callable[[Any], dict]:
+    """
+    Compile a serializer that turns an object into a dict of the given attributes
+
+    The attribute lookups are resolved once by `operator.attrgetter` instead of
+    going through `__dict__` or Pydantic for every row.
+    """
+    fields = tuple(fields)
+    if len(fields) == 1:
+        name = fields[0]
+        getter = attrgetter(name)
+        return lambda obj: {name: getter(obj)}
+
+    getter = attrgetter(*fields)
+    return lambda obj: dict(zip(fields, getter(obj)))
+
+
+@lru_cache(maxsize=256)
+def cached_row_serializer(fields: tuple) -> Callable[[Any], dict]:
+    """Compiled serializer for a field tuple, reused across requests"""
+    return compile_row_serializer(fields)
+
+
+def fast_json_response(content: Any, status_code: int = 200, headers: Optional[dict] = None) -> ORJSONResponse:
+    """Render already-trusted data with orjson, skipping response model validation"""
+    return ORJSONResponse(content=content, status_code=status_code, headers=headers)
+
+
+def serialize_rows(
+    objects: Iterable[Any],
+    serializer: Callable[[Any], dict],
+    headers: Optional[dict] = None
+) -> ORJSONResponse:
+    """Serialize a list of objects with a compiled serializer"""
+    return fast_json_response([serializer(obj) for obj in objects], headers=headers)
@@ -1,7 +1,8 @@
 from datetime import datetime
 from sqlalchemy.orm import Session
-from models import Ticket, SLAConfig, RiskLevel, TicketStatus
-from typing import List
+from models import Ticket, RiskLevel, TicketStatus
+from services.sla_policy import sla_policy
+from typing import List, Optional
 
 
 def calculate_elapsed_hours(created_at: datetime) -> float:
@@ -30,20 +31,9 @@ def determine_risk_level(risk_percentage: float) -> RiskLevel:
         return RiskLevel.SAFE
 
 
-def get_sla_limit_for_priority(db: Session, priority: str) -> float:
-    """Get SLA limit hours for a given priority"""
-    config = db.query(SLAConfig).filter(SLAConfig.priority == priority).first()
-    if config:
-        return config.sla_hours
-    
-    # Default fallback values
-    defaults = {
-        "CRITICAL": 4,
-        "HIGH": 8,
-        "MEDIUM": 24,
-        "LOW": 48
-    }
-    return defaults.get(priority, 24)
+def get_effective_sla_limit(db: Session, customer: str, priority: str, created_at: Optional[datetime] = None) -> float:
+    """Get SLA limit hours for a new ticket, honouring the customer's SLA contract"""
+    return sla_policy.effective_limit(customer, priority, created_at, db)
 
 
 def update_ticket_sla_status(db: Session, ticket: Ticket) -> dict:
@@ -107,18 +97,12 @@ def monitor_all_tickets(db: Session) -> List[dict]:
     return results
 
 
-def get_high_risk_tickets(db: Session) -> List[Ticket]:
-    """Get all tickets with high risk or breached status"""
-    return db.query(Ticket).filter(
-        Ticket.risk_level.in_([RiskLevel.HIGH_RISK, RiskLevel.BREACHED]),
-        Ticket.status != TicketStatus.RESOLVED
-    ).all()
-
-
-def get_tickets_needing_escalation(db: Session) -> List[Ticket]:
-    """Get tickets that need escalation (high risk but not yet escalated)"""
-    return db.query(Ticket).filter(
+def get_high_risk_tickets(db: Session, options: Optional[list] = None, scope=None) -> List[Ticket]:
+    """Get all tickets with high risk or breached status, optionally limited to a visibility scope"""
+    query = db.query(Ticket).options(*(options or [])).filter(
         Ticket.risk_level.in_([RiskLevel.HIGH_RISK, RiskLevel.BREACHED]),
-        Ticket.status != TicketStatus.ESCALATED,
         Ticket.status != TicketStatus.RESOLVED
-    ).all()
+    )
+    if scope is not None:
+        query = scope.tickets(query)
+    return query.all()
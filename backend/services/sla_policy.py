@@ -0,0 +1,204 @@
+"""
+In-memory SLA policy snapshot
+
+SLA hours per priority are read from `sla_configs` once and held in memory,
+so resolving a ticket's SLA limit on the write path is a dict lookup.
+
+Customer contracts (`customer_sla_contracts`) are compiled into the same
+snapshot: a dict from customer to its per-priority hours and optional
+business calendar, so a ticket's effective limit is resolved with two dict
+lookups. With a calendar, contract hours count only inside business hours;
+they are converted once, at ticket creation, into the wall-clock hours
+until that business deadline, which is what tickets store.
+
+Every change to `sla_configs` or to a contract bumps a version row
+(`sla_policy_version`) in the same transaction. The process that made the change reloads right after
+commit; other worker processes notice the new version at their next check,
+at most SLA_POLICY_CHECK_SECONDS later. Priorities without a stored config
+fall back to the SLA_* settings, the single source of default hours.
+"""
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session, selectinload
+from config import settings
+from database import SessionLocal
+from models import CustomerSLAContract, CustomerSLATerm, SLAConfig, SLAPolicyVersion, TicketPriority
+
+_VERSION_ROW_ID = 1
+
+
+def default_sla_hours() -> Dict[str, float]:
+    """SLA hours per priority from settings (SLA_CRITICAL, SLA_HIGH, ...)"""
+    return {priority.value: float(getattr(settings, f"SLA_{priority.value}")) for priority in TicketPriority}
+
+
+def read_policy_version(db: Session) -> int:
+    version = db.query(SLAPolicyVersion.version).filter(SLAPolicyVersion.id == _VERSION_ROW_ID).scalar()
+    return version or 0
+
+
+def bump_policy_version(connection):
+    """Increment the stored policy version (call inside the changing transaction)"""
+    values = {"version": SLAPolicyVersion.version + 1, "updated_at": datetime.utcnow()}
+    result = connection.execute(
+        update(SLAPolicyVersion).where(SLAPolicyVersion.id == _VERSION_ROW_ID).values(**values)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(SLAPolicyVersion).values(
+            id=_VERSION_ROW_ID, version=1, updated_at=datetime.utcnow()
+        ))
+
+
+class BusinessCalendar:
+    """Business hours (UTC) on a set of weekdays, 0 = Monday"""
+
+    def __init__(self, start_hour: int, end_hour: int, weekdays: Iterable[int]):
+        self.start_hour = start_hour
+        self.end_hour = end_hour
+        self.weekdays = frozenset(weekdays)
+
+    def add_business_hours(self, start: datetime, hours: float) -> datetime:
+        """The moment `hours` business hours after `start`"""
+        if hours <= 0:
+            return start
+        remaining = timedelta(hours=hours)
+        day = start.replace(hour=0, minute=0, second=0, microsecond=0)
+        while True:
+            if day.weekday() in self.weekdays:
+                begin = max(start, day + timedelta(hours=self.start_hour))
+                available = day + timedelta(hours=self.end_hour) - begin
+                if available > timedelta(0):
+                    if remaining <= available:
+                        return begin + remaining
+                    remaining -= available
+            day += timedelta(days=1)
+
+    def wall_clock_hours(self, start: datetime, hours: float) -> float:
+        """Elapsed hours from `start` until `hours` business hours have passed"""
+        return (self.add_business_hours(start, hours) - start).total_seconds() / 3600
+
+
+class CompiledContract:
+    """A customer contract prepared for lookups"""
+
+    def __init__(self, hours: Dict[str, float], calendar: Optional[BusinessCalendar] = None):
+        self.hours = hours
+        self.calendar = calendar
+
+    def limit_for(self, priority: str, default_limits: Dict[str, float], created_at: datetime) -> float:
+        """Wall-clock SLA hours of a ticket created at `created_at`"""
+        hours = self.hours.get(priority)
+        if hours is None:
+            hours = default_limits.get(priority, default_limits[TicketPriority.MEDIUM.value])
+        if self.calendar is None:
+            return hours
+        return self.calendar.wall_clock_hours(created_at, hours)
+
+
+def compile_contract(contract: CustomerSLAContract) -> CompiledContract:
+    calendar = None
+    if contract.business_days:
+        calendar = BusinessCalendar(
+            contract.business_start_hour,
+            contract.business_end_hour,
+            [int(day) for day in contract.business_days.split(",")]
+        )
+    return CompiledContract({term.priority: term.sla_hours for term in contract.terms}, calendar)
+
+
+class SLAPolicyCache:
+    """Process-local snapshot of the SLA policy, validated against the stored version"""
+
+    def __init__(self, check_seconds: float):
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._limits: Optional[Dict[str, float]] = None
+        self._contracts: Dict[str, CompiledContract] = {}
+        self._version = -1
+        self._next_check = 0.0
+
+    def limits(self, db: Optional[Session] = None) -> Dict[str, float]:
+        """SLA hours per priority; the returned dict must not be mutated"""
+        limits = self._limits
+        if limits is not None and time.monotonic() < self._next_check:
+            return limits
+        with self._lock:
+            if self._limits is None or time.monotonic() >= self._next_check:
+                self._refresh(db)
+            return self._limits
+
+    def contract_for(self, customer: str, db: Optional[Session] = None) -> Optional[CompiledContract]:
+        self.limits(db)
+        return self._contracts.get(customer)
+
+    def effective_limit(
+        self,
+        customer: str,
+        priority: str,
+        created_at: Optional[datetime] = None,
+        db: Optional[Session] = None
+    ) -> float:
+        """SLA hours for a new ticket: the customer's contract terms, else the priority default"""
+        limits = self.limits(db)
+        contract = self._contracts.get(customer)
+        if contract is None:
+            return limits.get(priority, limits[TicketPriority.MEDIUM.value])
+        return contract.limit_for(priority, limits, created_at or datetime.utcnow())
+
+    def invalidate(self):
+        """Re-check the stored version on next use"""
+        self._next_check = 0.0
+
+    def _refresh(self, db: Optional[Session]):
+        own_session = db is None
+        db = db or SessionLocal()
+        try:
+            version = read_policy_version(db)
+            if self._limits is None or version != self._version:
+                limits = default_sla_hours()
+                for priority, hours in db.query(SLAConfig.priority, SLAConfig.sla_hours).all():
+                    limits[priority] = hours
+                contracts = db.query(CustomerSLAContract).options(selectinload(CustomerSLAContract.terms)).all()
+                self._contracts = {contract.customer: compile_contract(contract) for contract in contracts}
+                self._limits = limits
+                self._version = version
+        finally:
+            if own_session:
+                db.close()
+        self._next_check = time.monotonic() + self.check_seconds
+
+
+sla_policy = SLAPolicyCache(settings.SLA_POLICY_CHECK_SECONDS)
+
+
+# ==================== Session hooks ====================
+
+POLICY_MODELS = (SLAConfig, CustomerSLAContract, CustomerSLATerm)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _version_sla_config_changes(session, flush_context):
+    """Bump the policy version in the transaction that changes an SLA config or contract"""
+    if session.info.get("sla_policy_changed"):
+        return  # Already bumped in this transaction
+    changed = any(isinstance(obj, POLICY_MODELS) for obj in session.new | session.deleted) or any(
+        isinstance(obj, POLICY_MODELS) and session.is_modified(obj, include_collections=False)
+        for obj in session.dirty
+    )
+    if changed:
+        bump_policy_version(session.connection())
+        session.info["sla_policy_changed"] = True
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _reload_committed_policy(session):
+    if session.info.pop("sla_policy_changed", False):
+        sla_policy.invalidate()
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _discard_rolled_back_policy(session):
+    session.info.pop("sla_policy_changed", None)
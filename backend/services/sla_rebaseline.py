@@ -0,0 +1,235 @@
+"""
+Re-baselining open tickets after an SLA change
+
+When a manager changes the SLA hours of a priority, the open tickets of that
+priority can be moved to the new limit at once. Because the limit is the
+same for every affected ticket, each risk threshold is a fixed cut-off on
+`created_at`, so limits and risk levels are rewritten by a single UPDATE
+with a CASE expression. Customers with an SLA contract are left out of that
+statement and recomputed per customer.
+
+When a customer's contract changes, only that customer's open tickets are
+recomputed. Their limits can differ per ticket (business calendars), so
+they are written with one executemany UPDATE by primary key.
+
+Set-based UPDATEs bypass the session flush hooks, so the old values are
+read first and everything the hooks would have maintained is written here,
+in the same transaction and in bulk: rollup increments, the deadline index,
+change-log rows, one activity entry per ticket and one summary notification
+per manager for tickets that became high risk or breached. The data-version
+hook still sees the UPDATEs, so cached analytics and the dashboard are
+invalidated on commit.
+"""
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import case, insert, literal, or_, select, update
+from sqlalchemy.orm import Session
+from models import (
+    ActivityLog, CustomerSLAContract, Notification, NotificationType, RiskLevel, Ticket, TicketChangeType,
+    TicketPriority, TicketStatus, User, UserRole
+)
+from services.breach_forecast import write_ticket_deadlines
+from services.change_log import record_ticket_changes
+from services.rollups import ROLLUP_FIELDS, RollupDelta, apply_delta
+from services.sla_engine import calculate_risk_percentage, determine_risk_level
+from services.sla_policy import CompiledContract, compile_contract, sla_policy
+
+# Tickets per deadline-index write (bounds the size of the IN list)
+CHUNK_SIZE = 5000
+
+ESCALATING_RISKS = (RiskLevel.HIGH_RISK, RiskLevel.BREACHED)
+
+_COLUMNS = [Ticket.id, Ticket.created_by_user_id] + [getattr(Ticket, name) for name in ROLLUP_FIELDS]
+
+
+def risk_level_expression(sla_hours: float, now: datetime):
+    """SQL expression for a ticket's risk level under `sla_hours`, matching determine_risk_level"""
+    def level(risk: RiskLevel):
+        return literal(risk, Ticket.risk_level.type)
+
+    if sla_hours == 0:
+        return level(RiskLevel.BREACHED)
+    # elapsed / sla_hours >= fraction  <=>  created_at <= now - fraction * sla_hours
+    return case(
+        (Ticket.created_at <= now - timedelta(hours=sla_hours), level(RiskLevel.BREACHED)),
+        (Ticket.created_at <= now - timedelta(hours=0.75 * sla_hours), level(RiskLevel.HIGH_RISK)),
+        (Ticket.created_at <= now - timedelta(hours=0.5 * sla_hours), level(RiskLevel.WARNING)),
+        else_=level(RiskLevel.SAFE)
+    )
+
+
+def rebaseline_open_tickets(db: Session, priority: TicketPriority, sla_hours: float, user) -> dict:
+    """
+    Move the open tickets of a priority to a new SLA limit (caller commits)
+
+    Only tickets whose limit or risk level actually changes are written.
+    Returns the number of tickets re-baselined and the risk transitions.
+    """
+    now = datetime.utcnow()
+    new_risk = risk_level_expression(sla_hours, now)
+    affected = [
+        Ticket.priority == priority,
+        Ticket.status != TicketStatus.RESOLVED,
+        Ticket.customer.notin_(select(CustomerSLAContract.customer)),
+        or_(Ticket.sla_limit_hours != sla_hours, Ticket.risk_level != new_risk),
+    ]
+
+    rows = db.execute(select(new_risk, *_COLUMNS).where(*affected).with_for_update()).all()
+    if rows:
+        db.execute(
+            update(Ticket).where(*affected).values(sla_limit_hours=sla_hours, risk_level=new_risk),
+            execution_options={"synchronize_session": False}
+        )
+    transitions = _record_rebaseline(db, [(row[1:], sla_hours, row[0]) for row in rows], user, now)
+    rebaselined = len(rows)
+
+    # Contract customers without own terms for this priority follow the new default
+    default_limits = dict(sla_policy.limits(db), **{priority.value: sla_hours})
+    for contract in db.query(CustomerSLAContract).all():
+        compiled = compile_contract(contract)
+        if priority.value not in compiled.hours:
+            count, customer_transitions = _rebaseline_customer(
+                db, contract.customer, compiled, default_limits, user, now, priorities=[priority]
+            )
+            rebaselined += count
+            transitions.update(customer_transitions)
+
+    _notify_managers(db, f"SLA change for {priority.value} tickets", transitions)
+    return _summary(rebaselined, transitions)
+
+
+def rebaseline_customer_tickets(db: Session, customer: str, contract: Optional[CustomerSLAContract], user) -> dict:
+    """
+    Recompute the open tickets of one customer after its contract changed (caller commits)
+
+    `contract` is the customer's new contract, or None once it was removed.
+    """
+    now = datetime.utcnow()
+    compiled = compile_contract(contract) if contract is not None else None
+    count, transitions = _rebaseline_customer(db, customer, compiled, sla_policy.limits(db), user, now)
+    _notify_managers(db, f"SLA contract change for {customer}", transitions)
+    return _summary(count, transitions)
+
+
+def _rebaseline_customer(
+    db: Session,
+    customer: str,
+    contract: Optional[CompiledContract],
+    default_limits: Dict[str, float],
+    user,
+    now: datetime,
+    priorities: Optional[Sequence[TicketPriority]] = None
+):
+    query = select(*_COLUMNS).where(Ticket.customer == customer, Ticket.status != TicketStatus.RESOLVED)
+    if priorities:
+        query = query.where(Ticket.priority.in_(priorities))
+
+    changes = []
+    for row in db.execute(query.with_for_update()).all():
+        values = dict(zip(ROLLUP_FIELDS, row[2:]))
+        priority = values["priority"].value
+        created_at = values["created_at"]
+        if contract is not None:
+            sla_hours = contract.limit_for(priority, default_limits, created_at)
+        else:
+            sla_hours = default_limits.get(priority, default_limits[TicketPriority.MEDIUM.value])
+        elapsed_hours = (now - created_at).total_seconds() / 3600
+        risk_level = determine_risk_level(calculate_risk_percentage(elapsed_hours, sla_hours))
+        if sla_hours != values["sla_limit_hours"] or risk_level != values["risk_level"]:
+            changes.append((row, sla_hours, risk_level))
+
+    if changes:
+        db.execute(update(Ticket), [
+            {"id": row[0], "sla_limit_hours": sla_hours, "risk_level": risk_level, "updated_at": now}
+            for row, sla_hours, risk_level in changes
+        ])
+    return len(changes), _record_rebaseline(db, changes, user, now)
+
+
+def _record_rebaseline(db: Session, changes: List[tuple], user, now: datetime) -> Counter:
+    """
+    Write what the flush hooks would have for re-baselined tickets
+
+    `changes` holds (row, new SLA hours, new risk level), where row is
+    (id, created_by_user_id, *ROLLUP_FIELDS) as read before the update.
+    """
+    transitions = Counter()
+    if not changes:
+        return transitions
+
+    delta = RollupDelta()
+    activity_rows, change_rows, deadline_rows = [], [], []
+    for (ticket_id, created_by_user_id, *values), sla_hours, risk_to in changes:
+        old = dict(zip(ROLLUP_FIELDS, values))
+        new = dict(old, sla_limit_hours=sla_hours, risk_level=risk_to)
+        delta.add(old, -1)
+        delta.add(new)
+
+        risk_from = old["risk_level"]
+        details = f"SLA limit changed from {old['sla_limit_hours']:g}h to {sla_hours:g}h"
+        change = {
+            "ticket_id": ticket_id,
+            "change_type": TicketChangeType.UPDATED,
+            "assignee_id": old["assignee_id"],
+            "created_by_user_id": created_by_user_id,
+            "risk_from": None,
+            "risk_to": None,
+        }
+        if risk_from != risk_to:
+            transitions[(risk_from, risk_to)] += 1
+            details += f"; risk {risk_from.value} → {risk_to.value}"
+            change.update(risk_from=risk_from, risk_to=risk_to)
+            if old["sla_limit_hours"] == sla_hours:
+                change["change_type"] = TicketChangeType.RISK_CHANGED
+        change_rows.append(change)
+        activity_rows.append({
+            "ticket_id": ticket_id,
+            "user_id": user.id,
+            "action": "SLA_REBASELINED",
+            "timestamp": now,
+            "details": details,
+        })
+        if old["sla_limit_hours"] != sla_hours:
+            deadline_rows.append({
+                "ticket_id": ticket_id,
+                "deadline": old["created_at"] + timedelta(hours=sla_hours),
+                "priority": old["priority"],
+                "assignee_id": old["assignee_id"],
+            })
+
+    connection = db.connection()
+    apply_delta(connection, delta)
+    for start in range(0, len(deadline_rows), CHUNK_SIZE):
+        write_ticket_deadlines(connection, deadline_rows[start:start + CHUNK_SIZE])
+    record_ticket_changes(db, change_rows)
+    db.execute(insert(ActivityLog), activity_rows)
+    return transitions
+
+
+def _summary(rebaselined: int, transitions: Counter) -> dict:
+    return {
+        "tickets_rebaselined": rebaselined,
+        "risk_transitions": [
+            {"from_risk": risk_from, "to_risk": risk_to, "count": count}
+            for (risk_from, risk_to), count in sorted(transitions.items())
+        ],
+    }
+
+
+def _notify_managers(db: Session, reason: str, transitions: Counter):
+    """One summary notification per manager instead of one alert per ticket"""
+    escalated = sum(count for (_, risk_to), count in transitions.items() if risk_to in ESCALATING_RISKS)
+    if not escalated:
+        return
+    manager_ids: List[int] = db.execute(select(User.id).where(User.role == UserRole.MANAGER)).scalars().all()
+    if manager_ids:
+        db.execute(insert(Notification), [
+            {
+                "user_id": manager_id,
+                "message": f"⚠️ {reason} moved {escalated} tickets to high risk or breached",
+                "type": NotificationType.WARNING,
+                "ticket_id": None,
+            }
+            for manager_id in manager_ids
+        ])
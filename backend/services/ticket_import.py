@@ -0,0 +1,239 @@
+"""
+Bulk ticket ingestion from NDJSON or CSV
+
+Records are read incrementally, validated one by one and inserted in
+batches with a single INSERT ... RETURNING per batch, followed by bulk
+activity-log, change-log and analytics-rollup writes. Invalid rows are
+reported with their row number and never abort the import.
+"""
+import csv
+import json
+from datetime import datetime
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from models import ActivityLog, Notification, NotificationType, Ticket, TicketChangeType, TicketStatus, User
+from auth import Principal
+from schemas import TicketImport
+from services.change_log import record_ticket_changes
+from services.breach_forecast import index_new_tickets
+from services.rollups import apply_new_tickets
+from services.sla_engine import (
+    calculate_risk_percentage,
+    determine_risk_level,
+    get_effective_sla_limit
+)
+
+SUPPORTED_FORMATS = ("ndjson", "csv")
+
+# Keep the error report bounded for very dirty inputs
+MAX_REPORTED_ERRORS = 1000
+
+
+def detect_format(filename: Optional[str]) -> Optional[str]:
+    """Guess the import format from a file name"""
+    if not filename:
+        return None
+    lowered = filename.lower()
+    if lowered.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if lowered.endswith(".csv"):
+        return "csv"
+    return None
+
+
+def iter_records(stream: IO[str], fmt: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Yield (row_number, record, parse_error) from a text stream
+
+    Reads one line (or CSV record) at a time, so memory use does not grow
+    with the input size.
+    """
+    if fmt == "ndjson":
+        for row_number, line in enumerate(stream, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield row_number, None, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield row_number, None, "Expected a JSON object"
+                continue
+            yield row_number, record, None
+    elif fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row_number, row in enumerate(reader, start=2):  # Row 1 is the header
+            # Empty CSV cells mean "not provided"
+            yield row_number, {key: value for key, value in row.items() if key and value != ""}, None
+    else:
+        raise ValueError(f"Unsupported import format '{fmt}'. Use one of: {', '.join(SUPPORTED_FORMATS)}")
+
+
+class TicketImporter:
+    """
+    Batching ticket importer
+
+    SLA limits and known user IDs are snapshotted once at the start, so
+    validating a row never hits the database.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        created_by: Principal,
+        batch_size: int = 1000,
+        notify_assignees: bool = False
+    ):
+        self.db = db
+        self.created_by_id = created_by.id
+        self.created_by_name = created_by.name
+        self.batch_size = batch_size
+        self.notify_assignees = notify_assignees
+        self.user_ids = {user_id for (user_id,) in db.query(User.id).all()}
+        self.batch: List[dict] = []
+        self.processed = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[dict] = []
+
+    def add_error(self, row_number: int, message: str):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_number, "error": message})
+
+    def add(self, row_number: int, record: dict):
+        """Validate one record and queue it for insertion"""
+        self.processed += 1
+        try:
+            ticket = TicketImport.model_validate(record)
+        except ValidationError as e:
+            first = e.errors()[0]
+            location = ".".join(str(part) for part in first["loc"])
+            self.add_error(row_number, f"{location}: {first['msg']}" if location else first["msg"])
+            return
+
+        if ticket.assignee_id is not None and ticket.assignee_id not in self.user_ids:
+            self.add_error(row_number, f"assignee_id: User {ticket.assignee_id} not found")
+            return
+
+        now = datetime.utcnow()
+        created_at = ticket.created_at or now
+        resolved_at = None
+        if ticket.status == TicketStatus.RESOLVED:
+            resolved_at = ticket.resolved_at or now
+        sla_limit = get_effective_sla_limit(self.db, ticket.customer, ticket.priority.value, created_at)
+        elapsed_hours = max(((resolved_at or now) - created_at).total_seconds() / 3600, 0)
+        self.batch.append({
+            "title": ticket.title,
+            "customer": ticket.customer,
+            "description": ticket.description,
+            "priority": ticket.priority,
+            "status": ticket.status,
+            "assignee_id": ticket.assignee_id,
+            "created_by_user_id": self.created_by_id,
+            "created_at": created_at,
+            "updated_at": now,
+            "resolved_at": resolved_at,
+            "sla_limit_hours": sla_limit,
+            "risk_level": determine_risk_level(calculate_risk_percentage(elapsed_hours, sla_limit)),
+        })
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Insert the queued batch in one transaction"""
+        if not self.batch:
+            return
+        batch, self.batch = self.batch, []
+
+        ticket_ids = self.db.execute(
+            insert(Ticket).returning(Ticket.id, sort_by_parameter_order=True),
+            batch
+        ).scalars().all()
+
+        now = datetime.utcnow()
+        self.db.execute(insert(ActivityLog), [
+            {
+                "ticket_id": ticket_id,
+                "user_id": self.created_by_id,
+                "action": "CREATED",
+                "timestamp": now,
+                "details": f"Ticket imported by {self.created_by_name}",
+            }
+            for ticket_id in ticket_ids
+        ])
+        record_ticket_changes(self.db, [
+            {
+                "ticket_id": ticket_id,
+                "change_type": TicketChangeType.CREATED,
+                "assignee_id": row["assignee_id"],
+                "created_by_user_id": self.created_by_id,
+                "risk_to": row["risk_level"],
+            }
+            for ticket_id, row in zip(ticket_ids, batch)
+        ])
+        apply_new_tickets(self.db, batch)
+        index_new_tickets(self.db, ticket_ids, batch)
+        if self.notify_assignees:
+            self._notify(ticket_ids, batch)
+
+        self.db.commit()
+        self.inserted += len(ticket_ids)
+
+    def _notify(self, ticket_ids: List[int], batch: List[dict]):
+        """One notification per assignee per batch"""
+        assigned: Dict[int, List[int]] = {}
+        for ticket_id, row in zip(ticket_ids, batch):
+            if row["assignee_id"]:
+                assigned.setdefault(row["assignee_id"], []).append(ticket_id)
+        if not assigned:
+            return
+        self.db.execute(insert(Notification), [
+            {
+                "user_id": user_id,
+                "message": f"{len(ids)} imported tickets assigned to you",
+                "type": NotificationType.INFO,
+                "ticket_id": ids[0] if len(ids) == 1 else None,
+                "read": False,
+            }
+            for user_id, ids in assigned.items()
+        ])
+
+    def run(self, records: Iterable[Tuple[int, Optional[dict], Optional[str]]]) -> dict:
+        """Import all records and return the summary"""
+        for row_number, record, parse_error in records:
+            if parse_error:
+                self.processed += 1
+                self.add_error(row_number, parse_error)
+            else:
+                self.add(row_number, record)
+        self.flush()
+        return self.summary()
+
+    def summary(self) -> dict:
+        return {
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def import_tickets(
+    db: Session,
+    stream: IO[str],
+    fmt: str,
+    created_by: Principal,
+    batch_size: int = 1000,
+    notify_assignees: bool = False
+) -> dict:
+    """Import tickets from an NDJSON or CSV text stream"""
+    if fmt not in SUPPORTED_FORMATS:
+        raise ValueError(f"Unsupported import format '{fmt}'. Use one of: {', '.join(SUPPORTED_FORMATS)}")
+    importer = TicketImporter(db, created_by, batch_size=batch_size, notify_assignees=notify_assignees)
+    return importer.run(iter_records(stream, fmt))
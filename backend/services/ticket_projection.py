@@ -0,0 +1,139 @@
+"""
+Ticket response projection: sparse fieldsets and lean column loading for list views
+"""
+from typing import List, Optional, Set
+from fastapi import HTTPException, Query, status
+from sqlalchemy.orm import joinedload, load_only
+from models import Ticket, User
+from services.sla_engine import calculate_elapsed_hours, calculate_risk_percentage
+from services.serialization import (
+    cached_row_serializer,
+    compile_row_serializer,
+    fast_json_response
+)
+
+# Columns stored on the tickets table, in response order
+TICKET_COLUMNS = [
+    "id", "title", "customer", "description", "priority", "status",
+    "assignee_id", "created_by_user_id", "created_at", "updated_at",
+    "resolved_at", "sla_limit_hours", "risk_level",
+]
+
+# Calculated fields and the columns they need to be loaded
+COMPUTED_FIELDS = {
+    "time_elapsed_hours": ["created_at"],
+    "risk_percentage": ["created_at", "sla_limit_hours"],
+    "assignee_name": ["assignee_id"],
+    "creator_name": ["created_by_user_id"],
+}
+
+TICKET_FIELDS = set(TICKET_COLUMNS) | set(COMPUTED_FIELDS)
+
+serialize_ticket_columns = compile_row_serializer(TICKET_COLUMNS)
+
+
+def parse_fieldset(fields: Optional[str]) -> Optional[Set[str]]:
+    """
+    Parse a comma-separated `fields=` value into a set of field names
+
+    Returns None when no fieldset was requested (full response).
+    Raises ValueError for unknown field names.
+    """
+    if not fields:
+        return None
+
+    fieldset = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = fieldset - TICKET_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown ticket fields: {', '.join(sorted(unknown))}")
+
+    # The id is always returned so clients can key their rows
+    fieldset.add("id")
+    return fieldset
+
+
+def get_ticket_fieldset(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated list of ticket fields to return (e.g. id,title,status,risk_level)"
+    )
+) -> Optional[Set[str]]:
+    """Dependency that parses the `fields` query parameter"""
+    try:
+        return parse_fieldset(fields)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+def ticket_load_options(fieldset: Optional[Set[str]] = None) -> list:
+    """
+    Build query options that load only what the response needs
+
+    Assignee and creator names are joined in the same query instead of
+    being lazy-loaded per ticket. With a fieldset, unrequested columns
+    (including the large `description` text) are deferred.
+    """
+    if fieldset is None:
+        return [
+            joinedload(Ticket.assignee).load_only(User.name),
+            joinedload(Ticket.creator).load_only(User.name),
+        ]
+
+    columns = {"id"}
+    for field in fieldset:
+        if field in COMPUTED_FIELDS:
+            columns.update(COMPUTED_FIELDS[field])
+        else:
+            columns.add(field)
+
+    options = [load_only(*[getattr(Ticket, name) for name in TICKET_COLUMNS if name in columns])]
+    if "assignee_name" in fieldset:
+        options.append(joinedload(Ticket.assignee).load_only(User.name))
+    if "creator_name" in fieldset:
+        options.append(joinedload(Ticket.creator).load_only(User.name))
+    return options
+
+
+def enrich_ticket_response(ticket: Ticket, fieldset: Optional[Set[str]] = None) -> dict:
+    """Enrich ticket with calculated fields, restricted to a fieldset if given"""
+    if fieldset is None:
+        data = serialize_ticket_columns(ticket)
+        wanted = COMPUTED_FIELDS
+    else:
+        columns = tuple(name for name in TICKET_COLUMNS if name in fieldset)
+        data = cached_row_serializer(columns)(ticket)
+        wanted = fieldset
+
+    if "time_elapsed_hours" in wanted or "risk_percentage" in wanted:
+        elapsed_hours = calculate_elapsed_hours(ticket.created_at)
+        if "time_elapsed_hours" in wanted:
+            data["time_elapsed_hours"] = elapsed_hours
+        if "risk_percentage" in wanted:
+            data["risk_percentage"] = calculate_risk_percentage(elapsed_hours, ticket.sla_limit_hours)
+    if "assignee_name" in wanted:
+        data["assignee_name"] = ticket.assignee.name if ticket.assignee else "Unassigned"
+    if "creator_name" in wanted:
+        data["creator_name"] = ticket.creator.name if ticket.creator else "Unknown"
+
+    return data
+
+
+def ticket_list_response(
+    tickets: List[Ticket],
+    fieldset: Optional[Set[str]] = None,
+    headers: Optional[dict] = None
+):
+    """
+    Serialize a list of tickets for a list endpoint
+
+    The rows come straight from the ORM, so they are rendered with orjson
+    instead of being revalidated against `TicketResponse` (which would also
+    reject sparse rows).
+    """
+    return fast_json_response(
+        [enrich_ticket_response(ticket, fieldset) for ticket in tickets],
+        headers=headers
+    )
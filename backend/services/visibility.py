@@ -0,0 +1,87 @@
+"""
+Ticket visibility scopes
+
+Which tickets a user may see is decided here, once, as SQL predicates that
+routers compose into their queries, so filtering always happens in the
+database (on the indexed assignee and creator columns):
+
+- managers see every ticket
+- technicians and senior technicians see the tickets assigned to them
+- users see the tickets they created
+
+Comments and activity follow the visibility of their ticket. Internal
+comments are visible to managers only.
+"""
+from typing import Optional
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import or_, true
+from sqlalchemy.orm import Session
+from auth import Principal, get_current_user
+from models import Comment, Ticket, TicketChange, UserRole
+from services.analytics import TECHNICIAN_ROLES
+
+
+class VisibilityScope:
+    """The tickets a principal may see"""
+
+    def __init__(self, principal: Principal):
+        self.principal = principal
+        self.unrestricted = principal.role == UserRole.MANAGER
+        # Exactly one of these is set for restricted scopes
+        self.assignee_id: Optional[int] = principal.id if principal.role in TECHNICIAN_ROLES else None
+        self.creator_id: Optional[int] = principal.id if principal.role == UserRole.USER else None
+
+    @property
+    def cache_key(self) -> tuple:
+        """Identifies the visible ticket set, for keying shared cached results"""
+        if self.unrestricted:
+            return ("all",)
+        if self.assignee_id is not None:
+            return ("assignee", self.assignee_id)
+        return ("creator", self.creator_id)
+
+    def ticket_predicate(self):
+        if self.assignee_id is not None:
+            return Ticket.assignee_id == self.assignee_id
+        if self.creator_id is not None:
+            return Ticket.created_by_user_id == self.creator_id
+        return true()
+
+    def tickets(self, query):
+        """Restrict a query over Ticket to visible tickets"""
+        return query if self.unrestricted else query.filter(self.ticket_predicate())
+
+    def changes(self, query):
+        """Restrict a change-log query to entries about visible tickets (or that moved out of view)"""
+        if self.assignee_id is not None:
+            return query.filter(or_(
+                TicketChange.assignee_id == self.assignee_id,
+                TicketChange.previous_assignee_id == self.assignee_id
+            ))
+        if self.creator_id is not None:
+            return query.filter(TicketChange.created_by_user_id == self.creator_id)
+        return query
+
+    def comments(self, query):
+        """Restrict a query over the comments of a visible ticket to visible comments"""
+        return query if self.unrestricted else query.filter(Comment.is_internal == False)
+
+    def get_ticket(self, db: Session, ticket_id: int, options=()) -> Ticket:
+        """Load a ticket the principal may see; 404 when missing, 403 when out of scope"""
+        ticket = self.tickets(db.query(Ticket).options(*options)).filter(Ticket.id == ticket_id).first()
+        if ticket is not None:
+            return ticket
+        if self.unrestricted or db.query(Ticket.id).filter(Ticket.id == ticket_id).first() is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Ticket not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+
+
+def get_visibility_scope(current_user: Principal = Depends(get_current_user)) -> VisibilityScope:
+    """Dependency: visibility scope of the current user"""
+    return VisibilityScope(current_user)
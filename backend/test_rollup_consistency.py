@@ -0,0 +1,302 @@
+"""
+Check the hand-maintained analytics tables against a full rebuild
+
+Bulk operations, imports and SLA re-baselines update tickets with set-based
+statements that bypass the session hooks, so they maintain the rollup and
+deadline tables by hand. After each of them this script snapshots those
+tables, rebuilds them from scratch and compares. It also checks business
+calendar edge cases and the accuracy of the resolution-time sketch.
+
+Runs against a throwaway SQLite database:
+    python test_rollup_consistency.py
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+TEST_DATABASE_URL = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "rollup_consistency.db")
+os.environ.setdefault("DATABASE_URL", TEST_DATABASE_URL)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from config import settings
+from auth import create_access_token
+from database import SessionLocal, init_db
+from models import (
+    ResolutionSketchBin,
+    Ticket,
+    TicketActivityRollup,
+    TicketDeadline,
+    TicketDeadlineRollup,
+    TicketPriority,
+    TicketStateRollup,
+    TicketStatus,
+    User,
+    UserRole
+)
+from services.breach_forecast import rebuild_ticket_deadlines
+from services.quantile_sketch import RELATIVE_ACCURACY, DDSketch
+from services.rollups import rebuild_rollups
+from services.sla_policy import BusinessCalendar
+
+failures = []
+
+
+def check(label, condition, detail=""):
+    if condition:
+        print(f"✅ {label}")
+    else:
+        print(f"❌ {label} {detail}")
+        failures.append(label)
+
+
+# ==================== Rollups vs rebuild ====================
+
+def snapshot(db):
+    """Non-empty rows of every hand-maintained table, in a comparable form"""
+    def rows(model, keep=lambda row: True):
+        return sorted(tuple(row) for row in db.execute(select(model.__table__)).all() if keep(row))
+
+    return {
+        "ticket_deadlines": rows(TicketDeadline),
+        "ticket_deadline_rollups": rows(TicketDeadlineRollup, lambda row: row.open_count),
+        "ticket_state_rollups": rows(TicketStateRollup, lambda row: row.ticket_count),
+        "resolution_sketch_bins": rows(ResolutionSketchBin, lambda row: row.bin_count),
+        "ticket_activity_rollups": sorted(
+            tuple(row)[:-1] + (round(row.resolution_hours, 6),)
+            for row in db.execute(select(TicketActivityRollup.__table__)).all()
+            if row.created_count or row.resolved_count or row.breached_count
+        ),
+    }
+
+
+def check_matches_rebuild(label):
+    """Compare the incrementally maintained tables with a rebuild"""
+    db = SessionLocal()
+    try:
+        maintained = snapshot(db)
+        rebuild_rollups(db)
+        rebuild_ticket_deadlines(db)
+        rebuilt = snapshot(db)
+    finally:
+        db.close()
+    for table in maintained:
+        missing = [row for row in rebuilt[table] if row not in maintained[table]]
+        extra = [row for row in maintained[table] if row not in rebuilt[table]]
+        check(f"{label}: {table}", not missing and not extra, f"missing={missing[:3]} extra={extra[:3]}")
+
+
+def expect(response, code=200):
+    if response.status_code != code:
+        raise AssertionError(f"{response.request.method} {response.request.url} -> {response.status_code}: {response.text[:300]}")
+    return response.json() if response.content else None
+
+
+def seed_users():
+    db = SessionLocal()
+    try:
+        users = [
+            User(email=f"{role.value.lower()}{i}@example.com", name=f"{role.value.title()} {i}", password_hash="-", role=role)
+            for role in UserRole
+            for i in range(2)
+        ]
+        db.add_all(users)
+        db.commit()
+        return {user.email: user.id for user in users}
+    finally:
+        db.close()
+
+
+def ticket_ids(status=None, limit=None):
+    db = SessionLocal()
+    try:
+        query = db.query(Ticket.id).order_by(Ticket.id)
+        if status is not None:
+            query = query.filter(Ticket.status == status)
+        if limit is not None:
+            query = query.limit(limit)
+        return [ticket_id for (ticket_id,) in query.all()]
+    finally:
+        db.close()
+
+
+def import_file(rng, technicians, count):
+    """NDJSON tickets spread over the last few days, some already resolved"""
+    now = datetime.utcnow()
+    lines = []
+    for i in range(count):
+        created_at = now - timedelta(hours=rng.uniform(0, 96))
+        record = {
+            "title": f"Imported ticket {i}",
+            "customer": rng.choice(["acme", "globex", "initech"]),
+            "description": "Imported for the rollup consistency check",
+            "priority": rng.choice([p.value for p in TicketPriority]),
+            "status": rng.choice(["OPEN", "OPEN", "IN_PROGRESS", "ESCALATED", "RESOLVED"]),
+            "assignee_id": rng.choice([None] + technicians),
+            "created_at": created_at.isoformat(),
+        }
+        if record["status"] == "RESOLVED":
+            record["resolved_at"] = (created_at + timedelta(hours=rng.uniform(0.5, 30))).isoformat()
+        lines.append(json.dumps(record))
+    return "\n".join(lines).encode()
+
+
+def test_rollups_match_rebuild():
+    if settings.DATABASE_URL != TEST_DATABASE_URL:
+        raise RuntimeError("Run this script on its own, it needs its own database")
+
+    import main
+    from scheduler import sla_monitoring_job
+
+    init_db()
+    ids = seed_users()
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": str(ids["manager0@example.com"])})}
+    technicians = [ids["technician0@example.com"], ids["technician1@example.com"]]
+    seniors = [ids["senior_technician0@example.com"], ids["senior_technician1@example.com"]]
+    client = TestClient(main.app)
+    rng = random.Random(47)
+
+    print("\n" + "="*60)
+    print("Rollups and deadlines vs rebuild")
+    print("="*60)
+
+    # A business-hours contract before the import, so deadlines depend on the calendar
+    expect(client.put("/sla/contracts/acme", json={
+        "hours": {"CRITICAL": 4, "HIGH": 8},
+        "business_calendar": {"start_hour": 9, "end_hour": 17, "weekdays": [0, 1, 2, 3, 4]},
+    }, headers=headers))
+    for i in range(6):
+        expect(client.post("/tickets/", json={
+            "title": f"Ticket {i}",
+            "customer": "acme",
+            "description": "Created through the API",
+            "priority": ["LOW", "MEDIUM", "HIGH", "CRITICAL"][i % 4],
+            "assignee_id": technicians[i % 2] if i % 3 else None,
+        }, headers=headers), 201)
+    check_matches_rebuild("create")
+
+    summary = expect(client.post(
+        "/tickets/bulk/import",
+        files={"file": ("tickets.ndjson", import_file(rng, technicians, 300), "application/x-ndjson")},
+        headers=headers
+    ))
+    check("import inserted every row", summary["inserted"] == 300, summary)
+    check_matches_rebuild("import")
+
+    open_ids = ticket_ids(TicketStatus.OPEN)
+    expect(client.post("/tickets/bulk/reassign", json={
+        "ticket_ids": open_ids[:40], "new_assignee_id": technicians[1],
+    }, headers=headers))
+    check_matches_rebuild("bulk reassign")
+
+    expect(client.post("/tickets/bulk/escalate", json={"ticket_ids": open_ids[40:70]}, headers=headers))
+    expect(client.post("/tickets/bulk/escalate", json={
+        "ticket_ids": open_ids[70:80], "senior_technician_id": seniors[0],
+    }, headers=headers))
+    check_matches_rebuild("bulk escalate")
+
+    expect(client.post("/tickets/bulk/resolve", json={
+        "ticket_ids": ticket_ids(TicketStatus.IN_PROGRESS)[:25] + open_ids[80:100],
+    }, headers=headers))
+    check_matches_rebuild("bulk resolve")
+
+    result = expect(client.put("/sla/config/MEDIUM", json={"sla_hours": 12, "apply_to_open_tickets": True}, headers=headers))
+    check("re-baseline touched open tickets", result["rebaseline"]["tickets_rebaselined"] > 0, result)
+    check_matches_rebuild("re-baseline")
+
+    expect(client.put("/sla/contracts/globex", json={
+        "hours": {"MEDIUM": 6, "LOW": 30},
+        "business_calendar": {"start_hour": 8, "end_hour": 20, "weekdays": [0, 1, 2, 3, 4, 5]},
+    }, headers=headers))
+    check_matches_rebuild("contract created")
+
+    expect(client.put("/sla/contracts/globex", json={"hours": {"MEDIUM": 10}}, headers=headers))
+    check_matches_rebuild("contract edited")
+
+    expect(client.delete("/sla/contracts/acme", headers=headers))
+    check_matches_rebuild("contract deleted")
+
+    for ticket_id in ticket_ids(TicketStatus.ESCALATED, limit=5) + ticket_ids(TicketStatus.RESOLVED, limit=5):
+        expect(client.delete(f"/tickets/{ticket_id}", headers=headers), 204)
+    check_matches_rebuild("ticket deletes")
+
+    sla_monitoring_job()
+    check_matches_rebuild("SLA monitoring job")
+    assert not failures, failures
+
+
+# ==================== Business calendar ====================
+
+def test_business_calendar_boundaries():
+    print("\n" + "="*60)
+    print("Business calendar boundaries")
+    print("="*60)
+
+    calendar = BusinessCalendar(9, 17, [0, 1, 2, 3, 4])
+    monday = datetime(2024, 1, 1)  # A Monday
+    cases = [
+        ("zero hours", monday + timedelta(hours=20), 0, monday + timedelta(hours=20)),
+        ("start before start_hour", monday + timedelta(hours=7), 1, monday + timedelta(hours=10)),
+        ("ends exactly at end_hour", monday + timedelta(hours=9), 8, monday + timedelta(hours=17)),
+        ("start after end_hour", monday + timedelta(days=1, hours=18), 2, monday + timedelta(days=2, hours=11)),
+        ("weekend start", monday + timedelta(days=5, hours=10), 4, monday + timedelta(days=7, hours=13)),
+        ("Friday afternoon into Monday", monday + timedelta(days=4, hours=16), 3, monday + timedelta(days=7, hours=11)),
+        ("hours spanning several days", monday + timedelta(hours=15, minutes=30), 20, monday + timedelta(days=3, hours=11, minutes=30)),
+        ("spanning a weekend", monday + timedelta(days=3, hours=12), 24, monday + timedelta(days=8, hours=12)),
+    ]
+    for label, start, hours, expected in cases:
+        actual = calendar.add_business_hours(start, hours)
+        check(label, actual == expected, f"got {actual}, expected {expected}")
+
+    saturday = monday + timedelta(days=5, hours=10)
+    check("wall-clock hours from a weekend", calendar.wall_clock_hours(saturday, 4) == 51.0)
+
+    night_shift = BusinessCalendar(0, 24, [5, 6])  # Weekends only, all day
+    check(
+        "whole-day calendar skips weekdays",
+        night_shift.add_business_hours(monday + timedelta(hours=12), 30) == monday + timedelta(days=6, hours=6)
+    )
+    assert not failures, failures
+
+
+# ==================== Quantile sketch ====================
+
+def test_sketch_accuracy():
+    print("\n" + "="*60)
+    print("Resolution-time sketch accuracy")
+    print("="*60)
+
+    rng = random.Random(35)
+    values = [rng.lognormvariate(1.5, 1.2) for _ in range(20000)]
+    first, second = DDSketch(), DDSketch()
+    for i, value in enumerate(values):
+        (first if i % 2 else second).add(value)
+    first.merge(second)
+    check("merged sketch counts every value", first.count == len(values))
+
+    values.sort()
+    for q in (0.0, 0.25, 0.5, 0.9, 0.95, 0.99, 1.0):
+        exact = values[int(q * (len(values) - 1))]
+        estimate = first.quantile(q)
+        error = abs(estimate - exact) / exact
+        check(f"p{q * 100:g} within {RELATIVE_ACCURACY:.0%}", error <= RELATIVE_ACCURACY, f"{estimate} vs {exact}")
+
+    check("empty sketch has no quantiles", DDSketch().quantile(0.5) is None)
+    assert not failures, failures
+
+
+if __name__ == "__main__":
+    for test in (test_rollups_match_rebuild, test_business_calendar_boundaries, test_sketch_accuracy):
+        try:
+            test()
+        except AssertionError:
+            pass  # Already reported by check(); keep going
+
+    print("\n" + "="*60)
+    if failures:
+        print(f"❌ {len(failures)} checks failed")
+        sys.exit(1)
+    print("✅ All checks passed")
@@ -24,6 +24,7 @@ const LoginPage: React.FC<LoginPageProps> = ({ onLogin }) => {
 
       // Store the token in localStorage
       localStorage.setItem('auth_token', response.access_token);
+      localStorage.setItem('refresh_token', response.refresh_token);
       localStorage.setItem('user', JSON.stringify(response.user));
 
       // Map the backend role to UserRole enum
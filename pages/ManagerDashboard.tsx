@@ -50,31 +50,11 @@ const ManagerDashboard: React.FC<ManagerDashboardProps> = ({ currentPage = 'dash
 
   const loadData = async () => {
     try {
-      console.log('[ManagerDashboard] Loading data...');
-
-      // Load tickets first (this is the critical data)
-      const ticketsData = await api.tickets.getAll();
-      console.log('[ManagerDashboard] Tickets received:', ticketsData.length, 'tickets');
-      if (ticketsData.length > 0) {
-        console.log('[ManagerDashboard] First ticket:', ticketsData[0]);
-      }
-      setTickets(ticketsData);
-
-      // Load users to get technicians
-      try {
-        const allUsers = await api.users.getAllUsers();
-        console.log('[ManagerDashboard] Users received:', allUsers.length, 'users');
-
-        // Filter technicians and senior technicians
-        const techs = allUsers.filter((u: any) => u.role === 'TECHNICIAN');
-        const seniors = allUsers.filter((u: any) => u.role === 'SENIOR_TECHNICIAN');
-
-        console.log('[ManagerDashboard] Technicians:', techs.length, 'Senior Technicians:', seniors.length);
-        setTechnicians(techs);
-        setSeniorTechnicians(seniors);
-      } catch (usersError) {
-        console.warn('[ManagerDashboard] Failed to load users (non-critical):', usersError);
-      }
+      // One precomputed snapshot with tickets and technicians
+      const snapshot = await api.dashboard.getManager();
+      setTickets(snapshot.tickets);
+      setTechnicians(snapshot.technicians.filter((u: any) => u.role === 'TECHNICIAN'));
+      setSeniorTechnicians(snapshot.technicians.filter((u: any) => u.role === 'SENIOR_TECHNICIAN'));
     } catch (error) {
       console.error('[ManagerDashboard] Error loading data:', error);
       if (error instanceof Error) {
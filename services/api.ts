@@ -1,4 +1,4 @@
-import axios, { AxiosInstance, AxiosError } from 'axios';
+import axios, { AxiosInstance, AxiosError, InternalAxiosRequestConfig } from 'axios';
 
 const API_BASE_URL = 'http://localhost:8000';
 
@@ -24,13 +24,47 @@ apiClient.interceptors.request.use(
   }
 );
 
+// Access tokens are short-lived: renew them with the refresh token.
+// Concurrent 401s share a single refresh request.
+let refreshInFlight: Promise<string> | null = null;
+
+const refreshAccessToken = (): Promise<string> => {
+  if (!refreshInFlight) {
+    const refreshToken = localStorage.getItem('refresh_token');
+    refreshInFlight = (refreshToken
+      ? axios.post<AuthResponse>(`${API_BASE_URL}/auth/refresh`, { refresh_token: refreshToken }).then((response) => {
+          localStorage.setItem('auth_token', response.data.access_token);
+          localStorage.setItem('refresh_token', response.data.refresh_token);
+          localStorage.setItem('user', JSON.stringify(response.data.user));
+          return response.data.access_token;
+        })
+      : Promise.reject(new Error('No refresh token'))
+    ).finally(() => {
+      refreshInFlight = null;
+    });
+  }
+  return refreshInFlight;
+};
+
 // Response interceptor for error handling
 apiClient.interceptors.response.use(
   (response) => response,
-  (error: AxiosError) => {
-    if (error.response?.status === 401) {
-      // Token expired or invalid
+  async (error: AxiosError) => {
+    const original = error.config as (InternalAxiosRequestConfig & { _retried?: boolean }) | undefined;
+    if (error.response?.status === 401 && original && !original._retried && !original.url?.startsWith('/auth/')) {
+      original._retried = true;
+      try {
+        const token = await refreshAccessToken();
+        original.headers.Authorization = `Bearer ${token}`;
+        return apiClient(original);
+      } catch {
+        // Fall through to sign-out
+      }
+    }
+    if (error.response?.status === 401 && !original?.url?.startsWith('/auth/login')) {
+      // Session expired or revoked
       localStorage.removeItem('auth_token');
+      localStorage.removeItem('refresh_token');
       localStorage.removeItem('user');
       window.location.href = '/#/login';
     }
@@ -62,6 +96,8 @@ export interface User {
 export interface AuthResponse {
   access_token: string;
   token_type: string;
+  expires_in: number;
+  refresh_token: string;
   user: User;
 }
 
@@ -112,6 +148,17 @@ export interface AnalyticsOverview {
   escalated_tickets: number;
 }
 
+export interface ManagerDashboardSnapshot {
+  generated_at: string;
+  change_cursor: number;
+  tickets: TicketResponse[];
+  high_risk_ticket_ids: number[];
+  overview: AnalyticsOverview;
+  risk_distribution: { safe: number; warning: number; high_risk: number; breached: number };
+  technician_workload: any[];
+  technicians: User[];
+}
+
 // API Service
 export const api = {
   // Authentication
@@ -125,6 +172,10 @@ export const api = {
       const response = await apiClient.post('/auth/register', data);
       return response.data;
     },
+
+    logout: async (refreshToken: string): Promise<void> => {
+      await apiClient.post('/auth/logout', { refresh_token: refreshToken });
+    },
   },
 
   // Tickets
@@ -201,6 +252,14 @@ export const api = {
     },
   },
 
+  // Dashboard snapshots
+  dashboard: {
+    getManager: async (): Promise<ManagerDashboardSnapshot> => {
+      const response = await apiClient.get('/dashboard/manager');
+      return response.data;
+    },
+  },
+
   // User Tickets
   users: {
     getAllUsers: async (): Promise<User[]> => {